@@ -0,0 +1,34 @@
+"""Add denormalized rating aggregates to sweets
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-01-10 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Add rating aggregate columns to sweets table
+    op.add_column('sweets', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sweets', sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill aggregates from existing reviews
+    op.execute(
+        """
+        UPDATE sweets SET
+            rating_sum = (SELECT COALESCE(SUM(reviews.rating), 0) FROM reviews WHERE reviews.sweet_id = sweets.id),
+            review_count = (SELECT COUNT(reviews.id) FROM reviews WHERE reviews.sweet_id = sweets.id)
+        """
+    )
+
+def downgrade():
+    # Remove rating aggregate columns from sweets table
+    op.drop_column('sweets', 'review_count')
+    op.drop_column('sweets', 'rating_sum')
@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-14 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Catalog and search sort orders, with id as the tie breaker
+    op.create_index('ix_sweets_created_at_id', 'sweets', ['created_at', 'id'], unique=False)
+    op.create_index('ix_sweets_price_id', 'sweets', ['price', 'id'], unique=False)
+    op.create_index('ix_sweets_name_id', 'sweets', ['name', 'id'], unique=False)
+    op.create_index('ix_sweets_category_id', 'sweets', ['category', 'id'], unique=False)
+    op.create_index('ix_sweets_quantity_id', 'sweets', ['quantity', 'id'], unique=False)
+
+    # Admin and per-user order listings, newest first
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_orders_user_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.drop_index('ix_sweets_quantity_id', table_name='sweets')
+    op.drop_index('ix_sweets_category_id', table_name='sweets')
+    op.drop_index('ix_sweets_name_id', table_name='sweets')
+    op.drop_index('ix_sweets_price_id', table_name='sweets')
+    op.drop_index('ix_sweets_created_at_id', table_name='sweets')
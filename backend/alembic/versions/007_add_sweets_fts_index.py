@@ -0,0 +1,77 @@
+"""Add SQLite FTS5 full-text index over sweets
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-20 09:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+CREATE_SWEETS_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS sweets_fts USING fts5(
+        sweet_id UNINDEXED, name, category, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sweets_fts_after_insert AFTER INSERT ON sweets BEGIN
+        INSERT INTO sweets_fts (sweet_id, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sweets_fts_after_update AFTER UPDATE OF name, category, description ON sweets BEGIN
+        DELETE FROM sweets_fts WHERE sweet_id = old.id;
+        INSERT INTO sweets_fts (sweet_id, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sweets_fts_after_delete AFTER DELETE ON sweets BEGIN
+        DELETE FROM sweets_fts WHERE sweet_id = old.id;
+    END
+    """,
+]
+
+DROP_SWEETS_FTS = [
+    "DROP TRIGGER IF EXISTS sweets_fts_after_insert",
+    "DROP TRIGGER IF EXISTS sweets_fts_after_update",
+    "DROP TRIGGER IF EXISTS sweets_fts_after_delete",
+    "DROP TABLE IF EXISTS sweets_fts",
+]
+
+def upgrade():
+    # SQLite only; other databases keep using LIKE search
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    try:
+        for statement in CREATE_SWEETS_FTS:
+            bind.execute(sa.text(statement))
+    except OperationalError as e:
+        logger.warning("SQLite FTS5 unavailable, sweet search falls back to LIKE: %s", e)
+        return
+    bind.execute(sa.text(
+        "INSERT INTO sweets_fts (sweet_id, name, category, description) "
+        "SELECT id, name, category, description FROM sweets"
+    ))
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for statement in DROP_SWEETS_FTS:
+        bind.execute(sa.text(statement))
@@ -0,0 +1,28 @@
+"""Add catalog version token for response caching
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-01-22 09:00:00.000000
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    catalog_version = op.create_table('catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.String(length=32), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_version, [{'id': 1, 'version': uuid.uuid4().hex}])
+
+def downgrade():
+    op.drop_table('catalog_version')
@@ -0,0 +1,33 @@
+"""Add daily sales rollup per sweet
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-01-29 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('sales_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sweet_id', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['sweet_id'], ['sweets.id'], ),
+        sa.PrimaryKeyConstraint('day', 'sweet_id')
+    )
+    op.create_index('ix_sales_daily_day', 'sales_daily', ['day'], unique=False)
+    op.create_index('ix_sales_daily_category_day', 'sales_daily', ['category', 'day'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_sales_daily_category_day', table_name='sales_daily')
+    op.drop_index('ix_sales_daily_day', table_name='sales_daily')
+    op.drop_table('sales_daily')
@@ -0,0 +1,43 @@
+"""Add per-user reviewable sweets index
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-02-03 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('reviewable_sweets',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('sweet_id', sa.String(), nullable=False),
+        sa.Column('purchased_quantity', sa.Integer(), nullable=False),
+        sa.Column('purchase_date', sa.DateTime(), nullable=False),
+        sa.Column('reviewed', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['sweet_id'], ['sweets.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'sweet_id')
+    )
+
+    # Backfill from confirmed and delivered orders and existing reviews
+    op.execute(
+        """
+        INSERT INTO reviewable_sweets (user_id, sweet_id, purchased_quantity, purchase_date, reviewed)
+        SELECT orders.user_id, order_items.sweet_id, SUM(order_items.quantity), MAX(order_items.created_at),
+            EXISTS (SELECT 1 FROM reviews
+                    WHERE reviews.user_id = orders.user_id AND reviews.sweet_id = order_items.sweet_id)
+        FROM order_items JOIN orders ON orders.id = order_items.order_id
+        WHERE orders.status IN ('CONFIRMED', 'DELIVERED')
+        GROUP BY orders.user_id, order_items.sweet_id
+        """
+    )
+
+def downgrade():
+    op.drop_table('reviewable_sweets')
@@ -0,0 +1,51 @@
+"""Add composite indexes for order item, review, contact form and rating lookups
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-02-05 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+AVG_RATING_INDEX = 'ix_sweets_avg_rating_id'
+
+# Sweet.avg_rating as each dialect renders it; the index is only used when queries match it exactly
+AVG_RATING_EXPRESSIONS = {
+    'sqlite': 'CASE WHEN (review_count > 0) THEN CAST(rating_sum AS FLOAT) / (review_count + 0.0) ELSE 0.0 END',
+    'postgresql': 'CASE WHEN (review_count > 0) THEN CAST(rating_sum AS FLOAT) / CAST(review_count AS NUMERIC) '
+                  'ELSE 0.0 END',
+}
+
+def upgrade():
+    # Items of a page of orders, and orders containing a sweet
+    op.create_index('ix_order_items_order_id_sweet_id', 'order_items', ['order_id', 'sweet_id'], unique=False)
+    op.create_index('ix_order_items_sweet_id', 'order_items', ['sweet_id'], unique=False)
+
+    # Reviews of a sweet, and a user's reviews or their review of one sweet
+    op.create_index('ix_reviews_sweet_id', 'reviews', ['sweet_id'], unique=False)
+    op.create_index('ix_reviews_user_id_sweet_id', 'reviews', ['user_id', 'sweet_id'], unique=False)
+
+    # Unprocessed contact forms, newest first
+    op.create_index('ix_contact_forms_is_processed_created_at', 'contact_forms', ['is_processed', 'created_at'],
+                    unique=False)
+
+    # Rating sort and filter
+    expression = AVG_RATING_EXPRESSIONS.get(op.get_bind().dialect.name)
+    if expression:
+        op.create_index(AVG_RATING_INDEX, 'sweets', [sa.text(f'({expression})'), 'id'], unique=False)
+
+def downgrade():
+    if op.get_bind().dialect.name in AVG_RATING_EXPRESSIONS:
+        op.drop_index(AVG_RATING_INDEX, table_name='sweets')
+    op.drop_index('ix_contact_forms_is_processed_created_at', table_name='contact_forms')
+    op.drop_index('ix_reviews_user_id_sweet_id', table_name='reviews')
+    op.drop_index('ix_reviews_sweet_id', table_name='reviews')
+    op.drop_index('ix_order_items_sweet_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id_sweet_id', table_name='order_items')
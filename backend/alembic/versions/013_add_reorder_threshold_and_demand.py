@@ -0,0 +1,30 @@
+"""Add reorder threshold to sweets and smoothed demand per sweet
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-02-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('sweets', sa.Column('reorder_threshold', sa.Integer(), nullable=True))
+    op.create_table('sweet_demand',
+        sa.Column('sweet_id', sa.String(), nullable=False),
+        sa.Column('ewma_units', sa.Float(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('day_units', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['sweet_id'], ['sweets.id'], ),
+        sa.PrimaryKeyConstraint('sweet_id')
+    )
+
+def downgrade():
+    op.drop_table('sweet_demand')
+    op.drop_column('sweets', 'reorder_threshold')
@@ -1,12 +1,23 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, sweets, reviews, contact, orders
+from app.api.v1.endpoints import auth, users, sweets, reviews, contact, orders, analytics, reservations
+from app.core.config import settings
 
 api_router = APIRouter()
 
+sweets_router = sweets.router
+orders_router = orders.router
+if settings.ASYNC_DB_ENABLED:
+    # Serve the hot catalog and checkout routes from the async engine
+    from app.api.v1.async_routes import asyncify_router
+    sweets_router = asyncify_router(sweets.router)
+    orders_router = asyncify_router(orders.router)
+
 # Include routers
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(sweets.router, prefix="/sweets", tags=["sweets"])
+api_router.include_router(sweets_router, prefix="/sweets", tags=["sweets"])
 api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
 api_router.include_router(contact.router, prefix="/contact", tags=["contact"])
-api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
\ No newline at end of file
+api_router.include_router(orders_router, prefix="/orders", tags=["orders"])
+api_router.include_router(reservations.router, prefix="/reservations", tags=["reservations"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Serve sync route handlers from an AsyncSession.
+
+Every route whose handler takes ``db: Session = Depends(get_db)`` is
+re-registered as an ``async def`` endpoint depending on ``get_async_db``.
+The original handler then runs through ``AsyncSession.run_sync``, so its
+ORM code executes on the event loop and each database round-trip is
+awaited on the async driver instead of holding a threadpool worker.
+Handlers therefore exist once and behave the same in both modes.
+Dependencies that read through a sync Session are swapped for their
+AsyncSession variants, so an async request never opens a sync connection.
+"""
+import inspect
+from typing import Callable
+
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import (
+    get_current_admin_user, get_current_admin_user_async, get_current_user, get_current_user_async
+)
+from app.core.idempotency import idempotent_request, idempotent_request_async
+from app.db.database import get_async_db, get_db
+
+# Handler dependencies that use get_db, and what replaces them on an AsyncSession
+ASYNC_DEPENDENCIES = {
+    get_current_user: get_current_user_async,
+    get_current_admin_user: get_current_admin_user_async,
+    idempotent_request: idempotent_request_async,
+}
+
+def keep_sync_session(endpoint: Callable) -> Callable:
+    """Mark a sync handler that must keep its threadpool Session, e.g. because it streams"""
+    endpoint.keep_sync_session = True
+    return endpoint
+
+def _takes_sync_db(endpoint: Callable) -> bool:
+    if inspect.iscoroutinefunction(endpoint) or getattr(endpoint, "keep_sync_session", False):
+        return False
+    parameter = inspect.signature(endpoint).parameters.get("db")
+    return parameter is not None and getattr(parameter.default, "dependency", None) is get_db
+
+def _async_parameter(parameter: inspect.Parameter) -> inspect.Parameter:
+    if parameter.name == "db":
+        return parameter.replace(annotation=AsyncSession, default=Depends(get_async_db))
+    dependency = getattr(parameter.default, "dependency", None)
+    if dependency in ASYNC_DEPENDENCIES:
+        return parameter.replace(default=Depends(ASYNC_DEPENDENCIES[dependency]))
+    return parameter
+
+def run_on_async_session(endpoint: Callable) -> Callable:
+    """Wrap a sync handler so it runs on the request's AsyncSession"""
+    signature = inspect.signature(endpoint)
+    parameters = [_async_parameter(parameter) for parameter in signature.parameters.values()]
+
+    async def async_endpoint(**kwargs):
+        db: AsyncSession = kwargs.pop("db")
+        try:
+            return await db.run_sync(lambda session: endpoint(db=session, **kwargs))
+        except Exception:
+            # Free the failed handler's locks now; dependencies such as
+            # idempotent_request clean up on their own sessions before this one closes
+            await db.rollback()
+            raise
+
+    async_endpoint.__signature__ = signature.replace(parameters=parameters)
+    async_endpoint.__name__ = endpoint.__name__
+    async_endpoint.__doc__ = endpoint.__doc__
+    return async_endpoint
+
+def asyncify_router(router: APIRouter) -> APIRouter:
+    """Copy of router with every sync-session handler served from an AsyncSession"""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute) or not _takes_sync_db(route.endpoint):
+            async_router.routes.append(route)
+            continue
+        async_router.add_api_route(
+            route.path,
+            run_on_async_session(route.endpoint),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            methods=route.methods,
+            operation_id=route.operation_id,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+            name=route.name,
+        )
+    return async_router
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.core.dependencies import CurrentUser, get_db, get_current_admin
+from app.schemas.analytics import RestockRecommendation, SalesPoint, TopSeller
+from app.services.demand_service import DemandService
+from app.services.sales_service import SalesService
+
+router = APIRouter()
+
+# Days covered when no start is given
+DEFAULT_RANGE_DAYS = 30
+
+def day_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """Inclusive day range, defaulting to the last DEFAULT_RANGE_DAYS days up to today"""
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    return start, end
+
+@router.get("/top-sellers", response_model=List[TopSeller])
+def get_top_sellers(
+    start: Optional[date] = Query(None, description="First day, inclusive"),
+    end: Optional[date] = Query(None, description="Last day, inclusive"),
+    metric: str = Query("revenue", pattern="^(revenue|units)$"),
+    category: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_admin: CurrentUser = Depends(get_current_admin)
+):
+    """Best selling sweets over a day range (admin only)"""
+    start, end = day_range(start, end)
+    return SalesService(db).top_sellers(start, end, metric=metric, category=category, limit=limit)
+
+@router.get("/sales", response_model=List[SalesPoint])
+def get_sales_series(
+    start: Optional[date] = Query(None, description="First day, inclusive"),
+    end: Optional[date] = Query(None, description="Last day, inclusive"),
+    sweet_id: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_admin: CurrentUser = Depends(get_current_admin)
+):
+    """Units and revenue per day, for the shop or one sweet or category (admin only)"""
+    start, end = day_range(start, end)
+    return SalesService(db).time_series(start, end, sweet_id=sweet_id, category=category)
+
+@router.get("/restock-recommendations", response_model=List[RestockRecommendation])
+def get_restock_recommendations(
+    days: Optional[int] = Query(None, ge=1, le=365, description="Days of demand to stock for; RESTOCK_COVER_DAYS by default"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_admin: CurrentUser = Depends(get_current_admin)
+):
+    """Sweets to restock and how many units, from smoothed daily demand (admin only)"""
+    return DemandService(db).recommendations(cover_days=days, limit=limit)
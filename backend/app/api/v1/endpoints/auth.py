@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
@@ -10,17 +11,20 @@ from app.core.auth import auth_service
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     user_service = UserService(db)
-    user = user_service.create_user(user_data)
+    hashed_password = await auth_service.hash_password_async(user_data.password)
+    user = await run_in_threadpool(user_service.create_user, user_data, hashed_password)
     return user
 
 @router.post("/login", response_model=Token)
-def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
     """Login user and return JWT token"""
     user_service = UserService(db)
-    user = user_service.authenticate_user(login_data.email, login_data.password)
+    user = await run_in_threadpool(user_service.get_user_by_email, login_data.email)
+    if user and not await auth_service.verify_password_async(login_data.password, user.hashed_password):
+        user = None
     
     if not user:
         raise HTTPException(
@@ -28,6 +32,11 @@ def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
             detail="Invalid credentials"
         )
     
+    # Upgrade legacy or outdated-cost hashes while we have the plaintext
+    if auth_service.needs_rehash(user.hashed_password):
+        hashed_password = await auth_service.hash_password_async(login_data.password)
+        user = await run_in_threadpool(user_service.update_password_hash, user, hashed_password)
+
     # Create access token
     token_data = {
         "sub": user.email,
@@ -1,8 +1,7 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.dependencies import get_db, get_current_admin
-from app.models.user import User
+from app.core.dependencies import CurrentUser, get_db, get_current_admin
 from app.models.contact import ContactForm
 from app.schemas.contact import ContactFormCreate, ContactFormResponse, ContactFormUpdate
 
@@ -25,7 +24,7 @@ def create_contact_form(
 @router.get("/", response_model=List[ContactFormResponse])
 def get_contact_forms(
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    current_admin: CurrentUser = Depends(get_current_admin)
 ):
     """Get all contact form submissions (admin only)"""
     return db.query(ContactForm).order_by(ContactForm.created_at.desc()).all()
@@ -33,7 +32,7 @@ def get_contact_forms(
 @router.get("/unprocessed", response_model=List[ContactFormResponse])
 def get_unprocessed_contact_forms(
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    current_admin: CurrentUser = Depends(get_current_admin)
 ):
     """Get unprocessed contact form submissions (admin only)"""
     return db.query(ContactForm).filter(
@@ -45,7 +44,7 @@ def update_contact_form(
     contact_id: str,
     contact_update: ContactFormUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    current_admin: CurrentUser = Depends(get_current_admin)
 ):
     """Update contact form status (admin only)"""
     contact = db.query(ContactForm).filter(ContactForm.id == contact_id).first()
@@ -69,7 +68,7 @@ def update_contact_form(
 def delete_contact_form(
     contact_id: str,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    current_admin: CurrentUser = Depends(get_current_admin)
 ):
     """Delete a contact form submission (admin only)"""
     contact = db.query(ContactForm).filter(ContactForm.id == contact_id).first()
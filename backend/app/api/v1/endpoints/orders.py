@@ -1,45 +1,92 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import String, literal, select
 from sqlalchemy.orm import Session, joinedload
 from decimal import Decimal
-from app.core.dependencies import get_db, get_current_user, get_current_admin
+from app.api.v1.async_routes import keep_sync_session
+from app.core import metrics
+from app.core.dependencies import CurrentUser, get_db, get_current_user, get_current_admin
+from app.core.idempotency import IdempotentRequest, idempotent_request
+from app.core.pagination import CURSOR_HEADER, decode_cursor, encode_cursor, keyset_filter
+from app.core.responses import FastJSONResponse
+from app.core.streaming import export_response
 from app.models.user import User
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.sweet import Sweet
-from app.schemas.order import OrderCreate, OrderResponse, OrderUpdate, OrderItemResponse
+from app.schemas.order import OrderCreate, OrderResponse, OrderUpdate
+from app.services.outbox_service import OutboxService
+from app.services.reservation_service import ReservationService
+from app.services.reviewable_service import ReviewableService
+from app.services.sales_service import SalesService
+from app.services.sweet_service import SweetService
 
 router = APIRouter()
 
+# Order listings are paged newest first
+ORDER_SORT_KEY = "created_at:desc"
+
+# Order-level columns of the export; CSV rows repeat them for every item
+ORDER_EXPORT_FIELDS = [
+    "order_id", "user_id", "user_email", "status", "total_amount",
+    "shipping_address", "payment_method", "notes", "created_at", "updated_at",
+]
+ORDER_ITEM_EXPORT_FIELDS = ["item_id", "sweet_id", "sweet_name", "quantity", "unit_price", "total_price"]
+
+# Columns of OrderResponse and OrderItemResponse, in the models' field order
+ORDER_FIELDS = [
+    "shipping_address", "payment_method", "notes", "id", "user_id", "total_amount", "status",
+    "created_at", "updated_at",
+]
+ORDER_ITEM_FIELDS = ["sweet_id", "quantity", "unit_price", "id", "order_id", "total_price", "created_at"]
+
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_order(
     order_data: OrderCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
-    """Create a new order"""
+    """Create a new order; a repeated Idempotency-Key replays the first response"""
+    if idempotency.replay is not None:
+        return idempotency.replay
+    
     if not order_data.items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Order must contain at least one item"
         )
     
+    # Fetch every sweet in the order with a single IN query
+    sweet_ids = {item.sweet_id for item in order_data.items}
+    sweets = {sweet.id: sweet for sweet in db.query(Sweet).filter(Sweet.id.in_(sweet_ids))}
+    # The buyer's own holds on these sweets are used up by this checkout
+    held = ReservationService(db).consume(current_user.id, sweet_ids)
+    
     # Calculate total amount and validate items
     total_amount = Decimal('0.00')
-    order_items_data = []
+    requested = defaultdict(int)
+    order_items = []
     
     for item in order_data.items:
         # Check if sweet exists and has enough stock
-        sweet = db.query(Sweet).filter(Sweet.id == item.sweet_id).first()
+        sweet = sweets.get(item.sweet_id)
         if not sweet:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Sweet with id {item.sweet_id} not found"
             )
         
-        if sweet.quantity < item.quantity:
+        # Several lines may name the same sweet; check their combined quantity
+        requested[sweet.id] += item.quantity
+        available = sweet.available_quantity + held.get(sweet.id, 0)
+        if available < requested[sweet.id]:
+            metrics.stock_out_rejections.inc(path="order")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Not enough stock for {sweet.name}. Available: {sweet.quantity}, Requested: {item.quantity}"
+                detail=f"Not enough stock for {sweet.name}. Available: {available}, Requested: {requested[sweet.id]}"
             )
         
         # Use current sweet price, not the price from request
@@ -47,67 +94,97 @@ def create_order(
         total_price = unit_price * item.quantity
         total_amount += total_price
         
-        order_items_data.append({
-            'sweet_id': item.sweet_id,
-            'quantity': item.quantity,
-            'unit_price': unit_price,
-            'total_price': total_price,
-            'sweet': sweet
-        })
-    
-    # Create order
+        order_items.append(OrderItem(
+            sweet_id=sweet.id,
+            sweet=sweet,
+            quantity=item.quantity,
+            unit_price=unit_price,
+            total_price=total_price
+        ))
+    
+    # Update stock; the conditional UPDATE guards against concurrent checkouts
+    if not SweetService(db).decrement_stock_many(requested, held):
+        db.rollback()
+        metrics.stock_out_rejections.inc(path="order")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough stock for {stock_shortfall(db, requested, held)}"
+        )
+    
+    # Create order; its items are inserted in one batch by the same flush
     db_order = Order(
         user_id=current_user.id,
         total_amount=total_amount,
         shipping_address=order_data.shipping_address,
         payment_method=order_data.payment_method,
-        notes=order_data.notes
+        notes=order_data.notes,
+        order_items=order_items
     )
     
     db.add(db_order)
-    db.flush()  # Get the order ID
-    
-    # Create order items and update stock
-    for item_data in order_items_data:
-        db_order_item = OrderItem(
-            order_id=db_order.id,
-            sweet_id=item_data['sweet_id'],
-            quantity=item_data['quantity'],
-            unit_price=item_data['unit_price'],
-            total_price=item_data['total_price']
-        )
-        db.add(db_order_item)
-        
-        # Update sweet stock
-        item_data['sweet'].quantity -= item_data['quantity']
+    db.flush()
+    SalesService(db).record_order(db_order)
+    # Side effects run from the outbox once this commits, off the request path
+    OutboxService(db).enqueue("order.created", {
+        "order_id": db_order.id,
+        "user_id": current_user.id,
+        "total_amount": total_amount,
+        "items": [
+            {"sweet_id": item.sweet_id, "quantity": item.quantity, "unit_price": item.unit_price}
+            for item in order_items
+        ],
+    }, aggregate_id=db_order.id)
     
+    # Build the response from the flushed objects before commit expires them
+    response = format_order_response(db_order, current_user.email)
+    idempotency.complete(db, status.HTTP_201_CREATED, response)
     db.commit()
-    db.refresh(db_order)
+    metrics.orders_total.inc()
     
-    # Load order with items for response
-    order_with_items = db.query(Order).options(
-        joinedload(Order.order_items).joinedload(OrderItem.sweet)
-    ).filter(Order.id == db_order.id).first()
-    
-    return format_order_response(order_with_items, current_user.email)
+    return response
+
+def stock_shortfall(db: Session, requested: Dict[str, int], held: Optional[Dict[str, int]] = None) -> str:
+    """Name the first sweet that cannot cover its requested quantity"""
+    held = held or {}
+    for sweet in db.query(Sweet).filter(Sweet.id.in_(requested.keys())).order_by(Sweet.name):
+        if sweet.available_quantity + held.get(sweet.id, 0) < requested[sweet.id]:
+            return sweet.name
+    return "one or more items"
 
 @router.get("/my-orders", response_model=List[OrderResponse])
 def get_my_orders(
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get current user's orders"""
-    orders = db.query(Order).options(
-        joinedload(Order.order_items).joinedload(OrderItem.sweet)
-    ).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
+    orders, headers = list_orders(db, cursor, limit, user_id=current_user.id)
     
-    return [format_order_response(order, current_user.email) for order in orders]
+    return FastJSONResponse(orders, headers=headers)
+
+@router.get("/export")
+@keep_sync_session
+def export_orders(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$",
+                        description="ndjson: one order per line with its items; csv: one row per item"),
+    start: Optional[datetime] = Query(None, description="Only orders created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only orders created before this time"),
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    db: Session = Depends(get_db),
+    current_admin: CurrentUser = Depends(get_current_admin)
+):
+    """Stream orders oldest first as NDJSON or CSV (admin only)"""
+    def fetch(session: Session):
+        rows = iter_order_export_rows(session, start=start, end=end, order_status=order_status)
+        return rows if format == "csv" else group_order_rows(rows)
+    return export_response(db.get_bind(), fetch, format, "orders", ORDER_EXPORT_FIELDS + ORDER_ITEM_EXPORT_FIELDS)
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
     order_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get a specific order"""
     order = db.query(Order).options(
@@ -132,23 +209,22 @@ def get_order(
 
 @router.get("/", response_model=List[OrderResponse])
 def get_all_orders(
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    current_admin: CurrentUser = Depends(get_current_admin)
 ):
     """Get all orders (admin only)"""
-    orders = db.query(Order).options(
-        joinedload(Order.order_items).joinedload(OrderItem.sweet),
-        joinedload(Order.user)
-    ).order_by(Order.created_at.desc()).all()
+    orders, headers = list_orders(db, cursor, limit)
     
-    return [format_order_response(order, order.user.email) for order in orders]
+    return FastJSONResponse(orders, headers=headers)
 
 @router.put("/{order_id}", response_model=OrderResponse)
 def update_order(
     order_id: str,
     order_update: OrderUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Update order (admin can update status, users can update shipping info for pending orders)"""
     order = db.query(Order).options(
@@ -185,40 +261,169 @@ def update_order(
             )
     
     # Update order fields
+    old_status = order.status
     for field, value in order_update.model_dump(exclude_unset=True).items():
         setattr(order, field, value)
+    apply_stock_change(db, order, old_status, order.status)
+    SalesService(db).apply_status_change(order, old_status, order.status)
+    ReviewableService(db).apply_status_change(order, old_status, order.status)
     
     db.commit()
     db.refresh(order)
     
     return format_order_response(order, order.user.email)
 
+def apply_stock_change(db: Session, order: Order, old_status: OrderStatus, new_status: OrderStatus) -> None:
+    """Return a cancelled order's units to stock, and take them again if the cancellation is undone"""
+    if (old_status == OrderStatus.CANCELLED) == (new_status == OrderStatus.CANCELLED):
+        return
+    quantities: Dict[str, int] = defaultdict(int)
+    for item in order.order_items:
+        quantities[item.sweet_id] += item.quantity
+    if new_status == OrderStatus.CANCELLED:
+        SweetService(db).return_stock_many(quantities)
+    elif not SweetService(db).decrement_stock_many(quantities):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough stock to reinstate the order: {stock_shortfall(db, quantities)}"
+        )
+
+def list_orders(
+    db: Session,
+    cursor: Optional[str],
+    limit: int,
+    user_id: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """One page of orders newest first as OrderResponse dicts, with the next-page cursor header if more follow.
+
+    The page is picked in a subquery and joined to its items and their sweets,
+    so a single query selects only the response columns and builds no ORM objects.
+    """
+    page = (
+        select(*[getattr(Order, field) for field in ORDER_FIELDS], User.email.label("user_email"))
+        .join(User, User.id == Order.user_id)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit)
+    )
+    if user_id is not None:
+        page = page.where(Order.user_id == user_id)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, ORDER_SORT_KEY, Order.created_at)
+        page = page.where(
+            keyset_filter(Order.created_at, Order.id, created_at, last_id, True, db.get_bind().dialect.name)
+        )
+    page = page.subquery("page")
+    query = (
+        select(
+            page,
+            OrderItem.id.label("item_id"), OrderItem.sweet_id, OrderItem.quantity, OrderItem.unit_price,
+            OrderItem.total_price, OrderItem.created_at.label("item_created_at"),
+            Sweet.name.label("sweet_name"), Sweet.image_url.label("sweet_image_url"),
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == page.c.id)
+        .outerjoin(Sweet, Sweet.id == OrderItem.sweet_id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc(), OrderItem.id)
+    )
+
+    orders = []
+    for order_id, rows in groupby(db.execute(query).mappings(), key=lambda row: row["id"]):
+        rows = list(rows)
+        order = {field: rows[0][field] for field in ORDER_FIELDS}
+        order["order_items"] = [
+            {
+                "sweet_id": row["sweet_id"],
+                "quantity": row["quantity"],
+                "unit_price": row["unit_price"],
+                "id": row["item_id"],
+                "order_id": order_id,
+                "total_price": row["total_price"],
+                "created_at": row["item_created_at"],
+                "sweet_name": row["sweet_name"],
+                "sweet_image_url": row["sweet_image_url"],
+            }
+            for row in rows if row["item_id"] is not None
+        ]
+        order["user_email"] = rows[0]["user_email"]
+        orders.append(order)
+
+    if len(orders) < limit:
+        return orders, {}
+    return orders, {CURSOR_HEADER: encode_cursor(ORDER_SORT_KEY, orders[-1]["created_at"], orders[-1]["id"])}
+
+def created_at_bound(value: datetime, dialect_name: str):
+    """A time filter bound in the form order timestamps are stored in: naive UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    if dialect_name == "sqlite":
+        # SQLite compares the stored text: CURRENT_TIMESTAMP defaults carry no
+        # fraction and values written from Python carry ".ffffff". str() only
+        # adds the fraction when there is one, which orders correctly against
+        # both forms for >= and <.
+        return literal(str(value), String)
+    return value
+
+def iter_order_export_rows(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    order_status: Optional[OrderStatus] = None,
+    batch_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """One flat row per order item, oldest order first, fetched batch_size rows at a time.
+
+    Orders and their items come from a single joined query, so no ORM objects
+    are built and memory does not grow with the number of orders.
+    """
+    query = (
+        select(
+            Order.id.label("order_id"), Order.user_id, User.email.label("user_email"), Order.status,
+            Order.total_amount, Order.shipping_address, Order.payment_method, Order.notes,
+            Order.created_at, Order.updated_at,
+            OrderItem.id.label("item_id"), OrderItem.sweet_id, Sweet.name.label("sweet_name"),
+            OrderItem.quantity, OrderItem.unit_price, OrderItem.total_price,
+        )
+        .join(User, User.id == Order.user_id)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Sweet, Sweet.id == OrderItem.sweet_id)
+        .order_by(Order.created_at, Order.id, OrderItem.id)
+    )
+    dialect_name = db.get_bind().dialect.name
+    if start is not None:
+        query = query.where(Order.created_at >= created_at_bound(start, dialect_name))
+    if end is not None:
+        query = query.where(Order.created_at < created_at_bound(end, dialect_name))
+    if order_status is not None:
+        query = query.where(Order.status == order_status)
+
+    for row in db.execute(query.execution_options(yield_per=batch_size)).mappings():
+        yield dict(row)
+
+def group_order_rows(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Fold consecutive item rows of the same order into one order with an items list"""
+    for order_id, order_rows in groupby(rows, key=lambda row: row["order_id"]):
+        first = next(order_rows)
+        order = {field: first[field] for field in ORDER_EXPORT_FIELDS}
+        order["items"] = [
+            {field: row[field] for field in ORDER_ITEM_EXPORT_FIELDS}
+            for row in (first, *order_rows) if row["item_id"] is not None
+        ]
+        yield order
+
+def order_row(order: Order, user_email: str) -> Dict[str, Any]:
+    """An order as a dict with the fields of OrderResponse, items first loaded with their sweets"""
+    row = {field: getattr(order, field) for field in ORDER_FIELDS}
+    row["order_items"] = [
+        {
+            **{field: getattr(item, field) for field in ORDER_ITEM_FIELDS},
+            "sweet_name": item.sweet.name if item.sweet else None,
+            "sweet_image_url": item.sweet.image_url if item.sweet else None,
+        }
+        for item in order.order_items
+    ]
+    row["user_email"] = user_email
+    return row
+
 def format_order_response(order: Order, user_email: str) -> OrderResponse:
     """Format order for response with proper item details"""
-    order_items = []
-    for item in order.order_items:
-        order_items.append(OrderItemResponse(
-            id=item.id,
-            order_id=item.order_id,
-            sweet_id=item.sweet_id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            total_price=item.total_price,
-            created_at=item.created_at,
-            sweet_name=item.sweet.name if item.sweet else None,
-            sweet_image_url=item.sweet.image_url if item.sweet else None
-        ))
-    
-    return OrderResponse(
-        id=order.id,
-        user_id=order.user_id,
-        total_amount=order.total_amount,
-        status=order.status,
-        shipping_address=order.shipping_address,
-        payment_method=order.payment_method,
-        notes=order.notes,
-        created_at=order.created_at,
-        updated_at=order.updated_at,
-        order_items=order_items,
-        user_email=user_email
-    )
\ No newline at end of file
+    return OrderResponse.model_validate(order_row(order, user_email))
@@ -0,0 +1,44 @@
+from collections import defaultdict
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.dependencies import CurrentUser, get_db, get_current_user
+from app.schemas.reservation import ReservationCreate, ReservationResponse
+from app.services.reservation_service import ReservationService
+
+router = APIRouter()
+
+@router.post("/", response_model=List[ReservationResponse], status_code=status.HTTP_201_CREATED)
+def create_reservations(
+    reservation_data: ReservationCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Hold stock for the cart until checkout or expiry"""
+    if not reservation_data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Reservation must contain at least one item"
+        )
+    quantities: Dict[str, int] = defaultdict(int)
+    for item in reservation_data.items:
+        quantities[item.sweet_id] += item.quantity
+    return ReservationService(db).reserve(current_user.id, quantities)
+
+@router.get("/", response_model=List[ReservationResponse])
+def get_my_reservations(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Get current user's unexpired reservations"""
+    return ReservationService(db).active(current_user.id)
+
+@router.delete("/{reservation_id}")
+def delete_reservation(
+    reservation_id: str,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Release a reservation before it expires"""
+    ReservationService(db).release(current_user.id, reservation_id)
+    return {"message": "Reservation released successfully"}
@@ -1,23 +1,36 @@
-from typing import List
+from typing import Any, Dict, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from app.core.dependencies import get_db, get_current_user
-from app.models.user import User
+from app.core.dependencies import CurrentUser, get_db, get_current_user
+from app.core.responses import FastJSONResponse
 from app.models.review import Review
 from app.models.sweet import Sweet
 from app.schemas.review import ReviewCreate, ReviewResponse, ReviewUpdate
+from app.services.reviewable_service import ReviewableService
+from app.services.sweet_service import SweetService
 
 router = APIRouter()
 
+def review_row(review: Review, user_email: str) -> Dict[str, Any]:
+    """A review as a dict with the fields of ReviewResponse"""
+    return {
+        "sweet_id": review.sweet_id,
+        "rating": review.rating,
+        "comment": review.comment,
+        "id": review.id,
+        "user_id": review.user_id,
+        "created_at": review.created_at,
+        "updated_at": review.updated_at,
+        "user_email": user_email,
+    }
+
 @router.post("/", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 def create_review(
     review: ReviewCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Create a new review for a sweet"""
-    from app.models.order import Order, OrderItem, OrderStatus
-    
     # Check if sweet exists
     sweet = db.query(Sweet).filter(Sweet.id == review.sweet_id).first()
     if not sweet:
@@ -27,25 +40,16 @@ def create_review(
         )
     
     # Check if user has purchased this sweet
-    has_purchased = db.query(OrderItem).join(Order).filter(
-        Order.user_id == current_user.id,
-        OrderItem.sweet_id == review.sweet_id,
-        Order.status.in_([OrderStatus.DELIVERED, OrderStatus.CONFIRMED])
-    ).first()
-    
-    if not has_purchased:
+    reviewable = ReviewableService(db)
+    if reviewable.get(current_user.id, review.sweet_id) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You can only review products you have purchased"
         )
     
-    # Check if user already reviewed this sweet
-    existing_review = db.query(Review).filter(
-        Review.user_id == current_user.id,
-        Review.sweet_id == review.sweet_id
-    ).first()
-    
-    if existing_review:
+    # Claim the review slot; the conditional update also stops concurrent duplicates
+    if not reviewable.set_reviewed(current_user.id, review.sweet_id, True):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have already reviewed this sweet"
@@ -60,6 +64,7 @@ def create_review(
     )
     
     db.add(db_review)
+    SweetService(db).apply_review_rating(review.sweet_id, review.rating, 1)
     db.commit()
     db.refresh(db_review)
     
@@ -79,37 +84,24 @@ def get_reviews_for_sweet(
         Review.sweet_id == sweet_id
     ).all()
     
-    # Add user email to each review
-    response_reviews = []
-    for review in reviews:
-        review_data = ReviewResponse.model_validate(review)
-        review_data.user_email = review.user.email
-        response_reviews.append(review_data)
-    
-    return response_reviews
+    return FastJSONResponse([review_row(review, review.user.email) for review in reviews])
 
 @router.get("/user/me", response_model=List[ReviewResponse])
 def get_my_reviews(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get all reviews by the current user"""
     reviews = db.query(Review).filter(Review.user_id == current_user.id).all()
     
-    response_reviews = []
-    for review in reviews:
-        review_data = ReviewResponse.model_validate(review)
-        review_data.user_email = current_user.email
-        response_reviews.append(review_data)
-    
-    return response_reviews
+    return FastJSONResponse([review_row(review, current_user.email) for review in reviews])
 
 @router.put("/{review_id}", response_model=ReviewResponse)
 def update_review(
     review_id: str,
     review_update: ReviewUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Update a review (only by the review author)"""
     review = db.query(Review).filter(Review.id == review_id).first()
@@ -126,10 +118,15 @@ def update_review(
             detail="You can only update your own reviews"
         )
     
+    old_rating = review.rating
+    
     # Update review fields
     for field, value in review_update.model_dump(exclude_unset=True).items():
         setattr(review, field, value)
     
+    if review.rating != old_rating:
+        SweetService(db).apply_review_rating(review.sweet_id, review.rating - old_rating, 0)
+    
     db.commit()
     db.refresh(review)
     
@@ -141,45 +138,16 @@ def update_review(
 @router.get("/purchasable-items", response_model=List[dict])
 def get_purchasable_items(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get items user has purchased but not yet reviewed"""
-    from app.models.order import Order, OrderItem, OrderStatus
-    
-    # Get all purchased items
-    purchased_items = db.query(OrderItem, Sweet).join(Sweet).join(Order).filter(
-        Order.user_id == current_user.id,
-        Order.status.in_([OrderStatus.DELIVERED, OrderStatus.CONFIRMED])
-    ).all()
-    
-    # Get already reviewed items
-    reviewed_sweet_ids = {review.sweet_id for review in db.query(Review).filter(
-        Review.user_id == current_user.id
-    ).all()}
-    
-    # Filter out already reviewed items
-    reviewable_items = []
-    seen_sweet_ids = set()
-    
-    for order_item, sweet in purchased_items:
-        if sweet.id not in reviewed_sweet_ids and sweet.id not in seen_sweet_ids:
-            reviewable_items.append({
-                'sweet_id': sweet.id,
-                'sweet_name': sweet.name,
-                'sweet_image_url': sweet.image_url,
-                'sweet_category': sweet.category,
-                'purchased_quantity': order_item.quantity,
-                'purchase_date': order_item.created_at
-            })
-            seen_sweet_ids.add(sweet.id)
-    
-    return reviewable_items
+    return ReviewableService(db).unreviewed(current_user.id)
 
 @router.delete("/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_review(
     review_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Delete a review (only by the review author or admin)"""
     review = db.query(Review).filter(Review.id == review_id).first()
@@ -197,6 +165,9 @@ def delete_review(
         )
     
     db.delete(review)
+    SweetService(db).apply_review_rating(review.sweet_id, -review.rating, -1)
+    # The author may review the sweet again
+    ReviewableService(db).set_reviewed(review.user_id, review.sweet_id, False)
     db.commit()
     
     return None
\ No newline at end of file
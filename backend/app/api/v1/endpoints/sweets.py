@@ -1,39 +1,50 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.schemas.sweet import SweetCreate, SweetUpdate, SweetResponse
+from app.schemas.sweet import SweetCreate, SweetUpdate, SweetResponse, SweetImportReport, FacetedSearchResponse
 from app.schemas.purchase import PurchaseCreate, PurchaseResponse
-from app.services.sweet_service import SweetService
-from app.core.dependencies import get_current_user, get_current_admin_user
-from app.models.user import User
+from app.services.sweet_service import EXPORT_COLUMNS, SweetService
+from app.api.v1.async_routes import keep_sync_session
+from app.core.dependencies import CurrentUser, get_current_user, get_current_admin_user
+from app.core.catalog_cache import catalog_response
+from app.core.idempotency import IdempotentRequest, idempotent_request
+from app.core.config import settings
+from app.core.streaming import export_response, iter_stream_lines, read_csv, read_ndjson
+from app.core.pagination import CURSOR_HEADER
 
 router = APIRouter()
 
 @router.get("/", response_model=List[SweetResponse])
 def get_sweets(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db)
 ):
     """Get all sweets with ratings"""
-    sweet_service = SweetService(db)
-    return sweet_service.get_sweets_with_ratings(skip=skip, limit=limit)
+    def build():
+        sweet_service = SweetService(db)
+        sweets = sweet_service.get_sweets_with_ratings(skip=skip, limit=limit, cursor=cursor)
+        next_cursor = sweet_service.next_cursor(sweets, limit)
+        return sweets, {CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return catalog_response(request, db, build, List[SweetResponse], ttl=settings.CATALOG_STOCK_TTL_SECONDS)
 
 @router.post("/", response_model=SweetResponse, status_code=201)
 def create_sweet(
     sweet_data: SweetCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """Create a new sweet (admin only)"""
     sweet_service = SweetService(db)
     return sweet_service.create_sweet(sweet_data)
 
-@router.get("/search", response_model=List[SweetResponse])
-def search_sweets(
-    query: Optional[str] = Query(None, description="Search by name"),
+def search_filters(
+    query: Optional[str] = Query(None, description="Full-text search over name, category and description"),
     category: Optional[str] = Query(None, description="Filter by category"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
@@ -41,41 +52,107 @@ def search_sweets(
     in_stock_only: Optional[bool] = Query(None, description="Show only in-stock items"),
     min_quantity: Optional[int] = Query(None, ge=0, description="Minimum quantity"),
     max_quantity: Optional[int] = Query(None, ge=0, description="Maximum quantity"),
+) -> Dict[str, Any]:
+    """Search filter query parameters shared by the search endpoints"""
+    return {
+        "query": query,
+        "category": category,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_rating": min_rating,
+        "in_stock_only": in_stock_only,
+        "min_quantity": min_quantity,
+        "max_quantity": max_quantity,
+    }
+
+@router.get("/search", response_model=List[SweetResponse])
+def search_sweets(
+    response: Response,
+    filters: Dict[str, Any] = Depends(search_filters),
     sort_by: Optional[str] = Query(None, description="Sort by: price, name, rating, created_at, quantity, category"),
     sort_order: Optional[str] = Query("asc", description="Sort order: asc or desc"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db)
 ):
     """Search sweets with advanced filters and sorting"""
     sweet_service = SweetService(db)
-    return sweet_service.search_sweets(
-        query=query,
-        category=category,
-        min_price=min_price,
-        max_price=max_price,
-        min_rating=min_rating,
-        in_stock_only=in_stock_only,
-        min_quantity=min_quantity,
-        max_quantity=max_quantity,
+    sweets = sweet_service.search_sweets(
+        **filters,
         sort_by=sort_by,
         sort_order=sort_order,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
+    next_cursor = sweet_service.next_cursor(sweets, limit, sort_by, sort_order)
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    return sweets
+
+@router.get("/search/faceted", response_model=FacetedSearchResponse)
+def search_sweets_faceted(
+    request: Request,
+    filters: Dict[str, Any] = Depends(search_filters),
+    sort_by: Optional[str] = Query(None, description="Sort by: price, name, rating, created_at, quantity, category"),
+    sort_order: Optional[str] = Query("asc", description="Sort order: asc or desc"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: Session = Depends(get_db)
+):
+    """Search sweets and count the matches per category, price band and rating band"""
+    def build():
+        sweet_service = SweetService(db)
+        sweets = sweet_service.search_sweets(
+            **filters, sort_by=sort_by, sort_order=sort_order, skip=skip, limit=limit, cursor=cursor
+        )
+        next_cursor = sweet_service.next_cursor(sweets, limit, sort_by, sort_order)
+        content = {"items": sweets, "facets": sweet_service.search_facets(**filters)}
+        return content, {CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return catalog_response(request, db, build, FacetedSearchResponse, ttl=settings.CATALOG_STOCK_TTL_SECONDS)
+
+@router.post("/import", response_model=SweetImportReport)
+async def import_sweets(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Body format: csv (with header) or ndjson"),
+    batch_size: int = Query(settings.SWEET_IMPORT_BATCH_SIZE, ge=1, le=10000, description="Rows per insert batch"),
+    transaction: str = Query("batch", pattern="^(batch|all)$",
+                             description="batch: commit each batch; all: commit only if every row is valid"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """Bulk import sweets from a streamed CSV or NDJSON body (admin only)"""
+    def run_import():
+        lines = iter_stream_lines(request.stream())
+        rows = read_csv(lines) if format == "csv" else read_ndjson(lines)
+        return SweetService(db).import_sweets(rows, batch_size=batch_size, atomic=transaction == "all")
+    return await run_in_threadpool(run_import)
+
+@router.get("/export")
+@keep_sync_session
+def export_sweets(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """Stream the whole catalog as CSV or NDJSON (admin only)"""
+    fetch = lambda session: SweetService(session).iter_export_rows()
+    return export_response(db.get_bind(), fetch, format, "sweets", EXPORT_COLUMNS)
 
 @router.get("/{sweet_id}", response_model=SweetResponse)
-def get_sweet(sweet_id: str, db: Session = Depends(get_db)):
+def get_sweet(sweet_id: str, request: Request, db: Session = Depends(get_db)):
     """Get sweet by ID"""
-    sweet_service = SweetService(db)
-    return sweet_service.get_sweet_by_id(sweet_id)
+    build = lambda: (SweetService(db).get_sweet_by_id(sweet_id), {})
+    return catalog_response(request, db, build, SweetResponse, ttl=settings.CATALOG_STOCK_TTL_SECONDS)
 
 @router.put("/{sweet_id}", response_model=SweetResponse)
 def update_sweet(
     sweet_id: str,
     sweet_data: SweetUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """Update sweet (admin only)"""
     sweet_service = SweetService(db)
@@ -85,7 +162,7 @@ def update_sweet(
 def delete_sweet(
     sweet_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """Delete sweet (admin only)"""
     sweet_service = SweetService(db)
@@ -97,14 +174,20 @@ def purchase_sweet(
     sweet_id: str,
     purchase_data: PurchaseCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
-    """Purchase a sweet"""
+    """Purchase a sweet; a repeated Idempotency-Key replays the first response"""
+    if idempotency.replay is not None:
+        return idempotency.replay
     sweet_service = SweetService(db)
     return sweet_service.purchase_sweet(
         sweet_id=sweet_id,
         user_id=current_user.id,
-        quantity=purchase_data.quantity
+        quantity=purchase_data.quantity,
+        before_commit=lambda purchase: idempotency.complete(
+            db, status.HTTP_200_OK, PurchaseResponse.model_validate(purchase)
+        )
     )
 
 @router.post("/{sweet_id}/restock", response_model=SweetResponse)
@@ -112,20 +195,20 @@ def restock_sweet(
     sweet_id: str,
     quantity: int = Query(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """Restock sweet inventory (admin only)"""
     sweet_service = SweetService(db)
     return sweet_service.restock_sweet(sweet_id, quantity)
 
 @router.get("/filters/categories", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, db: Session = Depends(get_db)):
     """Get all available categories"""
-    sweet_service = SweetService(db)
-    return sweet_service.get_categories()
+    build = lambda: (SweetService(db).get_categories(), {})
+    return catalog_response(request, db, build, List[str])
 
 @router.get("/filters/price-range")
-def get_price_range(db: Session = Depends(get_db)):
+def get_price_range(request: Request, db: Session = Depends(get_db)):
     """Get price range (min and max prices)"""
-    sweet_service = SweetService(db)
-    return sweet_service.get_price_range()
\ No newline at end of file
+    build = lambda: (SweetService(db).get_price_range(), {})
+    return catalog_response(request, db, build)
\ No newline at end of file
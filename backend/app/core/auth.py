@@ -1,22 +1,67 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
-import hashlib
 from app.core.config import settings
 
+PASSWORD_HASH_SCHEME = "pbkdf2-sha256"
+LEGACY_SALT = "sweet_shop_salt"
+
+# Hashing gets its own small pool so login bursts cannot occupy the request threadpool
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
 class AuthService:
-    def __init__(self):
-        pass
+    def __init__(self, iterations: Optional[int] = None):
+        self.iterations = iterations or settings.PASSWORD_HASH_ITERATIONS
 
     def hash_password(self, password: str) -> str:
-        """Hash a password using SHA256 (simplified for testing)"""
-        # In production, use bcrypt. For testing, using SHA256 with salt
-        salt = "sweet_shop_salt"
-        return hashlib.sha256((password + salt).encode()).hexdigest()
+        """Hash a password as $pbkdf2-sha256$<iterations>$<salt>$<hash>"""
+        salt = os.urandom(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, self.iterations)
+        return f"${PASSWORD_HASH_SCHEME}${self.iterations}${_b64encode(salt)}${_b64encode(digest)}"
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash"""
-        return self.hash_password(plain_password) == hashed_password
+        """Verify a password against a versioned or legacy SHA256 hash"""
+        if not hashed_password.startswith("$"):
+            legacy = hashlib.sha256((plain_password + LEGACY_SALT).encode()).hexdigest()
+            return hmac.compare_digest(legacy, hashed_password)
+        try:
+            _, scheme, iterations, salt, digest = hashed_password.split("$")
+            if scheme != PASSWORD_HASH_SCHEME:
+                return False
+            candidate = hashlib.pbkdf2_hmac("sha256", plain_password.encode(), _b64decode(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(candidate, _b64decode(digest))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a stored hash uses a legacy format or a different cost"""
+        return not hashed_password.startswith(f"${PASSWORD_HASH_SCHEME}${self.iterations}$")
+
+    async def hash_password_async(self, password: str) -> str:
+        """hash_password on the dedicated hashing pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, self.hash_password, password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password on the dedicated hashing pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            password_hash_executor, self.verify_password, plain_password, hashed_password
+        )
 
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token"""
@@ -0,0 +1,80 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.catalog_version import CATALOG_VERSION_ID, CatalogVersion, new_catalog_version
+
+# Serialized catalog responses keyed by (catalog version, path, query)
+catalog_cache = TTLCache(settings.CATALOG_CACHE_MAX_SIZE, settings.CATALOG_CACHE_TTL_SECONDS)
+metrics.register_cache("catalog", catalog_cache)
+
+def get_catalog_version(db: Session) -> Optional[str]:
+    """Current catalog version token, or None when the table has no row"""
+    return db.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    ).scalar()
+
+def bump_catalog_version(db: Session) -> None:
+    """Give the catalog a new version token. The caller owns the transaction and must commit.
+
+    Only for catalog edits; checkouts and reservations must not contend on this row.
+    """
+    version = new_catalog_version()
+    result = db.execute(
+        update(CatalogVersion).where(CatalogVersion.id == CATALOG_VERSION_ID).values(version=version),
+        execution_options={"synchronize_session": False}
+    )
+    if result.rowcount == 0:
+        db.execute(insert(CatalogVersion).values(id=CATALOG_VERSION_ID, version=version))
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+def catalog_response(
+    request: Request,
+    db: Session,
+    build: Callable[[], Tuple[Any, Dict[str, str]]],
+    response_type: Any = Any,
+    ttl: Optional[float] = None,
+) -> Response:
+    """Serve a public catalog read from the response cache with a strong ETag.
+
+    build() returns the content and any extra headers; it only runs when the
+    (catalog version, path, query) key is not cached. The version is read
+    before the data, so an entry can never hold data older than its key.
+    Stock changes do not bump the version, so reads that show stock levels
+    pass a short ttl bounding how stale those may be. A matching
+    If-None-Match gets an empty 304.
+    """
+    version = get_catalog_version(db)
+    key = (version, request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entry = catalog_cache.get(key) if version else None
+    if entry is None:
+        content, headers = build()
+        adapter = _adapter(response_type)
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', headers)
+        if version:
+            catalog_cache.set(key, entry, ttl)
+
+    body, etag, headers = entry
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
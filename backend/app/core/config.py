@@ -6,5 +6,59 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "sweet-shop-secret-key-for-development-only")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # PBKDF2-SHA256 cost; stored hashes with a different cost are upgraded on login
+    PASSWORD_HASH_ITERATIONS: int = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Serialized public catalog responses, keyed on the catalog version
+    CATALOG_CACHE_TTL_SECONDS: int = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+    CATALOG_CACHE_MAX_SIZE: int = int(os.getenv("CATALOG_CACHE_MAX_SIZE", "1024"))
+    CATALOG_STOCK_TTL_SECONDS: int = int(os.getenv("CATALOG_STOCK_TTL_SECONDS", "5"))
+    # Per-request SQL statistics (Server-Timing header and request log)
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "100"))
+    # Expose Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Rows per executemany batch for bulk sweet imports
+    SWEET_IMPORT_BATCH_SIZE: int = int(os.getenv("SWEET_IMPORT_BATCH_SIZE", "1000"))
+    # Outbox worker: batch size, poll interval, claim lease and retry backoff
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_RETRY_BASE_SECONDS: float = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "2"))
+    OUTBOX_RETRY_MAX_SECONDS: float = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "600"))
+    OUTBOX_RETENTION_SECONDS: int = int(os.getenv("OUTBOX_RETENTION_SECONDS", "604800"))
+    # Restock recommendations: EWMA smoothing of daily sales and days of stock to cover
+    DEMAND_EWMA_ALPHA: float = float(os.getenv("DEMAND_EWMA_ALPHA", "0.3"))
+    RESTOCK_COVER_DAYS: int = int(os.getenv("RESTOCK_COVER_DAYS", "14"))
+    # Stock reservations: hold lifetime and the expiry sweeper's batch size and interval
+    RESERVATION_TTL_SECONDS: int = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+    RESERVATION_MAX_PER_SWEET: int = int(os.getenv("RESERVATION_MAX_PER_SWEET", "10"))
+    RESERVATION_SWEEP_BATCH_SIZE: int = int(os.getenv("RESERVATION_SWEEP_BATCH_SIZE", "500"))
+    RESERVATION_SWEEP_SECONDS: float = float(os.getenv("RESERVATION_SWEEP_SECONDS", "30"))
+    # Idempotency-Key: how long keys are kept, how long a duplicate waits for the first request,
+    # how long that request may hold the key, and how many expired keys each new key purges
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = int(os.getenv("IDEMPOTENCY_PURGE_BATCH_SIZE", "100"))
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))  # negative = KiB
+    # Serve the sweets and orders routers from an async engine (aiosqlite/asyncpg)
+    ASYNC_DB_ENABLED: bool = os.getenv("ASYNC_DB_ENABLED", "false").lower() in ("1", "true", "yes")
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    # Authenticated user lookup cache; a TTL of 0 disables it
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
 
 settings = Settings()
\ No newline at end of file
@@ -1,25 +1,57 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError
 
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db
+from app.core import metrics
 from app.core.auth import auth_service
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.services.user_service import UserService
 from app.models.user import User
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+@dataclass(frozen=True)
+class CurrentUser:
+    """Identity of the authenticated user, detached from any session"""
+    id: str
+    email: str
+    is_admin: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, email=user.email, is_admin=user.is_admin, created_at=user.created_at)
+
+# Keyed by token subject (email); the DB is only queried on a miss
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+metrics.register_cache("user", user_cache)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Evict a user from the cache when the row changes through the ORM"""
+    user_cache.invalidate(target.email)
+    for previous_email in inspect(target).attrs.email.history.deleted:
+        user_cache.invalidate(previous_email)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_identity(credentials: HTTPAuthorizationCredentials) -> Tuple[str, Optional[str]]:
+    """The (email, user id) a bearer token was issued for; 401 when it is not valid"""
+    credentials_exception = _credentials_exception()
     
     try:
         payload = auth_service.verify_token(credentials.credentials)
@@ -28,16 +60,43 @@ def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
+    return email, payload.get("user_id")
+
+def _cached_user(email: str, user_id: Optional[str]) -> Optional[CurrentUser]:
+    # A cached entry only counts if it is the same account the token was issued for
+    cached = user_cache.get(email)
+    if cached is not None and (user_id is None or cached.id == user_id):
+        return cached
+    return None
+
+def _load_user(db: Session, email: str) -> CurrentUser:
+    """Read the user on a cache miss and cache it"""
     user_service = UserService(db)
     user = user_service.get_user_by_email(email)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    return user
+    current_user = CurrentUser.from_user(user)
+    user_cache.set(email, current_user)
+    return current_user
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
-    """Get current authenticated admin user"""
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> CurrentUser:
+    """Get current authenticated user"""
+    email, user_id = _token_identity(credentials)
+    return _cached_user(email, user_id) or _load_user(db, email)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """get_current_user on the request's AsyncSession, for routes served by asyncify_router"""
+    email, user_id = _token_identity(credentials)
+    return _cached_user(email, user_id) or await db.run_sync(_load_user, email)
+
+def _require_admin(current_user: CurrentUser) -> CurrentUser:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -45,5 +104,13 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
         )
     return current_user
 
+def get_current_admin_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    """Get current authenticated admin user"""
+    return _require_admin(current_user)
+
+async def get_current_admin_user_async(current_user: CurrentUser = Depends(get_current_user_async)) -> CurrentUser:
+    """get_current_admin_user on the request's AsyncSession"""
+    return _require_admin(current_user)
+
 # Alias for consistency
 get_current_admin = get_current_admin_user
\ No newline at end of file
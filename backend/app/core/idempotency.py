@@ -0,0 +1,249 @@
+"""
+Idempotency-Key support for endpoints that must not run twice.
+
+The first request with a key inserts its row and commits before the handler
+runs, so the primary key coalesces concurrent duplicates: they poll until the
+first one stores its response, then replay it. The handler stores the
+response with IdempotentRequest.complete in its own transaction, so the
+response is recorded if and only if the work it describes commits.
+"""
+import asyncio
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.dependencies import CurrentUser, get_current_user, get_current_user_async
+from app.db.database import get_async_db, get_db
+from app.models.idempotency_key import IdempotencyKey
+from app.services.outbox_service import utcnow
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# How often a duplicate checks whether the first request has finished
+POLL_SECONDS = 0.05
+
+class IdempotentRequest:
+    """What an endpoint needs to honour an Idempotency-Key; inert when the header is absent"""
+
+    def __init__(self, user_id: Optional[str] = None, key: Optional[str] = None,
+                 replay: Optional[Response] = None):
+        self.user_id = user_id
+        self.key = key
+        # The stored response when this request repeats a finished one
+        self.replay = replay
+        self.completed = False
+
+    def complete(self, db: Session, status_code: int, body: BaseModel) -> None:
+        """Store the response in the caller's transaction; it commits together with the work"""
+        if self.key is None:
+            return
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == self.user_id, IdempotencyKey.key == self.key)
+            .values(response_status=status_code, response_body=body.model_dump_json(), locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        self.completed = True
+
+def request_hash(method: str, path: str, body: bytes) -> str:
+    return hashlib.sha256(f"{method} {path}\n".encode() + body).hexdigest()
+
+def _replay(row: IdempotencyKey) -> Response:
+    metrics.idempotent_replays.inc()
+    return Response(
+        content=row.response_body,
+        status_code=row.response_status,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"}
+    )
+
+def _claim_step(db: Session, user_id: str, key: str, fingerprint: str) -> Tuple[bool, Optional[Response]]:
+    """Take or read the key without waiting for another holder.
+
+    Returns (True, None) when this request took the key, (True, response) when
+    it already has one, and (False, None) when another request holds it.
+    """
+    where = (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    while True:
+        now = utcnow()
+        row = db.execute(
+            select(IdempotencyKey).where(*where).execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if row is None or row.expires_at <= now:
+            if row is not None:
+                db.execute(delete(IdempotencyKey).where(*where, IdempotencyKey.expires_at <= now))
+            _purge_expired(db, now)
+            db.execute(insert(IdempotencyKey).values(
+                user_id=user_id, key=key, request_hash=fingerprint,
+                locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+            ))
+            try:
+                db.commit()
+                return True, None
+            except IntegrityError:
+                # A concurrent duplicate inserted first; look again
+                db.rollback()
+                continue
+
+        if row.request_hash != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+            )
+        if row.response_status is not None:
+            return True, _replay(row)
+        if row.locked_until <= now:
+            taken = db.execute(
+                update(IdempotencyKey)
+                .where(*where, IdempotencyKey.locked_until == row.locked_until,
+                       IdempotencyKey.response_status.is_(None))
+                .values(locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if taken:
+                return True, None
+            continue
+        # End the read transaction so the next look sees the holder's commit
+        db.rollback()
+        return False, None
+
+def _check_deadline(deadline: float) -> None:
+    if time.monotonic() >= deadline:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress"
+        )
+
+def claim(bind, user_id: str, key: str, fingerprint: str) -> Optional[Response]:
+    """Take the key for this request, or return the response it already produced.
+
+    Waits up to IDEMPOTENCY_WAIT_SECONDS while another request holds the key,
+    and takes over a key whose holder let its lock lapse without finishing.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    with Session(bind=bind) as db:
+        while True:
+            taken, replay = _claim_step(db, user_id, key, fingerprint)
+            if taken:
+                return replay
+            _check_deadline(deadline)
+            time.sleep(POLL_SECONDS)
+
+async def claim_async(bind: AsyncEngine, user_id: str, key: str, fingerprint: str) -> Optional[Response]:
+    """claim on the async engine, polling without holding a thread"""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    async with AsyncSession(bind=bind) as db:
+        while True:
+            taken, replay = await db.run_sync(_claim_step, user_id, key, fingerprint)
+            if taken:
+                return replay
+            _check_deadline(deadline)
+            await asyncio.sleep(POLL_SECONDS)
+
+def _purge_expired(db: Session, now) -> None:
+    """Delete a bounded batch of expired keys, so the table only holds live ones"""
+    expired = (
+        select(IdempotencyKey.user_id, IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at <= now)
+        .limit(settings.IDEMPOTENCY_PURGE_BATCH_SIZE)
+    )
+    db.execute(delete(IdempotencyKey).where(tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(expired)))
+
+def _release_step(db: Session, user_id: str, key: str) -> None:
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.response_status.is_(None)
+    ))
+    db.commit()
+
+def release(bind, user_id: str, key: str) -> None:
+    """Give up an unfinished key so a retry can run the request again"""
+    with Session(bind=bind) as db:
+        _release_step(db, user_id, key)
+
+async def release_async(bind: AsyncEngine, user_id: str, key: str) -> None:
+    async with AsyncSession(bind=bind) as db:
+        await db.run_sync(_release_step, user_id, key)
+
+@asynccontextmanager
+async def _holding_key(
+    request: Request,
+    idempotency_key: Optional[str],
+    user_id: str,
+    claim_key: Callable[[str, str, str], Awaitable[Optional[Response]]],
+    release_key: Callable[[str, str], Awaitable[None]],
+    rollback: Callable[[], Awaitable[None]]
+):
+    """Claim the key around the handler, releasing it if the handler fails or does not complete"""
+    if idempotency_key is None:
+        yield IdempotentRequest()
+        return
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    fingerprint = request_hash(request.method, request.url.path, await request.body())
+    replay = await claim_key(user_id, idempotency_key, fingerprint)
+    idempotent = IdempotentRequest(user_id, idempotency_key, replay)
+    if replay is not None:
+        yield idempotent
+        return
+    try:
+        yield idempotent
+    except Exception:
+        # Discard the failed handler's writes first; on SQLite they would block the release
+        await rollback()
+        await release_key(user_id, idempotency_key)
+        raise
+    if not idempotent.completed:
+        await release_key(user_id, idempotency_key)
+
+async def idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Claim the request's Idempotency-Key for the handler, releasing it if the handler fails"""
+    bind = db.get_bind()
+    async with _holding_key(
+        request, idempotency_key, current_user.id,
+        claim_key=lambda *args: run_in_threadpool(claim, bind, *args),
+        release_key=lambda *args: run_in_threadpool(release, bind, *args),
+        rollback=lambda: run_in_threadpool(db.rollback)
+    ) as idempotent:
+        yield idempotent
+
+async def idempotent_request_async(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async)
+):
+    """idempotent_request on the async engine, for routes served by asyncify_router"""
+    async with _holding_key(
+        request, idempotency_key, current_user.id,
+        claim_key=lambda *args: claim_async(db.bind, *args),
+        release_key=lambda *args: release_async(db.bind, *args),
+        rollback=db.rollback
+    ) as idempotent:
+        yield idempotent
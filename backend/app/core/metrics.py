@@ -0,0 +1,300 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _add_values(into: dict, cell: dict) -> None:
+    """Add a counter cell into another"""
+    for key, value in cell.items():
+        into[key] = into.get(key, 0) + value
+
+def _add_states(into: dict, cell: dict) -> None:
+    """Add a histogram cell into another; lists are replaced, never changed in place"""
+    for key, state in cell.items():
+        merged = into.get(key)
+        into[key] = list(state) if merged is None else [a + b for a, b in zip(merged, state)]
+
+class _PerThread:
+    """Storage with one cell per thread, merged when scraped.
+
+    Only the owning thread writes to a cell, so updates need no lock; the lock
+    is taken once per thread to register its cell, and on scrape. Cells of
+    threads that have exited are folded into one retired cell then, so thread
+    churn does not grow the list.
+    """
+
+    def __init__(self, factory: Callable[[], dict], merge: Callable[[dict, dict], None]):
+        self._factory = factory
+        self._merge = merge
+        self._local = threading.local()
+        self._cells: List[Tuple[threading.Thread, dict]] = []
+        self._retired = factory()
+        self._lock = threading.Lock()
+
+    def cell(self) -> dict:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._factory()
+            with self._lock:
+                self._retire_dead()
+                self._cells.append((threading.current_thread(), cell))
+            self._local.cell = cell
+            return cell
+
+    def _retire_dead(self) -> None:
+        # Called with the lock held; a thread that has exited can no longer write its cell
+        live = []
+        for thread, cell in self._cells:
+            if thread.is_alive():
+                live.append((thread, cell))
+            else:
+                self._merge(self._retired, cell)
+        self._cells = live
+
+    def snapshots(self) -> List[dict]:
+        with self._lock:
+            self._retire_dead()
+            cells = [cell for _, cell in self._cells]
+            retired = self._retired.copy()
+        # dict.copy() is atomic under the GIL, so writers never break the scrape
+        return [retired] + [cell.copy() for cell in cells]
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = _PerThread(dict, _add_values)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        cell = self._values.cell()
+        key = self._key(labels)
+        cell[key] = cell.get(key, 0) + amount
+
+    def totals(self) -> Dict[LabelValues, float]:
+        totals: Dict[LabelValues, float] = {}
+        for cell in self._values.snapshots():
+            _add_values(totals, cell)
+        return totals
+
+    def value(self, **labels) -> float:
+        return self.totals().get(self._key(labels), 0)
+
+    def samples(self):
+        totals = self.totals()
+        if not totals and not self.labelnames:
+            totals = {(): 0}
+        for key, value in sorted(totals.items()):
+            yield f"{self.name}{self._labels(key)} {_number(value)}"
+
+class Gauge(Counter):
+    """Value that goes up and down; per-thread deltas still sum correctly"""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    """Bucketed observations with Prometheus cumulative buckets on scrape"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = _PerThread(dict, _add_states)
+
+    def observe(self, value: float, **labels) -> None:
+        cell = self._values.cell()
+        key = self._key(labels)
+        state = cell.get(key)
+        if state is None:
+            # per-bucket counts (last one is +Inf), then sum
+            state = cell[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def totals(self) -> Dict[LabelValues, list]:
+        totals: Dict[LabelValues, list] = {}
+        for cell in self._values.snapshots():
+            _add_states(totals, cell)
+        return totals
+
+    def count(self, **labels) -> int:
+        state = self.totals().get(self._key(labels))
+        return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        for key, state in sorted(self.totals().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = self._labels(key, 'le="%s"' % le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_number(state[-1])}"
+            yield f"{self.name}_count{self._labels(key)} {cumulative}"
+
+class Callback(_Metric):
+    """Metric whose samples are computed on scrape"""
+
+    def __init__(self, name, documentation, labelnames, callback: Callable[[], Iterable[Tuple[LabelValues, float]]],
+                 kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self):
+        for key, value in self.callback():
+            yield f"{self.name}{self._labels(key)} {_number(value)}"
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+))
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ("pool",)
+))
+db_pool_timeouts = registry.register(Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after the pool timeout", ("pool",)
+))
+purchases_total = registry.register(Counter("sweet_purchases_total", "Completed single-sweet purchases"))
+orders_total = registry.register(Counter("orders_created_total", "Orders created"))
+idempotent_replays = registry.register(Counter(
+    "idempotent_replays_total", "Requests answered with the stored response of an earlier one with the same key"
+))
+stock_out_rejections = registry.register(Counter(
+    "stock_out_rejections_total", "Checkouts rejected for insufficient stock", ("path",)
+))
+
+_pools: Dict[str, object] = {}
+_caches: Dict[str, object] = {}
+
+def register_pool(name: str, pool) -> None:
+    """Expose connection counts of a QueuePool under the given name"""
+    _pools[name] = pool
+
+def register_cache(name: str, cache) -> None:
+    """Expose entries, hits, misses and hit ratio of a TTLCache under the given name"""
+    _caches[name] = cache
+
+def _pool_samples():
+    for name, pool in list(_pools.items()):
+        yield (name, "size"), pool.size()
+        yield (name, "checked_out"), pool.checkedout()
+        yield (name, "checked_in"), pool.checkedin()
+        yield (name, "overflow"), max(0, pool.overflow())
+
+def _cache_samples(stat):
+    def samples():
+        return [((name,), cache.stats()[stat]) for name, cache in list(_caches.items())]
+    return samples
+
+registry.register(Callback(
+    "db_pool_connections", "Pooled connections by state", ("pool", "state"), _pool_samples
+))
+registry.register(Callback("cache_entries", "Entries held by each cache", ("cache",), _cache_samples("size")))
+registry.register(Callback("cache_hits_total", "Cache lookups that hit", ("cache",), _cache_samples("hits"),
+                           kind="counter"))
+registry.register(Callback("cache_misses_total", "Cache lookups that missed", ("cache",), _cache_samples("misses"),
+                           kind="counter"))
+registry.register(Callback("cache_hit_ratio", "Hits over lookups since start", ("cache",),
+                           _cache_samples("hit_ratio")))
+
+def route_template(scope) -> str:
+    """Request path with path parameters put back as {name} placeholders"""
+    if "endpoint" not in scope:
+        # Unmatched paths share one label so scanners cannot blow up cardinality
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+class MetricsMiddleware:
+    """Record in-flight requests and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route_template(scope),
+                status=str(status_code),
+            )
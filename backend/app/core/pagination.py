@@ -0,0 +1,68 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import String, and_, func, literal, or_, select
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+def _to_json_value(value: Any) -> Any:
+    """Convert a sort key value to something JSON can carry"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _from_json_value(value: Any, column) -> Any:
+    """Convert a decoded sort key value back to the column's Python type"""
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(sort_key: str, value: Any, last_id: str) -> str:
+    """Encode the position after a row as an opaque cursor string"""
+    payload = json.dumps({"k": sort_key, "v": _to_json_value(value), "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_key: str, column) -> Tuple[Any, str]:
+    """Decode a cursor produced by encode_cursor for the given sort key.
+
+    Returns the (sort value, id) pair of the last row on the previous page.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["k"] != sort_key:
+            raise ValueError("cursor was issued for a different sort order")
+        return _from_json_value(payload["v"], column), str(payload["id"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(column, id_column, value: Any, last_id: str, descending: bool, dialect_name: str = ""):
+    """Build the WHERE clause selecting rows after (value, last_id) in sort order"""
+    if dialect_name == "sqlite" and isinstance(value, datetime):
+        # SQLite keeps datetimes as text: CURRENT_TIMESTAMP defaults as
+        # "YYYY-MM-DD HH:MM:SS", values written from Python with ".ffffff".
+        # Both read back as the same datetime on a whole second, so compare
+        # against the cursor row's own stored text, or the Python form if
+        # that row is gone.
+        stored = select(column).where(id_column == last_id).correlate(None).scalar_subquery()
+        value = func.coalesce(stored, literal(value.strftime("%Y-%m-%d %H:%M:%S.%f"), String))
+    if descending:
+        return or_(column < value, and_(column == value, id_column < last_id))
+    return or_(column > value, and_(column == value, id_column > last_id))
+
+def build_next_cursor(items: list, limit: int, sort_key: str, value_of) -> Optional[str]:
+    """Return the cursor for the page after items, or None on the last page"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(sort_key, value_of(last), last.id)
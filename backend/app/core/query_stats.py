@@ -0,0 +1,130 @@
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+@dataclass
+class QueryStats:
+    """SQL statements issued while handling one request"""
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def server_timing(self, request_ms: float) -> str:
+        """Server-Timing header value for these stats"""
+        return (
+            f'db;dur={self.total_ms:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_ms:.2f}, "
+            f"app;dur={request_ms:.2f}"
+        )
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being handled, if any"""
+    return _current_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+def install_query_listeners() -> None:
+    """Time every statement on every engine, sync or async"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+def parse_server_timing(value: str) -> Dict[str, dict]:
+    """Parse a Server-Timing header into {name: {"dur": float, "desc": str}}"""
+    metrics = {}
+    for entry in value.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        metric = {}
+        for param in params:
+            key, _, raw = param.partition("=")
+            metric[key] = float(raw) if key == "dur" else raw.strip('"')
+        metrics[name] = metric
+    return metrics
+
+def query_count(server_timing: str) -> int:
+    """Number of queries reported in a Server-Timing header"""
+    desc = parse_server_timing(server_timing)["db"]["desc"]
+    return int(re.match(r"\d+", desc).group())
+
+class QueryStatsMiddleware:
+    """Attach per-request SQL statement count and timing to the response and logs.
+
+    Sync endpoints run in a threadpool with a copy of the request context, so
+    the listeners above record into the QueryStats object created here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(SERVER_TIMING_HEADER, stats.server_timing((time.perf_counter() - started) * 1000))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            slow = stats.slowest_ms >= settings.SLOW_QUERY_MS
+            logger.log(logging.WARNING if slow else logging.INFO, json.dumps({
+                "event": "request",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(elapsed_ms, 2),
+                "queries": stats.count,
+                "db_ms": round(stats.total_ms, 2),
+                "slowest_ms": round(stats.slowest_ms, 2),
+                "slowest_statement": stats.slowest_statement if slow else None,
+            }))
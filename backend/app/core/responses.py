@@ -0,0 +1,38 @@
+"""
+JSON responses for list endpoints that skip response_model validation.
+
+Handlers build plain dicts with the response model's fields and return
+FastJSONResponse; FastAPI passes a returned Response through untouched, so
+rows are neither turned into models nor validated again. The route keeps its
+response_model for the OpenAPI schema. orjson is used when installed;
+otherwise pydantic_core, which also writes Decimal, datetime and Enum values
+directly.
+"""
+from decimal import Decimal
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+def _default(value: Any) -> Any:
+    # orjson has no Decimal support; match pydantic, which writes it as a string
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact JSON the way the response models would"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return pydantic_core.to_json(content)
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
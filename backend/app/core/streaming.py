@@ -0,0 +1,124 @@
+import codecs
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import anyio.from_thread
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+# Media types of the supported bulk formats
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows per yielded chunk when writing; keeps chunks large without holding much
+WRITE_CHUNK_ROWS = 500
+
+def iter_stream_lines(stream: AsyncIterator[bytes]) -> Iterator[str]:
+    """Lines of a request body, read chunk by chunk from a worker thread.
+
+    Must run in a thread started by anyio (e.g. a sync endpoint or
+    run_in_threadpool); each chunk is awaited on the event loop.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    while True:
+        try:
+            chunk = anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            break
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        # Hold back the last line until its newline arrives (a trailing \r may precede \n)
+        pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def read_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """(row number, dict) for each CSV record; row 1 is the first after the header"""
+    reader = csv.DictReader(lines)
+    for number, row in enumerate(reader, start=1):
+        yield number, row
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """(row number, parsed value or ValueError) for each non-blank NDJSON line"""
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, e
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    return value
+
+def write_csv(rows: Iterable[Dict[str, Any]], columns: Sequence[str]) -> Iterator[str]:
+    """Encode rows as CSV text, yielded in chunks of WRITE_CHUNK_ROWS"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow(["" if row[column] is None else _jsonable(row[column]) for column in columns])
+        pending += 1
+        if pending >= WRITE_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def write_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Encode rows as NDJSON text, yielded in chunks of WRITE_CHUNK_ROWS"""
+    lines: List[str] = []
+    for row in rows:
+        lines.append(json.dumps(_jsonable(row)) + "\n")
+        if len(lines) >= WRITE_CHUNK_ROWS:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+def export_response(
+    bind,
+    fetch: Callable[[Session], Iterable[Dict[str, Any]]],
+    format: str,
+    filename: str,
+    columns: Optional[Sequence[str]] = None
+) -> StreamingResponse:
+    """Stream rows from fetch as a CSV or NDJSON attachment.
+
+    The request session is closed once the handler returns, so fetch runs on
+    a session of its own that lives as long as the response body.
+    """
+    def rows():
+        with Session(bind=bind) as session:
+            yield from fetch(session)
+
+    body = write_csv(rows(), columns) if format == "csv" else write_ndjson(rows())
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
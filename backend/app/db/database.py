@@ -1,17 +1,125 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core import metrics
 from app.core.config import settings
 
-# For SQLite, we need to add connect_args
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _is_sqlite_memory(url: str) -> bool:
+    database = make_url(url).database
+    return _is_sqlite(url) and (not database or database == ":memory:" or "mode=memory" in url)
+
+class TimedPoolMixin:
+    """Record checkout wait time, checkouts and timeouts for /metrics"""
+    metrics_name = "sync"
+
+    def connect(self):
+        # The pool's public checkout; it returns once a connection is free or
+        # newly opened (and pre-pinged), so timing it captures waits for one
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.db_pool_timeouts.inc(pool=self.metrics_name)
+            raise
+        metrics.db_pool_checkout_wait.observe(time.perf_counter() - started, pool=self.metrics_name)
+        metrics.db_pool_checkouts.inc(pool=self.metrics_name)
+        return connection
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+def engine_options(url: str, poolclass=TimedQueuePool) -> dict:
+    """Keyword arguments for create_engine/create_async_engine built from settings"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not _is_sqlite_memory(url):
+        # In-memory SQLite uses a single-connection pool without these knobs
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection.
+
+    WAL lets readers proceed while a checkout is writing, busy_timeout makes
+    writers wait for the lock instead of failing, and mmap/cache sizes keep
+    hot pages in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+    finally:
+        cursor.close()
+
+def create_db_engine(url: str) -> Engine:
+    """Create the application engine with pool settings and SQLite pragmas"""
+    # For SQLite, we need to add connect_args
+    connect_args = {"check_same_thread": False} if _is_sqlite(url) else {}
+    db_engine = create_engine(url, connect_args=connect_args, **engine_options(url))
+    if _is_sqlite(url):
+        event.listen(db_engine, "connect", apply_sqlite_pragmas)
+    return db_engine
+
+engine = create_db_engine(settings.DATABASE_URL)
+if isinstance(engine.pool, QueuePool):
+    metrics.register_pool("sync", engine.pool)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Async drivers used when the configured URL names a sync one
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Map a database URL to the equivalent async driver URL"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername in ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    """Create the async engine and session factory on first use"""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        async_engine = create_async_engine(url, **engine_options(url, TimedAsyncQueuePool))
+        if _is_sqlite(url):
+            event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+        if isinstance(async_engine.pool, QueuePool):
+            metrics.register_pool("async", async_engine.pool)
+        _async_sessionmaker = async_sessionmaker(async_engine, autoflush=False)
+    return _async_sessionmaker
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,111 @@
+"""
+SQLite FTS5 full-text index over sweets.
+
+The index lives in the ``sweets_fts`` virtual table and is kept in sync with
+``sweets`` by triggers, so every write path (ORM, bulk inserts, raw SQL) is
+covered. It is keyed by ``sweet_id`` rather than the implicit rowid, because
+VACUUM may renumber rowids of tables without an INTEGER PRIMARY KEY.
+"""
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import Float, String, column, event, table, text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+SWEETS_FTS_TABLE = "sweets_fts"
+
+# Lightweight table construct for joining the FTS index in ORM queries
+sweets_fts = table(SWEETS_FTS_TABLE, column("sweet_id", String), column("rank", Float))
+
+CREATE_SWEETS_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS sweets_fts USING fts5(
+        sweet_id UNINDEXED, name, category, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sweets_fts_after_insert AFTER INSERT ON sweets BEGIN
+        INSERT INTO sweets_fts (sweet_id, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sweets_fts_after_update AFTER UPDATE OF name, category, description ON sweets BEGIN
+        DELETE FROM sweets_fts WHERE sweet_id = old.id;
+        INSERT INTO sweets_fts (sweet_id, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sweets_fts_after_delete AFTER DELETE ON sweets BEGIN
+        DELETE FROM sweets_fts WHERE sweet_id = old.id;
+    END
+    """,
+]
+
+DROP_SWEETS_FTS = [
+    "DROP TRIGGER IF EXISTS sweets_fts_after_insert",
+    "DROP TRIGGER IF EXISTS sweets_fts_after_update",
+    "DROP TRIGGER IF EXISTS sweets_fts_after_delete",
+    "DROP TABLE IF EXISTS sweets_fts",
+]
+
+def create_sweet_fts(connection) -> bool:
+    """Create the FTS index and its triggers, then fill it from sweets.
+
+    Returns False when the database is not SQLite or lacks FTS5.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        for statement in CREATE_SWEETS_FTS:
+            connection.execute(text(statement))
+    except OperationalError as e:
+        logger.warning("SQLite FTS5 unavailable, sweet search falls back to LIKE: %s", e)
+        return False
+    rebuild_sweet_fts(connection)
+    return True
+
+def drop_sweet_fts(connection) -> None:
+    """Drop the FTS index and its triggers"""
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in DROP_SWEETS_FTS:
+        connection.execute(text(statement))
+
+def rebuild_sweet_fts(connection) -> None:
+    """Repopulate the FTS index from the sweets table"""
+    connection.execute(text("DELETE FROM sweets_fts"))
+    connection.execute(text(
+        "INSERT INTO sweets_fts (sweet_id, name, category, description) "
+        "SELECT id, name, category, description FROM sweets"
+    ))
+
+def fts_enabled(connection) -> bool:
+    """Whether the FTS index exists on this database"""
+    if connection.dialect.name != "sqlite":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SWEETS_FTS_TABLE}
+    ).first() is not None
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression with prefix matching.
+
+    Every word must match (implicit AND); each one is quoted so user input
+    cannot inject FTS5 query syntax. Returns None if there are no words.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def install_sweet_fts(sweets_table) -> None:
+    """Create/drop the FTS index together with the sweets table in metadata.create_all/drop_all"""
+    event.listen(sweets_table, "after_create", lambda target, connection, **kw: create_sweet_fts(connection))
+    event.listen(sweets_table, "before_drop", lambda target, connection, **kw: drop_sweet_fts(connection))
@@ -1,6 +1,10 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core import metrics
+from app.core.pagination import CURSOR_HEADER
+from app.core.query_stats import QueryStatsMiddleware, install_query_listeners
 from app.api.v1.api import api_router
 
 app = FastAPI(
@@ -16,8 +20,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER, "ETag"],
 )
 
+# Per-request SQL statement count and timing
+if settings.QUERY_STATS_ENABLED:
+    install_query_listeners()
+    app.add_middleware(QueryStatsMiddleware)
+
+# Route latency and in-flight requests; added last so it times the whole stack
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics():
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
@@ -4,5 +4,13 @@ from .purchase import Purchase
 from .review import Review
 from .contact import ContactForm
 from .order import Order, OrderItem
+from .catalog_version import CatalogVersion
+from .sales_daily import SalesDaily
+from .reviewable_sweet import ReviewableSweet
+from .outbox import OutboxEvent
+from .sweet_demand import SweetDemand
+from .reservation import StockReservation
+from .idempotency_key import IdempotencyKey
 
-__all__ = ["User", "Sweet", "Purchase", "Review", "ContactForm", "Order", "OrderItem"]
\ No newline at end of file
+__all__ = ["User", "Sweet", "Purchase", "Review", "ContactForm", "Order", "OrderItem", "CatalogVersion", "SalesDaily",
+           "ReviewableSweet", "OutboxEvent", "SweetDemand", "StockReservation", "IdempotencyKey"]
\ No newline at end of file
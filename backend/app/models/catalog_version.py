@@ -0,0 +1,20 @@
+import uuid
+from sqlalchemy import Column, Integer, String, event, insert
+from app.db.database import Base
+
+CATALOG_VERSION_ID = 1
+
+def new_catalog_version() -> str:
+    return uuid.uuid4().hex
+
+class CatalogVersion(Base):
+    """Single row whose token changes on every write visible in the public catalog"""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(String(32), nullable=False, default=new_catalog_version)
+
+@event.listens_for(CatalogVersion.__table__, "after_create")
+def seed_catalog_version(target, connection, **kw):
+    # A fresh random token, so caches never confuse a recreated database with an old one
+    connection.execute(insert(target).values(id=CATALOG_VERSION_ID, version=new_catalog_version()))
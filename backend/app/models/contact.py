@@ -1,10 +1,14 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, Boolean
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
 class ContactForm(Base):
     __tablename__ = "contact_forms"
+    __table_args__ = (
+        # Admin inbox of unprocessed submissions, newest first
+        Index("ix_contact_forms_is_processed_created_at", "is_processed", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     name = Column(String, nullable=False)
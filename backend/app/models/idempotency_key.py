@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class IdempotencyKey(Base):
+    """A client's Idempotency-Key with the request it was first used for and, once done, the response"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Purging expired keys
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    key = Column(String, primary_key=True)
+    # SHA-256 of method, path and body; a key may not be reused for a different request
+    request_hash = Column(String, nullable=False)
+    # Set while the first request runs; a duplicate waits, or takes over once it passes
+    locked_until = Column(DateTime, nullable=True)
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,33 @@
+import uuid
+from enum import Enum
+from sqlalchemy import Column, DateTime, Enum as SQLEnum, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+class OutboxEvent(Base):
+    """Side effect to run after a commit, written in the same transaction as the change causing it"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The worker's poll: due pending events, oldest first
+        Index("ix_outbox_events_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    event_type = Column(String, nullable=False)
+    aggregate_id = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)
+    # Enqueuing the same key twice is rejected; handlers pass it on to external systems
+    idempotency_key = Column(String, nullable=False, unique=True)
+    status = Column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, server_default=func.now(), nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    processed_at = Column(DateTime, nullable=True)
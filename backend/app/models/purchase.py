@@ -6,6 +6,8 @@ from app.db.database import Base
 
 class Purchase(Base):
     __tablename__ = "purchases"
+    # Fetch server-generated timestamps with RETURNING during flush
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
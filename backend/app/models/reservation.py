@@ -0,0 +1,21 @@
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class StockReservation(Base):
+    """Units a shopper holds until checkout or expiry; counted in Sweet.reserved_quantity"""
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # A shopper's holds, consumed at checkout
+        Index("ix_stock_reservations_user_id_sweet_id", "user_id", "sweet_id"),
+        # The sweeper's scan for expired holds
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    sweet_id = Column(String, ForeignKey("sweets.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
@@ -1,11 +1,16 @@
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Reviews of a sweet, and a user's reviews or their review of one sweet
+        Index("ix_reviews_sweet_id", "sweet_id"),
+        Index("ix_reviews_user_id_sweet_id", "user_id", "sweet_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from app.db.database import Base
+
+class ReviewableSweet(Base):
+    """A sweet a user has bought in a confirmed or delivered order, and whether they reviewed it"""
+    __tablename__ = "reviewable_sweets"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    sweet_id = Column(String, ForeignKey("sweets.id"), primary_key=True)
+    purchased_quantity = Column(Integer, nullable=False)
+    purchase_date = Column(DateTime, nullable=False)
+    reviewed = Column(Boolean, nullable=False, default=False)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Numeric, String
+from app.db.database import Base
+
+class SalesDaily(Base):
+    """Units sold and revenue per sweet and day, kept current as sales happen"""
+    __tablename__ = "sales_daily"
+    __table_args__ = (
+        # Time series and top sellers over a day range, optionally per category
+        Index("ix_sales_daily_day", "day"),
+        Index("ix_sales_daily_category_day", "category", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    sweet_id = Column(String, ForeignKey("sweets.id"), primary_key=True)
+    # Category at the time of sale, so reports do not shift when a sweet is recategorised
+    category = Column(String, nullable=False)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
@@ -1,23 +1,68 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, Text
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, Text, Float, Index, case, cast, literal_column
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import Grouping
 from app.db.database import Base
+from app.db.fts import install_sweet_fts
 
 class Sweet(Base):
     __tablename__ = "sweets"
+    __table_args__ = (
+        # (sort column, id) pairs backing keyset pagination of the catalog
+        Index("ix_sweets_created_at_id", "created_at", "id"),
+        Index("ix_sweets_price_id", "price", "id"),
+        Index("ix_sweets_name_id", "name", "id"),
+        Index("ix_sweets_category_id", "category", "id"),
+        Index("ix_sweets_quantity_id", "quantity", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     name = Column(String, nullable=False, index=True)
     category = Column(String, nullable=False, index=True)
     price = Column(Numeric(10, 2), nullable=False)
     quantity = Column(Integer, nullable=False, default=0)
+    # Units held by reservations not yet consumed or swept; available stock is quantity minus this
+    reserved_quantity = Column(Integer, nullable=False, default=0, server_default="0")
+    # Stock level at or below which a sale raises a low-stock event; None disables alerts
+    reorder_threshold = Column(Integer, nullable=True)
     image_url = Column(String, nullable=True)  # For storing image URLs
     description = Column(Text, nullable=True)  # For product descriptions
+    # Denormalized review aggregates, maintained by the review endpoints
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     # Relationships
     purchases = relationship("Purchase", back_populates="sweet")
     reviews = relationship("Review", back_populates="sweet", lazy="dynamic")
-    order_items = relationship("OrderItem", back_populates="sweet")
\ No newline at end of file
+    order_items = relationship("OrderItem", back_populates="sweet")
+
+    @hybrid_property
+    def available_quantity(self) -> int:
+        """Stock not held by reservations"""
+        return self.quantity - self.reserved_quantity
+
+    @hybrid_property
+    def avg_rating(self) -> float:
+        """Average review rating, 0.0 when the sweet has no reviews"""
+        if not self.review_count:
+            return 0.0
+        return self.rating_sum / self.review_count
+
+    @avg_rating.expression
+    def avg_rating(cls):
+        # Inline constants, so queries repeat the indexed expression exactly instead of binding parameters
+        return case(
+            (cls.review_count > literal_column("0"), cast(cls.rating_sum, Float) / cls.review_count),
+            else_=literal_column("0.0")
+        )
+
+# Rating sort and min_rating filter; an expression index, so defined once the hybrid exists.
+# The parentheses are required by PostgreSQL for a non-function expression.
+Index("ix_sweets_avg_rating_id", Grouping(Sweet.avg_rating), Sweet.id)
+
+# Keep the SQLite full-text index in step with the table's lifecycle
+install_sweet_fts(Sweet.__table__)
\ No newline at end of file
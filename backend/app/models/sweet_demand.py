@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
+from app.db.database import Base
+
+class SweetDemand(Base):
+    """Exponentially weighted average of units sold per day, updated as sales happen.
+
+    ewma_units covers the days before day; units sold on day itself are kept
+    in day_units until a later sale (or a read) closes it.
+    """
+    __tablename__ = "sweet_demand"
+
+    sweet_id = Column(String, ForeignKey("sweets.id"), primary_key=True)
+    ewma_units = Column(Float, nullable=False, default=0.0)
+    day = Column(Date, nullable=False)
+    day_units = Column(Integer, nullable=False, default=0)
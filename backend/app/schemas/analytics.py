@@ -0,0 +1,26 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from pydantic import BaseModel
+
+class TopSeller(BaseModel):
+    sweet_id: str
+    sweet_name: str
+    category: str
+    units: int
+    revenue: Decimal
+
+class SalesPoint(BaseModel):
+    day: date
+    units: int
+    revenue: Decimal
+
+class RestockRecommendation(BaseModel):
+    sweet_id: str
+    sweet_name: str
+    category: str
+    quantity: int
+    reorder_threshold: Optional[int] = None
+    # Smoothed units sold per day
+    daily_demand: float
+    recommended_quantity: int
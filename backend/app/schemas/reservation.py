@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel, Field, ConfigDict
+
+class ReservationItem(BaseModel):
+    sweet_id: str
+    quantity: int = Field(..., gt=0, description="Quantity must be greater than 0")
+
+class ReservationCreate(BaseModel):
+    items: List[ReservationItem]
+
+class ReservationResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    sweet_id: str
+    quantity: int
+    expires_at: datetime
+    created_at: datetime
@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class SweetBase(BaseModel):
@@ -10,6 +10,7 @@ class SweetBase(BaseModel):
     quantity: int = Field(..., ge=0, description="Quantity must be non-negative")
     image_url: Optional[str] = None
     description: Optional[str] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0, description="Low-stock alert level; unset disables alerts")
 
 class SweetCreate(SweetBase):
     pass
@@ -21,12 +22,46 @@ class SweetUpdate(BaseModel):
     quantity: Optional[int] = Field(None, ge=0, description="Quantity must be non-negative")
     image_url: Optional[str] = None
     description: Optional[str] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0, description="Low-stock alert level; null disables alerts")
 
 class SweetResponse(SweetBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: str
+    # On-hand stock less units held by reservations
+    available_quantity: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     avg_rating: Optional[float] = 0.0
-    review_count: Optional[int] = 0
\ No newline at end of file
+    review_count: Optional[int] = 0
+
+class SweetImportError(BaseModel):
+    row: int
+    error: str
+
+class SweetImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[SweetImportError]
+
+class CategoryFacet(BaseModel):
+    value: str
+    count: int
+
+class FacetBucket(BaseModel):
+    min: float
+    # None for the open-ended top bucket
+    max: Optional[float] = None
+    count: int
+
+class SearchFacets(BaseModel):
+    total: int
+    in_stock: int
+    categories: List[CategoryFacet]
+    price: List[FacetBucket]
+    # By average rating; unrated sweets count as 0 and fall in the first bucket
+    rating: List[FacetBucket]
+
+class FacetedSearchResponse(BaseModel):
+    items: List[SweetResponse]
+    facets: SearchFacets
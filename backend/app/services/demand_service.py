@@ -0,0 +1,131 @@
+import math
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sales_daily import SalesDaily
+from app.models.sweet import Sweet
+from app.models.sweet_demand import SweetDemand
+
+def utc_today() -> date:
+    # Sales days come from UTC CURRENT_TIMESTAMP values
+    return datetime.now(timezone.utc).date()
+
+def smoothed(ewma_units: float, day: date, day_units: int, today: date, alpha: float) -> float:
+    """Average daily units over the days before today, closing day and any idle days since"""
+    if today <= day:
+        return ewma_units
+    closed = alpha * day_units + (1 - alpha) * ewma_units
+    return closed * (1 - alpha) ** ((today - day).days - 1)
+
+class DemandService:
+    """Maintain sweet_demand from sales in O(1) per sweet, without rescanning history.
+
+    Writers own the transaction and must commit.
+    """
+
+    def __init__(self, db: Session, alpha: Optional[float] = None):
+        self.db = db
+        self.alpha = settings.DEMAND_EWMA_ALPHA if alpha is None else alpha
+
+    def record(self, units: Dict[Tuple[date, str], int]) -> None:
+        """Add units sold per (day, sweet_id); negative units take a sale back"""
+        if not units:
+            return
+        sweet_ids = {sweet_id for _, sweet_id in units}
+        # Locks the rows where supported; checkouts already hold the sweet rows
+        rows = {
+            row["sweet_id"]: dict(row) for row in self.db.execute(
+                select(SweetDemand.sweet_id, SweetDemand.ewma_units, SweetDemand.day, SweetDemand.day_units)
+                .where(SweetDemand.sweet_id.in_(sweet_ids))
+                .with_for_update()
+            ).mappings()
+        }
+        for (day, sweet_id), sold in sorted(units.items()):
+            row = rows.setdefault(sweet_id, {"sweet_id": sweet_id, "ewma_units": 0.0, "day": day, "day_units": 0})
+            if day == row["day"]:
+                row["day_units"] += sold
+            elif day > row["day"]:
+                row["ewma_units"] = smoothed(row["ewma_units"], row["day"], row["day_units"], day, self.alpha)
+                row["day"], row["day_units"] = day, sold
+            else:
+                # A closed day: its weight in the average has decayed once per day since
+                row["ewma_units"] += self.alpha * (1 - self.alpha) ** ((row["day"] - day).days - 1) * sold
+        self._write(list(rows.values()))
+
+    def _write(self, rows: List[dict]) -> None:
+        """Insert or overwrite demand rows in one statement"""
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name in ("sqlite", "postgresql"):
+            if dialect_name == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            statement = upsert(SweetDemand.__table__)
+            statement = statement.on_conflict_do_update(
+                index_elements=[SweetDemand.sweet_id],
+                set_={column: statement.excluded[column] for column in ("ewma_units", "day", "day_units")}
+            )
+            self.db.execute(statement, rows)
+            return
+
+        for row in rows:
+            self.db.merge(SweetDemand(**row))
+        self.db.flush()
+
+    def recommendations(
+        self,
+        cover_days: Optional[int] = None,
+        today: Optional[date] = None,
+        limit: int = 50
+    ) -> List[dict]:
+        """Sweets whose stock will not last cover_days at their smoothed demand, most short first.
+
+        The target is cover_days of demand on top of the reorder threshold.
+        """
+        cover_days = settings.RESTOCK_COVER_DAYS if cover_days is None else cover_days
+        today = today or utc_today()
+        rows = self.db.execute(
+            select(
+                Sweet.id, Sweet.name, Sweet.category, Sweet.quantity, Sweet.reorder_threshold,
+                SweetDemand.ewma_units, SweetDemand.day, SweetDemand.day_units
+            )
+            .outerjoin(SweetDemand, SweetDemand.sweet_id == Sweet.id)
+            .where(or_(SweetDemand.sweet_id.is_not(None), Sweet.quantity <= Sweet.reorder_threshold))
+        )
+        recommended = []
+        for sweet_id, name, category, quantity, threshold, ewma_units, day, day_units in rows:
+            daily = 0.0
+            if day is not None:
+                daily = max(0.0, smoothed(ewma_units, day, day_units, today, self.alpha))
+            shortfall = math.ceil(daily * cover_days - 1e-9) + (threshold or 0) - quantity
+            if shortfall > 0:
+                recommended.append({
+                    "sweet_id": sweet_id, "sweet_name": name, "category": category,
+                    "quantity": quantity, "reorder_threshold": threshold,
+                    "daily_demand": round(daily, 3), "recommended_quantity": shortfall,
+                })
+        recommended.sort(key=lambda row: (-row["recommended_quantity"], row["sweet_id"]))
+        return recommended[:limit]
+
+    def rebuild(self) -> int:
+        """Replay the daily sales rollup into sweet_demand; return the number of rows"""
+        self.db.execute(delete(SweetDemand))
+        rows: Dict[str, dict] = {}
+        sales = self.db.execute(
+            select(SalesDaily.sweet_id, SalesDaily.day, SalesDaily.units)
+            .order_by(SalesDaily.sweet_id, SalesDaily.day)
+        )
+        for sweet_id, day, units in sales:
+            row = rows.get(sweet_id)
+            if row is None:
+                rows[sweet_id] = {"sweet_id": sweet_id, "ewma_units": 0.0, "day": day, "day_units": units}
+                continue
+            row["ewma_units"] = smoothed(row["ewma_units"], row["day"], row["day_units"], day, self.alpha)
+            row["day"], row["day_units"] = day, units
+        if rows:
+            self.db.execute(insert(SweetDemand), list(rows.values()))
+        self.db.commit()
+        return len(rows)
@@ -0,0 +1,32 @@
+"""Handlers for outbox events; import this module to register them with the worker"""
+import logging
+from typing import Any, Dict
+from sqlalchemy.orm import Session
+
+from app.models.outbox import OutboxEvent
+from app.models.sweet import Sweet
+from app.models.user import User
+from app.services.outbox_service import outbox_handler
+
+logger = logging.getLogger(__name__)
+
+@outbox_handler("order.created")
+def send_order_confirmation(db: Session, payload: Dict[str, Any], event: OutboxEvent) -> None:
+    """Confirm a new order to its buyer"""
+    email = db.query(User.email).filter(User.id == payload["user_id"]).scalar()
+    if email is None:
+        # The account is gone; nobody to confirm to
+        return
+    # No mailer yet: log the confirmation, keyed so a real sender can deduplicate
+    logger.info("Order confirmation for %s: order %s, %d item(s), total %s [%s]",
+                email, payload["order_id"], len(payload["items"]), payload["total_amount"],
+                event.idempotency_key)
+
+@outbox_handler("stock.low")
+def alert_low_stock(db: Session, payload: Dict[str, Any], event: OutboxEvent) -> None:
+    """Tell the shop a sweet fell to its reorder threshold"""
+    name = db.query(Sweet.name).filter(Sweet.id == payload["sweet_id"]).scalar()
+    # No alerting channel yet: log it for whoever watches the worker
+    logger.warning("Low stock: %s (%s) is down to %d, reorder threshold %d [%s]",
+                   name, payload["sweet_id"], payload["quantity"], payload["reorder_threshold"],
+                   event.idempotency_key)
@@ -0,0 +1,172 @@
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.outbox import OutboxEvent, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+# event_type -> handler(db, payload, event); see outbox_handler
+OUTBOX_HANDLERS: Dict[str, Callable[[Session, Dict[str, Any], OutboxEvent], None]] = {}
+
+def outbox_handler(event_type: str):
+    """Register the function that runs events of this type.
+
+    A handler's database writes commit together with the event being marked
+    done, so they happen once; anything external should pass on
+    event.idempotency_key, because an event may run again after a crash.
+    """
+    def register(function):
+        OUTBOX_HANDLERS[event_type] = function
+        return function
+    return register
+
+def utcnow() -> datetime:
+    # Naive UTC, matching CURRENT_TIMESTAMP server defaults
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the given number of failed attempts"""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+class OutboxService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        aggregate_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> OutboxEvent:
+        """Add an event to the caller's transaction; it is only visible to workers once committed"""
+        event = OutboxEvent(
+            event_type=event_type,
+            aggregate_id=aggregate_id,
+            payload=json.dumps(payload, default=str),
+            idempotency_key=idempotency_key or f"{event_type}:{aggregate_id}",
+            available_at=utcnow()
+        )
+        self.db.add(event)
+        return event
+
+    def claim(self, worker_id: str, batch_size: int) -> List[OutboxEvent]:
+        """Lease up to batch_size due events to this worker, oldest first.
+
+        The lease is taken by a conditional UPDATE and committed, so two
+        workers never hold the same event; a worker that dies lets its lease
+        expire and the events become due again.
+        """
+        now = utcnow()
+        lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        claimable = (
+            OutboxEvent.status == OutboxStatus.PENDING,
+            OutboxEvent.available_at <= now,
+            or_(OutboxEvent.locked_until.is_(None), OutboxEvent.locked_until < now),
+        )
+        due = select(OutboxEvent.id).where(*claimable).order_by(OutboxEvent.available_at).limit(batch_size)
+        self.db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due.scalar_subquery()), *claimable)
+            .values(locked_by=worker_id, locked_until=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return self.db.query(OutboxEvent).filter(
+            OutboxEvent.locked_by == worker_id,
+            OutboxEvent.locked_until == lease_until,
+            OutboxEvent.status == OutboxStatus.PENDING
+        ).order_by(OutboxEvent.available_at).all()
+
+    def process(self, event: OutboxEvent) -> bool:
+        """Run the event's handler and record the outcome; True when it succeeded"""
+        lease = self._lease(event)
+        handler = OUTBOX_HANDLERS.get(event.event_type)
+        try:
+            if handler is None:
+                raise LookupError(f"No outbox handler for {event.event_type}")
+            handler(self.db, json.loads(event.payload), event)
+        except Exception as e:
+            self.db.rollback()
+            self._failed(event, lease, e)
+            return False
+
+        if not self._record(lease, status=OutboxStatus.DONE, processed_at=utcnow(), locked_by=None,
+                            locked_until=None):
+            # The handler's writes go with the lost lease; the new holder runs the event
+            self.db.rollback()
+            logger.warning("Outbox event %s (%s) was re-claimed before it finished; discarding this run",
+                           event.id, event.event_type)
+            return False
+        self.db.commit()
+        return True
+
+    @staticmethod
+    def _lease(event: OutboxEvent) -> tuple:
+        """Conditions that hold while the event is still leased as this worker claimed it.
+
+        claim writes a new locked_until with every lease, so a worker whose
+        lease lapsed and was taken over no longer matches.
+        """
+        return (
+            OutboxEvent.id == event.id,
+            OutboxEvent.status == OutboxStatus.PENDING,
+            OutboxEvent.locked_by == event.locked_by,
+            OutboxEvent.locked_until == event.locked_until,
+        )
+
+    def _record(self, lease: tuple, **values) -> bool:
+        """Write the outcome only if the lease is still held; False when another worker took over"""
+        return self.db.execute(
+            update(OutboxEvent).where(*lease).values(**values).execution_options(synchronize_session=False)
+        ).rowcount == 1
+
+    def _failed(self, event: OutboxEvent, lease: tuple, error: Exception) -> None:
+        attempts = event.attempts + 1
+        last_error = f"{type(error).__name__}: {error}"
+        values = {"attempts": attempts, "last_error": last_error, "locked_by": None, "locked_until": None}
+        if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            values["status"] = OutboxStatus.FAILED
+        else:
+            values["available_at"] = utcnow() + retry_delay(attempts)
+        recorded = self._record(lease, **values)
+        self.db.commit()
+        if not recorded:
+            logger.warning("Outbox event %s (%s) was re-claimed before it failed: %s",
+                           event.id, event.event_type, last_error)
+        elif attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error("Outbox event %s (%s) failed for good: %s", event.id, event.event_type, last_error)
+        else:
+            logger.warning("Outbox event %s (%s) failed, attempt %d: %s",
+                           event.id, event.event_type, attempts, last_error)
+
+    def purge(self, batch_size: Optional[int] = None) -> int:
+        """Delete up to batch_size events done more than OUTBOX_RETENTION_SECONDS ago and commit.
+
+        Failed events are kept for inspection. Returns how many were deleted.
+        """
+        cutoff = utcnow() - timedelta(seconds=settings.OUTBOX_RETENTION_SECONDS)
+        old = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.status == OutboxStatus.DONE, OutboxEvent.processed_at < cutoff)
+            .limit(batch_size or settings.OUTBOX_BATCH_SIZE)
+        )
+        deleted = self.db.execute(
+            delete(OutboxEvent).where(OutboxEvent.id.in_(old.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        return deleted
+
+    def run_batch(self, worker_id: str, batch_size: Optional[int] = None) -> int:
+        """Claim and process one batch; return the number of events claimed"""
+        events = self.claim(worker_id, batch_size or settings.OUTBOX_BATCH_SIZE)
+        for event in events:
+            self.process(event)
+        return len(events)
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.reservation import StockReservation
+from app.models.sweet import Sweet
+from app.services.outbox_service import utcnow
+
+class ReservationService:
+    """Hold stock for a shopper for RESERVATION_TTL_SECONDS.
+
+    Every hold is also counted in Sweet.reserved_quantity, so available stock
+    is read from the sweet's own row and guarded by the same conditional
+    UPDATE as checkout.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reserve(self, user_id: str, quantities: Dict[str, int]) -> List[StockReservation]:
+        """Hold units of several sweets, all or nothing, and commit.
+
+        A user may hold at most RESERVATION_MAX_PER_SWEET units of each sweet;
+        the cap is checked by the same UPDATE. The user's own expired holds are
+        released first, so they neither count toward the cap nor block stock
+        while the sweeper has yet to reach them.
+        """
+        self._release_expired(user_id)
+        sweets = Sweet.__table__
+        rows = [
+            {"b_id": sweet_id, "b_quantity": quantity, "b_user_id": user_id}
+            for sweet_id, quantity in quantities.items()
+        ]
+        conditions = [
+            sweets.c.id == bindparam("b_id"),
+            sweets.c.quantity - sweets.c.reserved_quantity >= bindparam("b_quantity"),
+        ]
+        cap = settings.RESERVATION_MAX_PER_SWEET
+        if cap > 0:
+            conditions.append(self._held_by(bindparam("b_user_id"), sweets.c.id) + bindparam("b_quantity") <= cap)
+        statement = (
+            update(sweets)
+            .where(*conditions)
+            .values(reserved_quantity=sweets.c.reserved_quantity + bindparam("b_quantity"))
+        )
+        if self.db.get_bind().dialect.supports_sane_multi_rowcount:
+            held = self.db.execute(statement, rows).rowcount == len(rows)
+        else:
+            held = all(self.db.execute(statement, row).rowcount == 1 for row in rows)
+        if not held:
+            self.db.rollback()
+            over_cap = self._over_cap(user_id, quantities) if cap > 0 else None
+            if over_cap:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Reservation limit of {cap} per sweet reached for {over_cap}"
+                )
+            metrics.stock_out_rejections.inc(path="reservation")
+            raise HTTPException(status_code=400, detail=f"Not enough stock for {self._shortfall(quantities)}")
+
+        expires_at = utcnow() + timedelta(seconds=settings.RESERVATION_TTL_SECONDS)
+        reservations = [
+            StockReservation(user_id=user_id, sweet_id=sweet_id, quantity=quantity, expires_at=expires_at)
+            for sweet_id, quantity in quantities.items()
+        ]
+        self.db.add_all(reservations)
+        self.db.commit()
+        for reservation in reservations:
+            self.db.refresh(reservation)
+        return reservations
+
+    def _release_expired(self, user_id: str) -> None:
+        """Release the user's expired holds ahead of the sweeper and commit"""
+        released = self.db.execute(
+            delete(StockReservation)
+            .where(StockReservation.user_id == user_id, StockReservation.expires_at <= utcnow())
+            .returning(StockReservation.sweet_id, StockReservation.quantity)
+        ).all()
+        if released:
+            self._unreserve(released)
+            self.db.commit()
+
+    @staticmethod
+    def _held_by(user_id, sweet_id):
+        """Units the user holds of a sweet; reserve releases their expired holds beforehand"""
+        return select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+            StockReservation.user_id == user_id,
+            StockReservation.sweet_id == sweet_id
+        ).scalar_subquery()
+
+    def _over_cap(self, user_id: str, quantities: Dict[str, int]) -> Optional[str]:
+        """Name the first sweet the request would take over the per-user cap, if any"""
+        held = dict(self.db.execute(
+            select(StockReservation.sweet_id, func.sum(StockReservation.quantity))
+            .where(StockReservation.user_id == user_id, StockReservation.sweet_id.in_(quantities.keys()))
+            .group_by(StockReservation.sweet_id)
+        ).all())
+        over = [
+            sweet_id for sweet_id, quantity in quantities.items()
+            if held.get(sweet_id, 0) + quantity > settings.RESERVATION_MAX_PER_SWEET
+        ]
+        if not over:
+            return None
+        names = self.db.execute(select(Sweet.name).where(Sweet.id.in_(over)).order_by(Sweet.name)).scalars().all()
+        return names[0] if names else None
+
+    def _shortfall(self, quantities: Dict[str, int]) -> str:
+        """Name the first sweet that cannot cover its requested quantity"""
+        sweets = self.db.query(Sweet).filter(Sweet.id.in_(quantities.keys())).order_by(Sweet.name)
+        found = {sweet.id: sweet for sweet in sweets}
+        missing = set(quantities) - set(found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Sweet with id {min(missing)} not found")
+        for sweet in found.values():
+            if sweet.available_quantity < quantities[sweet.id]:
+                return sweet.name
+        return "one or more items"
+
+    def active(self, user_id: str) -> List[StockReservation]:
+        """The user's unexpired holds, soonest to expire first"""
+        return self.db.query(StockReservation).filter(
+            StockReservation.user_id == user_id,
+            StockReservation.expires_at > utcnow()
+        ).order_by(StockReservation.expires_at, StockReservation.id).all()
+
+    def release(self, user_id: str, reservation_id: str) -> None:
+        """Drop one of the user's holds and commit"""
+        released = self.db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id == reservation_id, StockReservation.user_id == user_id)
+            .returning(StockReservation.sweet_id, StockReservation.quantity)
+        ).all()
+        if not released:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        self._unreserve(released)
+        self.db.commit()
+
+    def consume(self, user_id: str, sweet_ids: Iterable[str]) -> Dict[str, int]:
+        """Remove the user's holds on these sweets and return the units they covered per sweet.
+
+        reserved_quantity is left to the caller, which releases it in the
+        same statement that takes the stock. The caller owns the transaction.
+        """
+        held: Dict[str, int] = defaultdict(int)
+        for sweet_id, quantity in self.db.execute(
+            delete(StockReservation)
+            .where(StockReservation.user_id == user_id, StockReservation.sweet_id.in_(set(sweet_ids)))
+            .returning(StockReservation.sweet_id, StockReservation.quantity)
+        ):
+            held[sweet_id] += quantity
+        return held
+
+    def sweep(self, batch_size: Optional[int] = None) -> int:
+        """Release up to batch_size expired holds and commit; return how many were released.
+
+        DELETE ... RETURNING claims the rows, so concurrent sweepers never
+        release the same hold twice.
+        """
+        expired = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at <= utcnow())
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size or settings.RESERVATION_SWEEP_BATCH_SIZE)
+        )
+        released = self.db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id.in_(expired.scalar_subquery()))
+            .returning(StockReservation.sweet_id, StockReservation.quantity)
+        ).all()
+        if released:
+            self._unreserve(released)
+        self.db.commit()
+        return len(released)
+
+    def _unreserve(self, released) -> None:
+        """Take released (sweet_id, quantity) rows out of the reserved counters in one executemany"""
+        totals: Dict[str, int] = defaultdict(int)
+        for sweet_id, quantity in released:
+            totals[sweet_id] += quantity
+        sweets = Sweet.__table__
+        self.db.execute(
+            update(sweets)
+            .where(sweets.c.id == bindparam("b_id"))
+            .values(reserved_quantity=sweets.c.reserved_quantity - bindparam("b_quantity")),
+            [{"b_id": sweet_id, "b_quantity": quantity} for sweet_id, quantity in totals.items()]
+        )
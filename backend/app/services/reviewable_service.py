@@ -0,0 +1,111 @@
+from typing import Iterable, List, Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.review import Review
+from app.models.reviewable_sweet import ReviewableSweet
+from app.models.sweet import Sweet
+
+# Orders whose items entitle the buyer to review them
+REVIEWABLE_STATUSES = (OrderStatus.CONFIRMED, OrderStatus.DELIVERED)
+
+class ReviewableService:
+    """Maintain the per-user set of sweets bought in a reviewable order.
+
+    Writers own the transaction and must commit.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, user_id: str, sweet_ids: Iterable[str]) -> None:
+        """Recompute the user's rows for the given sweets from their orders and reviews"""
+        sweet_ids = set(sweet_ids)
+        if not sweet_ids:
+            return
+        self.db.flush()
+        purchased = self.db.execute(
+            select(OrderItem.sweet_id, func.sum(OrderItem.quantity), func.max(OrderItem.created_at))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(
+                Order.user_id == user_id,
+                Order.status.in_(REVIEWABLE_STATUSES),
+                OrderItem.sweet_id.in_(sweet_ids)
+            )
+            .group_by(OrderItem.sweet_id)
+        ).all()
+        reviewed = set(self.db.execute(
+            select(Review.sweet_id).where(Review.user_id == user_id, Review.sweet_id.in_(sweet_ids))
+        ).scalars())
+
+        self.db.execute(delete(ReviewableSweet).where(
+            ReviewableSweet.user_id == user_id,
+            ReviewableSweet.sweet_id.in_(sweet_ids)
+        ))
+        if purchased:
+            self.db.execute(insert(ReviewableSweet), [
+                {"user_id": user_id, "sweet_id": sweet_id, "purchased_quantity": quantity,
+                 "purchase_date": purchase_date, "reviewed": sweet_id in reviewed}
+                for sweet_id, quantity, purchase_date in purchased
+            ])
+
+    def apply_status_change(self, order: Order, old_status: OrderStatus, new_status: OrderStatus) -> None:
+        """Update the buyer's rows when an order enters or leaves a reviewable status"""
+        if (old_status in REVIEWABLE_STATUSES) != (new_status in REVIEWABLE_STATUSES):
+            self.refresh(order.user_id, {item.sweet_id for item in order.order_items})
+
+    def get(self, user_id: str, sweet_id: str) -> Optional[ReviewableSweet]:
+        return self.db.get(ReviewableSweet, (user_id, sweet_id))
+
+    def set_reviewed(self, user_id: str, sweet_id: str, reviewed: bool) -> bool:
+        """Flip the reviewed flag; False when the row is missing or already in that state"""
+        result = self.db.execute(
+            update(ReviewableSweet)
+            .where(
+                ReviewableSweet.user_id == user_id,
+                ReviewableSweet.sweet_id == sweet_id,
+                ReviewableSweet.reviewed.is_(not reviewed)
+            )
+            .values(reviewed=reviewed)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def unreviewed(self, user_id: str) -> List[dict]:
+        """Sweets the user may still review, most recently bought first"""
+        rows = self.db.execute(
+            select(
+                Sweet.id.label("sweet_id"),
+                Sweet.name.label("sweet_name"),
+                Sweet.image_url.label("sweet_image_url"),
+                Sweet.category.label("sweet_category"),
+                ReviewableSweet.purchased_quantity,
+                ReviewableSweet.purchase_date,
+            )
+            .join(Sweet, Sweet.id == ReviewableSweet.sweet_id)
+            .where(ReviewableSweet.user_id == user_id, ReviewableSweet.reviewed.is_(False))
+            .order_by(ReviewableSweet.purchase_date.desc(), Sweet.id)
+        )
+        return [dict(row) for row in rows.mappings()]
+
+    def rebuild(self) -> int:
+        """Recompute every row from orders and reviews; return the number of rows"""
+        reviewed = (
+            select(Review.id)
+            .where(Review.user_id == Order.user_id, Review.sweet_id == OrderItem.sweet_id)
+            .exists()
+        )
+        self.db.execute(delete(ReviewableSweet))
+        result = self.db.execute(
+            insert(ReviewableSweet).from_select(
+                ["user_id", "sweet_id", "purchased_quantity", "purchase_date", "reviewed"],
+                select(Order.user_id, OrderItem.sweet_id, func.sum(OrderItem.quantity),
+                       func.max(OrderItem.created_at), reviewed)
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(Order.status.in_(REVIEWABLE_STATUSES))
+                .group_by(Order.user_id, OrderItem.sweet_id)
+            )
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Date, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.purchase import Purchase
+from app.models.sales_daily import SalesDaily
+from app.models.sweet import Sweet
+from app.services.demand_service import DemandService
+
+# (day, sweet_id, category) -> [units, revenue]
+SalesTotals = Dict[Tuple[date, str, str], list]
+
+# Columns top sellers can be ranked by
+SALES_METRICS = {
+    "revenue": func.sum(SalesDaily.revenue),
+    "units": func.sum(SalesDaily.units),
+}
+
+class SalesService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _add(self, totals: SalesTotals) -> None:
+        """Add units and revenue to the rollup rows, creating missing ones"""
+        if not totals:
+            return
+        rows = [
+            {"day": day, "sweet_id": sweet_id, "category": category, "units": units, "revenue": revenue}
+            for (day, sweet_id, category), (units, revenue) in totals.items()
+        ]
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name in ("sqlite", "postgresql"):
+            if dialect_name == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            statement = insert(SalesDaily.__table__)
+            statement = statement.on_conflict_do_update(
+                index_elements=[SalesDaily.day, SalesDaily.sweet_id],
+                set_={
+                    "units": SalesDaily.units + statement.excluded.units,
+                    "revenue": SalesDaily.revenue + statement.excluded.revenue,
+                }
+            )
+            self.db.execute(statement, rows)
+            return
+
+        # No portable upsert; update first and insert whatever did not exist yet
+        for row in rows:
+            result = self.db.execute(
+                update(SalesDaily)
+                .where(SalesDaily.day == row["day"], SalesDaily.sweet_id == row["sweet_id"])
+                .values(units=SalesDaily.units + row["units"], revenue=SalesDaily.revenue + row["revenue"])
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                self.db.add(SalesDaily(**row))
+        self.db.flush()
+
+    def record_order(self, order: Order, sign: int = 1) -> None:
+        """Count a flushed order's items as sold on its day, or take them back with sign=-1.
+
+        Items must have their sweet loaded. The caller owns the transaction.
+        """
+        totals: SalesTotals = defaultdict(lambda: [0, Decimal("0")])
+        for item in order.order_items:
+            entry = totals[(order.created_at.date(), item.sweet_id, item.sweet.category)]
+            entry[0] += sign * item.quantity
+            entry[1] += sign * item.total_price
+        self._add(totals)
+        DemandService(self.db).record({(day, sweet_id): units for (day, sweet_id, _), (units, _) in totals.items()})
+
+    def record_purchase(self, purchase: Purchase, sweet: Sweet) -> None:
+        """Count a flushed single-sweet purchase. The caller owns the transaction."""
+        key = (purchase.created_at.date(), sweet.id, sweet.category)
+        self._add({key: [purchase.quantity, purchase.total_price]})
+        DemandService(self.db).record({(key[0], sweet.id): purchase.quantity})
+
+    def apply_status_change(self, order: Order, old_status: OrderStatus, new_status: OrderStatus) -> None:
+        """Drop a cancelled order from the rollup, and restore it if the cancellation is undone"""
+        was_counted = old_status != OrderStatus.CANCELLED
+        is_counted = new_status != OrderStatus.CANCELLED
+        if was_counted != is_counted:
+            self.record_order(order, 1 if is_counted else -1)
+
+    def rebuild(self) -> int:
+        """Recompute the whole rollup from orders and purchases; return the number of rows"""
+        totals: SalesTotals = defaultdict(lambda: [0, Decimal("0")])
+        sources = [
+            select(func.date(Order.created_at, type_=Date), OrderItem.sweet_id, Sweet.category,
+                   func.sum(OrderItem.quantity), func.sum(OrderItem.total_price))
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(Sweet, Sweet.id == OrderItem.sweet_id)
+            .where(Order.status != OrderStatus.CANCELLED),
+            select(func.date(Purchase.created_at, type_=Date), Purchase.sweet_id, Sweet.category,
+                   func.sum(Purchase.quantity), func.sum(Purchase.total_price))
+            .join(Sweet, Sweet.id == Purchase.sweet_id),
+        ]
+        for query in sources:
+            grouped = query.group_by(*list(query.selected_columns)[:3])
+            for day, sweet_id, category, units, revenue in self.db.execute(grouped):
+                entry = totals[(day, sweet_id, category)]
+                entry[0] += units
+                entry[1] += Decimal(revenue)
+
+        self.db.execute(delete(SalesDaily))
+        self._add(totals)
+        self.db.commit()
+        return len(totals)
+
+    def _range(self, query, start: date, end: date, category: Optional[str]):
+        query = query.where(SalesDaily.day >= start, SalesDaily.day <= end)
+        if category is not None:
+            query = query.where(SalesDaily.category == category)
+        return query
+
+    def top_sellers(
+        self,
+        start: date,
+        end: date,
+        metric: str = "revenue",
+        category: Optional[str] = None,
+        limit: int = 10
+    ) -> List[dict]:
+        """Sweets with the highest revenue or units between start and end inclusive"""
+        rank = SALES_METRICS[metric]
+        query = self._range(
+            select(SalesDaily.sweet_id, Sweet.name.label("sweet_name"), Sweet.category,
+                   func.sum(SalesDaily.units).label("units"), func.sum(SalesDaily.revenue).label("revenue"))
+            .join(Sweet, Sweet.id == SalesDaily.sweet_id),
+            start, end, category
+        )
+        query = query.group_by(SalesDaily.sweet_id, Sweet.name, Sweet.category).order_by(
+            rank.desc(), SalesDaily.sweet_id
+        ).limit(limit)
+        return [dict(row) for row in self.db.execute(query).mappings()]
+
+    def time_series(
+        self,
+        start: date,
+        end: date,
+        sweet_id: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> List[dict]:
+        """Units and revenue per day between start and end inclusive; days without sales are omitted"""
+        query = self._range(
+            select(SalesDaily.day, func.sum(SalesDaily.units).label("units"),
+                   func.sum(SalesDaily.revenue).label("revenue")),
+            start, end, category
+        )
+        if sweet_id is not None:
+            query = query.where(SalesDaily.sweet_id == sweet_id)
+        query = query.group_by(SalesDaily.day).order_by(SalesDaily.day)
+        return [dict(row) for row in self.db.execute(query).mappings()]
@@ -1,9 +1,57 @@
-from typing import List, Optional
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import Row, case, delete, func, insert, literal_column, select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from app.core import metrics
+from app.core.catalog_cache import bump_catalog_version, catalog_cache, get_catalog_version
+from app.core.config import settings
+from app.core.pagination import build_next_cursor, decode_cursor, keyset_filter
+from app.db.fts import SWEETS_FTS_TABLE, build_match_query, fts_enabled, sweets_fts
+from app.models.reservation import StockReservation
+from app.models.reviewable_sweet import ReviewableSweet
 from app.models.sweet import Sweet
+from app.models.sweet_demand import SweetDemand
 from app.schemas.sweet import SweetCreate, SweetUpdate
+from app.services.outbox_service import OutboxService
+from app.services.reservation_service import ReservationService
+from app.services.sales_service import SalesService
+
+# Columns search results can be sorted by
+SORT_COLUMNS = {
+    "price": Sweet.price,
+    "name": Sweet.name,
+    "rating": Sweet.avg_rating,
+    "created_at": Sweet.created_at,
+    "quantity": Sweet.quantity,
+    "category": Sweet.category,
+}
+
+# Upper bounds of the price and rating facet buckets; the last price bucket is open ended
+PRICE_FACET_EDGES = (1, 2, 5, 10, 20)
+RATING_FACET_EDGES = (1, 2, 3, 4, 5)
+
+# Columns written by the bulk export, in order
+EXPORT_COLUMNS = [
+    "id", "name", "category", "price", "quantity", "reorder_threshold", "image_url", "description",
+    "avg_rating", "review_count", "created_at", "updated_at",
+]
+
+# Columns of SweetResponse; list endpoints select these as rows instead of loading Sweet entities
+LIST_COLUMNS = (
+    Sweet.id, Sweet.name, Sweet.category, Sweet.price, Sweet.quantity, Sweet.image_url, Sweet.description,
+    Sweet.reorder_threshold, Sweet.available_quantity.label("available_quantity"), Sweet.created_at,
+    Sweet.updated_at, Sweet.avg_rating.label("avg_rating"), Sweet.review_count,
+)
+
+# Sweet attributes holding the cursor value for sort keys that differ from the column name
+SORT_ATTRIBUTES = {
+    "rating": "avg_rating",
+    "relevance": "search_rank",
+}
 
 class SweetService:
     def __init__(self, db: Session):
@@ -15,10 +63,14 @@ class SweetService:
             name=sweet_data.name,
             category=sweet_data.category,
             price=sweet_data.price,
-            quantity=sweet_data.quantity
+            quantity=sweet_data.quantity,
+            image_url=sweet_data.image_url,
+            description=sweet_data.description,
+            reorder_threshold=sweet_data.reorder_threshold
         )
         
         self.db.add(db_sweet)
+        bump_catalog_version(self.db)
         self.db.commit()
         self.db.refresh(db_sweet)
         return db_sweet
@@ -35,13 +87,30 @@ class SweetService:
         return sweet
 
     def update_sweet(self, sweet_id: str, sweet_data: SweetUpdate) -> Sweet:
-        """Update sweet"""
+        """Update sweet; quantity may not drop below the units held by reservations"""
         sweet = self.get_sweet_by_id(sweet_id)
         
         update_data = sweet_data.model_dump(exclude_unset=True)
+        quantity = update_data.pop("quantity", None)
         for field, value in update_data.items():
             setattr(sweet, field, value)
         
+        if quantity is not None:
+            # Guarded in SQL so a reservation made since the read is still covered
+            result = self.db.execute(
+                update(Sweet)
+                .where(Sweet.id == sweet_id, Sweet.reserved_quantity <= quantity)
+                .values(quantity=quantity),
+                execution_options={"synchronize_session": False}
+            )
+            if result.rowcount == 0:
+                self.db.rollback()
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Quantity cannot be below the {sweet.reserved_quantity} units held by reservations"
+                )
+        
+        bump_catalog_version(self.db)
         self.db.commit()
         self.db.refresh(sweet)
         return sweet
@@ -49,7 +118,12 @@ class SweetService:
     def delete_sweet(self, sweet_id: str) -> bool:
         """Delete sweet"""
         sweet = self.get_sweet_by_id(sweet_id)
+        # SQLite does not enforce these foreign keys, so remove the sweet's
+        # holds, demand and reviewable rows with it rather than orphan them
+        for model in (StockReservation, SweetDemand, ReviewableSweet):
+            self.db.execute(delete(model).where(model.sweet_id == sweet_id))
         self.db.delete(sweet)
+        bump_catalog_version(self.db)
         self.db.commit()
         return True
 
@@ -66,21 +140,47 @@ class SweetService:
         sort_by: Optional[str] = None,
         sort_order: Optional[str] = "asc",
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Sweet]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Row]:
         """Search sweets with advanced filters and sorting"""
-        from sqlalchemy import func, desc, asc
-        from app.models.review import Review
-        
-        # Base query with average rating
-        db_query = self.db.query(
-            Sweet,
-            func.coalesce(func.avg(Review.rating), 0).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).outerjoin(Review, Sweet.id == Review.sweet_id).group_by(Sweet.id)
+        # Ratings are read from the denormalized aggregates on Sweet
+        db_query, ranked = self._filter(
+            self.db.query(*LIST_COLUMNS), query, category, min_price, max_price,
+            min_rating, in_stock_only, min_quantity, max_quantity
+        )
+        sort = self.resolve_sort(sort_by, sort_order)
+        if ranked:
+            # Rows carry the rank for the cursor
+            db_query = db_query.add_columns(sweets_fts.c.rank.label("search_rank"))
+            if not sort_by:
+                # Best BM25 match first; rank is lower for better matches
+                sort = ("relevance:asc", sweets_fts.c.rank, False)
         
-        # Apply filters
-        if query:
+        return self._paginate(db_query, sort, cursor, skip, limit)
+
+    def _filter(
+        self,
+        db_query,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        in_stock_only: Optional[bool] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None
+    ) -> Tuple[Any, bool]:
+        """Apply the search filters to a query over sweets; also return whether FTS matched"""
+        ranked = False
+        match_query = build_match_query(query) if query else None
+        if match_query and fts_enabled(self.db.connection()):
+            # Full-text match over name, category and description
+            db_query = db_query.join(
+                sweets_fts, sweets_fts.c.sweet_id == Sweet.id
+            ).filter(literal_column(SWEETS_FTS_TABLE).match(match_query))
+            ranked = True
+        elif query:
             db_query = db_query.filter(Sweet.name.ilike(f"%{query}%"))
         
         if category:
@@ -93,7 +193,7 @@ class SweetService:
             db_query = db_query.filter(Sweet.price <= max_price)
         
         if min_rating is not None:
-            db_query = db_query.having(func.coalesce(func.avg(Review.rating), 0) >= min_rating)
+            db_query = db_query.filter(Sweet.avg_rating >= min_rating)
         
         if in_stock_only:
             db_query = db_query.filter(Sweet.quantity > 0)
@@ -104,60 +204,256 @@ class SweetService:
         if max_quantity is not None:
             db_query = db_query.filter(Sweet.quantity <= max_quantity)
         
-        # Apply sorting
-        if sort_by:
-            if sort_by == "price":
-                order_col = Sweet.price
-            elif sort_by == "name":
-                order_col = Sweet.name
-            elif sort_by == "rating":
-                order_col = func.coalesce(func.avg(Review.rating), 0)
-            elif sort_by == "created_at":
-                order_col = Sweet.created_at
-            elif sort_by == "quantity":
-                order_col = Sweet.quantity
-            elif sort_by == "category":
-                order_col = Sweet.category
-            else:
-                order_col = Sweet.created_at
-            
-            if sort_order.lower() == "desc":
-                db_query = db_query.order_by(desc(order_col))
-            else:
-                db_query = db_query.order_by(asc(order_col))
-        else:
+        return db_query, ranked
+
+    def search_facets(self, **filters) -> Dict[str, Any]:
+        """Category, price and rating counts over the sweets matching the search filters.
+
+        Everything comes from one grouped pass over the filtered rows. Without
+        active filters the result is cached until the catalog next changes, and
+        for at most CATALOG_STOCK_TTL_SECONDS since the in-stock count follows sales.
+        """
+        if any(value not in (None, False, "") for value in filters.values()):
+            return self._compute_facets(filters)
+        
+        version = get_catalog_version(self.db)
+        key = (version, "search_facets")
+        facets = catalog_cache.get(key) if version else None
+        if facets is None:
+            facets = self._compute_facets(filters)
+            if version:
+                catalog_cache.set(key, facets, ttl=settings.CATALOG_STOCK_TTL_SECONDS)
+        return facets
+
+    def _compute_facets(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        price_bucket = case(
+            *[(Sweet.price < edge, index) for index, edge in enumerate(PRICE_FACET_EDGES)],
+            else_=len(PRICE_FACET_EDGES)
+        )
+        rating_bucket = case(
+            *[(Sweet.avg_rating < edge, index) for index, edge in enumerate(RATING_FACET_EDGES[:-1])],
+            else_=len(RATING_FACET_EDGES) - 1
+        )
+        db_query, _ = self._filter(
+            self.db.query(
+                Sweet.category, price_bucket, rating_bucket,
+                func.count(), func.sum(case((Sweet.quantity > 0, 1), else_=0))
+            ),
+            **filters
+        )
+        
+        categories: Dict[str, int] = {}
+        price_counts = [0] * (len(PRICE_FACET_EDGES) + 1)
+        rating_counts = [0] * len(RATING_FACET_EDGES)
+        in_stock = 0
+        for category, price_index, rating_index, count, stocked in db_query.group_by(
+            Sweet.category, price_bucket, rating_bucket
+        ):
+            categories[category] = categories.get(category, 0) + count
+            price_counts[price_index] += count
+            rating_counts[rating_index] += count
+            in_stock += stocked or 0
+        
+        price_bounds = list(zip((0,) + PRICE_FACET_EDGES, PRICE_FACET_EDGES + (None,)))
+        rating_bounds = list(zip((0,) + RATING_FACET_EDGES[:-1], RATING_FACET_EDGES))
+        return {
+            "total": sum(categories.values()),
+            "in_stock": in_stock,
+            "categories": [
+                {"value": category, "count": count}
+                for category, count in sorted(categories.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            "price": [
+                {"min": low, "max": high, "count": count}
+                for (low, high), count in zip(price_bounds, price_counts)
+            ],
+            "rating": [
+                {"min": low, "max": high, "count": count}
+                for (low, high), count in zip(rating_bounds, rating_counts)
+            ],
+        }
+
+    def get_sweets_with_ratings(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Row]:
+        """Get all sweets with rating information, newest first"""
+        return self._paginate(self.db.query(*LIST_COLUMNS), self.resolve_sort(None, None), cursor, skip, limit)
+
+    def resolve_sort(self, sort_by: Optional[str], sort_order: Optional[str]) -> Tuple[str, Any, bool]:
+        """Resolve sort parameters to (cursor sort key, order column, descending)"""
+        if not sort_by:
             # Default sorting by created_at desc
-            db_query = db_query.order_by(desc(Sweet.created_at))
+            return "created_at:desc", Sweet.created_at, True
+        
+        order_col = SORT_COLUMNS.get(sort_by, Sweet.created_at)
+        descending = (sort_order or "asc").lower() == "desc"
+        sort_name = sort_by if sort_by in SORT_COLUMNS else "created_at"
+        return f"{sort_name}:{'desc' if descending else 'asc'}", order_col, descending
+
+    def next_cursor(
+        self,
+        sweets: List[Row],
+        limit: int,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = "asc"
+    ) -> Optional[str]:
+        """Cursor for the page following sweets, None when there are no more rows"""
+        if sweets and hasattr(sweets[0], "search_rank") and not sort_by:
+            sort_key = "relevance:asc"
+        else:
+            sort_key, _, _ = self.resolve_sort(sort_by, sort_order)
+        attribute = SORT_ATTRIBUTES.get(sort_key.split(":")[0], sort_key.split(":")[0])
+        return build_next_cursor(sweets, limit, sort_key, lambda sweet: getattr(sweet, attribute))
+
+    def _paginate(self, db_query, sort: Tuple[str, Any, bool], cursor, skip, limit) -> list:
+        """Order a sweet query and fetch one page, by cursor when given, else by offset"""
+        from sqlalchemy import desc, asc
         
-        results = db_query.offset(skip).limit(limit).all()
+        sort_key, order_col, descending = sort
+        direction = desc if descending else asc
+        # Sweet.id breaks ties so every row has a unique position for the cursor
+        db_query = db_query.order_by(direction(order_col), direction(Sweet.id))
         
-        # Add rating info to sweet objects
-        sweets_with_ratings = []
-        for sweet, avg_rating, review_count in results:
-            sweet.avg_rating = float(avg_rating) if avg_rating else 0.0
-            sweet.review_count = review_count
-            sweets_with_ratings.append(sweet)
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_key, order_col)
+            dialect_name = self.db.get_bind().dialect.name
+            db_query = db_query.filter(
+                keyset_filter(order_col, Sweet.id, value, last_id, descending, dialect_name)
+            )
+        else:
+            db_query = db_query.offset(skip)
         
-        return sweets_with_ratings
+        return db_query.limit(limit).all()
 
-    def get_sweets_with_ratings(self, skip: int = 0, limit: int = 100) -> List[Sweet]:
-        """Get all sweets with rating information"""
-        from sqlalchemy import func
+    def apply_review_rating(self, sweet_id: str, rating_delta: int, count_delta: int) -> None:
+        """Adjust the persisted rating aggregates of a sweet.
+
+        The update is done in SQL so concurrent reviews cannot lose increments.
+        The caller owns the transaction and must commit.
+        """
+        self.db.query(Sweet).filter(Sweet.id == sweet_id).update(
+            {
+                Sweet.rating_sum: Sweet.rating_sum + rating_delta,
+                Sweet.review_count: Sweet.review_count + count_delta,
+                # Rating changes are not product edits
+                Sweet.updated_at: Sweet.updated_at
+            },
+            synchronize_session=False
+        )
+        bump_catalog_version(self.db)
+
+    def recompute_rating_aggregates(self) -> int:
+        """Recompute rating_sum/review_count for every sweet from the reviews table"""
+        from sqlalchemy import func, select, update
         from app.models.review import Review
         
-        results = self.db.query(
-            Sweet,
-            func.coalesce(func.avg(Review.rating), 0).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).outerjoin(Review, Sweet.id == Review.sweet_id).group_by(Sweet.id).offset(skip).limit(limit).all()
-        
-        sweets_with_ratings = []
-        for sweet, avg_rating, review_count in results:
-            sweet.avg_rating = float(avg_rating) if avg_rating else 0.0
-            sweet.review_count = review_count
-            sweets_with_ratings.append(sweet)
+        rating_sum = select(func.coalesce(func.sum(Review.rating), 0)).where(
+            Review.sweet_id == Sweet.id
+        ).scalar_subquery()
+        review_count = select(func.count(Review.id)).where(
+            Review.sweet_id == Sweet.id
+        ).scalar_subquery()
         
-        return sweets_with_ratings
+        result = self.db.execute(
+            update(Sweet).values(
+                rating_sum=rating_sum,
+                review_count=review_count,
+                updated_at=Sweet.updated_at
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        bump_catalog_version(self.db)
+        self.db.commit()
+        return result.rowcount
+
+    def import_sweets(
+        self,
+        rows: Iterable[Tuple[int, Any]],
+        batch_size: int = 1000,
+        atomic: bool = False,
+        max_errors: int = 1000
+    ) -> Dict[str, Any]:
+        """Validate rows with SweetCreate and insert them in executemany batches.
+
+        rows yields (row number, mapping); a row may also be an exception
+        raised while parsing it. Without atomic each batch is committed as it
+        fills; with atomic nothing is committed unless every row succeeds.
+        Returns counts and the first max_errors per-row errors.
+        """
+        report = {"imported": 0, "failed": 0, "errors": []}
+        batch: List[Dict[str, Any]] = []
+        batch_rows: List[int] = []
+
+        def fail(row_number: int, message: str) -> None:
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"row": row_number, "error": message})
+
+        def flush() -> None:
+            if not batch or (atomic and report["failed"]):
+                return
+            try:
+                self.db.execute(insert(Sweet.__table__), batch)
+                if not atomic:
+                    bump_catalog_version(self.db)
+                    self.db.commit()
+                report["imported"] += len(batch)
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                if atomic:
+                    report["imported"] = 0
+                for row_number in batch_rows:
+                    fail(row_number, f"database error: {e.__class__.__name__}")
+
+        for row_number, row in rows:
+            if isinstance(row, Exception):
+                fail(row_number, f"unreadable row: {row}")
+                continue
+            if not isinstance(row, dict):
+                fail(row_number, "row must be an object")
+                continue
+            # CSV leaves missing values as empty strings
+            values = {key: None if value == "" else value for key, value in row.items() if key}
+            try:
+                sweet = SweetCreate.model_validate(values)
+            except ValidationError as e:
+                fail(row_number, "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ))
+                continue
+            batch.append(sweet.model_dump())
+            batch_rows.append(row_number)
+            if len(batch) >= batch_size:
+                flush()
+                batch.clear()
+                batch_rows.clear()
+        flush()
+
+        if atomic:
+            if report["failed"]:
+                self.db.rollback()
+                report["imported"] = 0
+            else:
+                bump_catalog_version(self.db)
+                self.db.commit()
+        return report
+
+    def iter_export_rows(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Every sweet as a dict of EXPORT_COLUMNS, fetched batch_size rows at a time"""
+        columns = [
+            Sweet.avg_rating.label(name) if name == "avg_rating" else Sweet.__table__.c[name]
+            for name in EXPORT_COLUMNS
+        ]
+        result = self.db.execute(
+            select(*columns)
+            .order_by(Sweet.created_at, Sweet.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in result.mappings():
+            yield dict(row)
 
     def get_categories(self) -> List[str]:
         """Get all unique categories"""
@@ -177,16 +473,115 @@ class SweetService:
             'max_price': float(result.max_price) if result.max_price else 0.0
         }
 
-    def purchase_sweet(self, sweet_id: str, user_id: str, quantity: int = 1):
-        """Purchase sweet and update inventory"""
+    def decrement_stock(self, sweet_id: str, quantity: int, held: int = 0) -> Optional[int]:
+        """Atomically take quantity units out of stock.
+
+        Runs UPDATE ... SET quantity = quantity - :n WHERE quantity - reserved >= :n,
+        so concurrent checkouts can never oversell or take units other shoppers
+        hold. held is what the buyer's own consumed reservations covered; it
+        is released from reserved_quantity by the same statement. Returns the
+        remaining stock, or None when there was not enough. The caller owns
+        the transaction.
+        """
+        from sqlalchemy import update
+        
+        row = self.db.execute(
+            update(Sweet)
+            .where(Sweet.id == sweet_id, Sweet.quantity - (Sweet.reserved_quantity - held) >= quantity)
+            .values(quantity=Sweet.quantity - quantity, reserved_quantity=Sweet.reserved_quantity - held)
+            .returning(Sweet.quantity, Sweet.reorder_threshold),
+            execution_options={"synchronize_session": False}
+        ).one_or_none()
+        if row is None:
+            return None
+        self._enqueue_low_stock([(sweet_id, *row)], {sweet_id: quantity})
+        return row.quantity
+
+    def decrement_stock_many(self, quantities: Dict[str, int], held: Optional[Dict[str, int]] = None) -> bool:
+        """Atomically take stock for several sweets in one round-trip.
+
+        Applies the same guard as decrement_stock to every sweet, sent as a
+        single executemany. Returns False when any sweet lacked stock, in
+        which case the caller must roll back.
+        """
+        from sqlalchemy import bindparam, update
+        
+        held = held or {}
+        if not self.db.get_bind().dialect.supports_sane_multi_rowcount:
+            # Driver cannot report executemany row counts; check one by one
+            return all(
+                self.decrement_stock(sweet_id, quantity, held.get(sweet_id, 0)) is not None
+                for sweet_id, quantity in quantities.items()
+            )
+        
+        sweets = Sweet.__table__
+        result = self.db.execute(
+            update(sweets)
+            .where(
+                sweets.c.id == bindparam("b_id"),
+                sweets.c.quantity - (sweets.c.reserved_quantity - bindparam("b_held")) >= bindparam("b_quantity")
+            )
+            .values(
+                quantity=sweets.c.quantity - bindparam("b_quantity"),
+                reserved_quantity=sweets.c.reserved_quantity - bindparam("b_held")
+            ),
+            [{"b_id": sweet_id, "b_quantity": quantity, "b_held": held.get(sweet_id, 0)}
+             for sweet_id, quantity in quantities.items()]
+        )
+        if result.rowcount != len(quantities):
+            return False
+        # executemany cannot return rows; one lookup finds the sweets now at or below threshold
+        low = self.db.execute(
+            select(Sweet.id, Sweet.quantity, Sweet.reorder_threshold)
+            .where(Sweet.id.in_(quantities), Sweet.quantity <= Sweet.reorder_threshold)
+        ).all()
+        self._enqueue_low_stock(low, quantities)
+        return True
+
+    def return_stock_many(self, quantities: Dict[str, int]) -> None:
+        """Put units back on the shelf, e.g. for a cancelled order. The caller owns the transaction."""
+        from sqlalchemy import bindparam, update
+        
+        sweets = Sweet.__table__
+        self.db.execute(
+            update(sweets)
+            .where(sweets.c.id == bindparam("b_id"))
+            .values(quantity=sweets.c.quantity + bindparam("b_quantity")),
+            [{"b_id": sweet_id, "b_quantity": quantity} for sweet_id, quantity in quantities.items()]
+        )
+
+    def _enqueue_low_stock(self, levels: Iterable[Tuple[str, int, Optional[int]]], taken: Dict[str, int]) -> None:
+        """Queue a stock.low event for each sweet this decrement took to or below its reorder threshold.
+
+        Only the sale that crosses the threshold raises one; later sales below
+        it stay quiet until a restock lifts the stock back above.
+        """
+        for sweet_id, remaining, threshold in levels:
+            if threshold is not None and remaining <= threshold < remaining + taken[sweet_id]:
+                OutboxService(self.db).enqueue(
+                    "stock.low",
+                    {"sweet_id": sweet_id, "quantity": remaining, "reorder_threshold": threshold},
+                    aggregate_id=sweet_id,
+                    idempotency_key=f"stock.low:{sweet_id}:{uuid.uuid4()}"
+                )
+
+    def purchase_sweet(
+        self,
+        sweet_id: str,
+        user_id: str,
+        quantity: int = 1,
+        before_commit: Optional[Callable[[Any], None]] = None
+    ):
+        """Purchase sweet and update inventory; before_commit gets the flushed purchase"""
         sweet = self.get_sweet_by_id(sweet_id)
         
-        if sweet.quantity < quantity:
+        # Update sweet quantity; the buyer's own holds on it are used up
+        held = ReservationService(self.db).consume(user_id, [sweet_id])
+        if self.decrement_stock(sweet_id, quantity, held.get(sweet_id, 0)) is None:
+            self.db.rollback()
+            metrics.stock_out_rejections.inc(path="purchase")
             raise HTTPException(status_code=400, detail="Insufficient stock")
         
-        # Update sweet quantity
-        sweet.quantity -= quantity
-        
         # Create purchase record
         from app.models.purchase import Purchase
         purchase = Purchase(
@@ -197,16 +592,26 @@ class SweetService:
         )
         
         self.db.add(purchase)
+        self.db.flush()
+        SalesService(self.db).record_purchase(purchase, sweet)
+        if before_commit is not None:
+            before_commit(purchase)
         self.db.commit()
         self.db.refresh(purchase)
+        metrics.purchases_total.inc()
         
         return purchase
 
     def restock_sweet(self, sweet_id: str, quantity: int) -> Sweet:
         """Restock sweet inventory"""
         sweet = self.get_sweet_by_id(sweet_id)
-        sweet.quantity += quantity
+        # Increment in SQL so concurrent checkouts are not overwritten with a stale total
+        self.db.execute(
+            update(Sweet).where(Sweet.id == sweet_id).values(quantity=Sweet.quantity + quantity),
+            execution_options={"synchronize_session": False}
+        )
         
+        bump_catalog_version(self.db)
         self.db.commit()
         self.db.refresh(sweet)
         return sweet
\ No newline at end of file
@@ -1,3 +1,4 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
@@ -10,15 +11,16 @@ class UserService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_user(self, user_data: UserCreate) -> User:
-        """Create a new user"""
+    def create_user(self, user_data: UserCreate, hashed_password: Optional[str] = None) -> User:
+        """Create a new user, optionally with a password hash computed by the caller"""
         # Check if user already exists
         existing_user = self.db.query(User).filter(User.email == user_data.email).first()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Hash the password
-        hashed_password = auth_service.hash_password(user_data.password)
+        if hashed_password is None:
+            hashed_password = auth_service.hash_password(user_data.password)
         
         # Create new user
         db_user = User(
@@ -48,5 +50,14 @@ class UserService:
         
         if not auth_service.verify_password(password, user.hashed_password):
             return None
-        
-        return user
\ No newline at end of file
+
+        if auth_service.needs_rehash(user.hashed_password):
+            self.update_password_hash(user, auth_service.hash_password(password))
+        return user
+
+    def update_password_hash(self, user: User, hashed_password: str) -> User:
+        """Store an upgraded hash for a user"""
+        user.hashed_password = hashed_password
+        self.db.commit()
+        self.db.refresh(user)
+        return user
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark the API hot paths against a generated dataset
+
+Runs each scenario in-process through TestClient against a database built by
+benchmarks.datagen and records p50/p95/p99 latency, throughput, and the SQL
+statement count and DB time per request reported in the Server-Timing header.
+Results are written as JSON so runs on different commits can be compared
+with --compare.
+
+Usage (from backend/):
+    python -m benchmarks.bench_api --database /tmp/bench.db [--generate --scale 0.01]
+        [--requests 200] [--scenario catalog_list ...] [--output run.json] [--compare base.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.auth import auth_service
+from app.core.catalog_cache import catalog_cache
+from app.core.query_stats import SERVER_TIMING_HEADER, parse_server_timing, query_count
+from app.db.database import create_db_engine, get_db
+from app.main import app
+from app.models import Sweet, User
+from benchmarks.datagen import dataset_summary, generate, sizes_for
+
+SEARCH_TERMS = ["raspberry", "dark choc", "salted caramel", "minty", "honey almond", "zesty lime"]
+
+class Context:
+    """Ids and auth headers the scenarios draw from"""
+
+    def __init__(self, db, rng):
+        self.rng = rng
+        self.sweet_ids = db.execute(select(Sweet.id).where(Sweet.quantity > 0).limit(5000)).scalars().all()
+        self.categories = db.execute(select(Sweet.category).distinct()).scalars().all()
+        users = db.execute(select(User).order_by(User.email).limit(200)).scalars().all()
+        self.admin_headers = self._headers(next(user for user in users if user.is_admin))
+        self.user_headers = [self._headers(user) for user in users if not user.is_admin]
+
+    @staticmethod
+    def _headers(user):
+        token = auth_service.create_access_token({"sub": user.email, "user_id": str(user.id)})
+        return {"Authorization": f"Bearer {token}"}
+
+    def sweet_id(self):
+        return self.rng.choice(self.sweet_ids)
+
+    def user(self):
+        return self.rng.choice(self.user_headers)
+
+def order_body(ctx):
+    return {"items": [
+        {"sweet_id": sweet_id, "quantity": 1, "unit_price": 1.00}
+        for sweet_id in ctx.rng.sample(ctx.sweet_ids, 3)
+    ]}
+
+# name -> (method, path builder, body builder, headers builder)
+SCENARIOS = {
+    "catalog_list": ("GET", lambda c: f"/api/v1/sweets/?limit=50&skip={c.rng.randrange(0, 1000)}", None, None),
+    "catalog_detail": ("GET", lambda c: f"/api/v1/sweets/{c.sweet_id()}", None, None),
+    "catalog_categories": ("GET", lambda c: "/api/v1/sweets/filters/categories", None, None),
+    "search_text": ("GET", lambda c: f"/api/v1/sweets/search?query={c.rng.choice(SEARCH_TERMS)}&limit=20",
+                    None, None),
+    "search_filtered": ("GET", lambda c: (
+        f"/api/v1/sweets/search?category={c.rng.choice(c.categories)}"
+        f"&min_price={c.rng.randrange(1, 10)}&sort_by=price&limit=20"), None, None),
+    "search_top_rated": ("GET", lambda c: "/api/v1/sweets/search?min_rating=4&sort_by=rating&sort_order=desc&limit=20",
+                         None, None),
+    "search_faceted": ("GET", lambda c: f"/api/v1/sweets/search/faceted?category={c.rng.choice(c.categories)}&limit=20",
+                       None, None),
+    "reviews_for_sweet": ("GET", lambda c: f"/api/v1/reviews/sweet/{c.sweet_id()}", None, None),
+    "my_orders": ("GET", lambda c: "/api/v1/orders/my-orders?limit=20", None, lambda c: c.user()),
+    "admin_orders": ("GET", lambda c: "/api/v1/orders/?limit=50", None, lambda c: c.admin_headers),
+    "order_create": ("POST", lambda c: "/api/v1/orders/", order_body, lambda c: c.user()),
+}
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_scenario(client, ctx, name, requests, warmup):
+    """Issue requests for one scenario; return its latency, throughput and SQL stats"""
+    method, path_for, body_for, headers_for = SCENARIOS[name]
+    latencies, counts, db_times = [], [], []
+    for i in range(warmup + requests):
+        path = path_for(ctx)
+        kwargs = {}
+        if body_for:
+            kwargs["json"] = body_for(ctx)
+        if headers_for:
+            kwargs["headers"] = headers_for(ctx)
+        started = time.perf_counter()
+        response = client.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: {method} {path} -> {response.status_code} {response.text[:200]}")
+        if i >= warmup:
+            server_timing = response.headers[SERVER_TIMING_HEADER]
+            latencies.append(elapsed * 1000)
+            counts.append(query_count(server_timing))
+            db_times.append(parse_server_timing(server_timing)["db"]["dur"])
+    return {
+        "scenario": name,
+        "requests": requests,
+        "rps": round(requests / (sum(latencies) / 1000), 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "sql_per_request": round(statistics.mean(counts), 2),
+        "sql_max": max(counts),
+        "db_ms_p50": round(statistics.median(db_times), 3),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def run(database_url, scenarios, requests, warmup=10, seed=1, catalog_cache_enabled=True):
+    engine = create_db_engine(database_url)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    if not catalog_cache_enabled:
+        catalog_cache.ttl = 0
+    app.dependency_overrides[get_db] = override_get_db
+    db = Session()
+    ctx = Context(db, random.Random(seed))
+    db.close()
+    try:
+        with TestClient(app) as client:
+            results = [run_scenario(client, ctx, name, requests, warmup) for name in scenarios]
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+    return results
+
+def compare(results, baseline):
+    """Print per-scenario latency and query deltas against a previous run"""
+    previous = {row["scenario"]: row for row in baseline["scenarios"]}
+    print(f"\nvs {baseline.get('revision') or 'baseline'}:")
+    print(f"{'scenario':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'sql':>7}")
+    for row in results:
+        before = previous.get(row["scenario"])
+        if not before:
+            continue
+        change = lambda key: f"{(row[key] - before[key]) / before[key] * 100:+.0f}%" if before[key] else "n/a"
+        print(f"{row['scenario']:<20} {change('p50_ms'):>9} {change('p95_ms'):>9} {change('p99_ms'):>9} "
+              f"{row['sql_per_request'] - before['sql_per_request']:>+7.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", required=True, help="SQLite file or database URL holding generated data")
+    parser.add_argument("--generate", action="store_true", help="(re)generate the dataset first")
+    parser.add_argument("--scale", type=float, default=0.01, help="dataset scale when generating")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--no-catalog-cache", action="store_true", help="disable the catalog response cache")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", help="results JSON of a previous run to diff against")
+    args = parser.parse_args()
+
+    database_url = args.database if "://" in args.database else f"sqlite:///{args.database}"
+    if args.generate:
+        if "://" not in args.database and os.path.exists(args.database):
+            os.remove(args.database)
+        generate(database_url, sizes_for(args.scale))
+
+    results = run(database_url, args.scenario, args.requests, args.warmup,
+                  catalog_cache_enabled=not args.no_catalog_cache)
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "dataset": dataset_summary(database_url),
+        "catalog_cache": not args.no_catalog_cache,
+        "scenarios": results,
+    }
+
+    print(f"{'scenario':<20} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'sql/req':>8} {'db p50':>8}")
+    for row in results:
+        print(f"{row['scenario']:<20} {row['rps']:>8} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+              f"{row['p99_ms']:>9.2f} {row['sql_per_request']:>8} {row['db_ms_p50']:>8.2f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load-test the API with the sync and the async database layer at matched concurrency
+
+Starts one uvicorn server per mode (ASYNC_DB_ENABLED=false/true) on the same
+seeded SQLite file and drives the catalog read paths with the same number of
+concurrent clients, then prints throughput and latency percentiles.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_db [--sweets 2000] [--concurrency 32] [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.models import Sweet
+
+PATHS = [
+    "/api/v1/sweets/?limit=50",
+    "/api/v1/sweets/search?query=sweet&limit=20",
+    "/api/v1/sweets/search?min_price=2&sort_by=price&limit=20",
+]
+
+def seed(database_url, count):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        Sweet(name=f"Sweet {i}", category=f"Category {i % 20}", price=Decimal(1 + i % 9),
+              quantity=100, description=f"Benchmark sweet number {i}")
+        for i in range(count)
+    )
+    db.commit()
+    db.close()
+    engine.dispose()
+
+def start_server(database_url, async_enabled, port):
+    env = dict(os.environ, DATABASE_URL=database_url, ASYNC_DB_ENABLED="true" if async_enabled else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+async def drive(base_url, concurrency, total):
+    """Issue total requests from concurrency workers; return per-request latencies in ms"""
+    latencies = []
+    counter = iter(range(total))
+
+    async def worker(client):
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.get(PATHS[i % len(PATHS)])
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sweets", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_async.db')}"
+    seed(database_url, args.sweets)
+
+    results = []
+    for async_enabled in (False, True):
+        server = start_server(database_url, async_enabled, args.port)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(drive(base_url, args.concurrency, min(200, args.requests)))  # warm up
+            latencies, elapsed = asyncio.run(drive(base_url, args.concurrency, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+        results.append({
+            "mode": "async" if async_enabled else "sync",
+            "concurrency": args.concurrency,
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':>6} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in results:
+        print(f"{row['mode']:>6} {row['concurrency']:>5} {row['rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+if __name__ == "__main__":
+    main()
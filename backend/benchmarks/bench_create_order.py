@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark order creation: SQL statement count and latency against line-item count
+
+Usage (from backend/):
+    python -m benchmarks.bench_create_order [--items 1 10 50 100] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints.orders import create_order
+from app.core.idempotency import IdempotentRequest
+from app.db.database import Base
+from app.models import Sweet, User
+from app.schemas.order import OrderCreate, OrderItemCreate
+
+def run(item_counts, repeat):
+    """Create orders of each size and return per-size statement counts and latencies"""
+    path = os.path.join(tempfile.mkdtemp(), "bench_orders.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    db = Session()
+    user = User(email="bench@example.com", hashed_password="hash")
+    sweets = [
+        Sweet(name=f"Sweet {i}", category="Bench", price=Decimal("1.50"), quantity=10_000_000)
+        for i in range(max(item_counts))
+    ]
+    db.add(user)
+    db.add_all(sweets)
+    db.commit()
+    user_id = user.id
+    sweet_ids = [sweet.id for sweet in sweets]
+    db.close()
+
+    results = []
+    for count in item_counts:
+        order_data = OrderCreate(items=[
+            OrderItemCreate(sweet_id=sweet_id, quantity=1, unit_price=Decimal("1.50"))
+            for sweet_id in sweet_ids[:count]
+        ])
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            db = Session()
+            current_user = db.query(User).filter(User.id == user_id).first()
+            statements.clear()
+            started = time.perf_counter()
+            create_order(order_data, db=db, current_user=current_user, idempotency=IdempotentRequest())
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(statements))
+            db.close()
+        results.append({
+            "items": count,
+            "statements": max(queries),
+            "p50_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+        })
+
+    engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.items, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'items':>6} {'statements':>11} {'p50 ms':>9} {'max ms':>9}")
+    for row in results:
+        print(f"{row['items']:>6} {row['statements']:>11} {row['p50_ms']:>9.2f} {row['max_ms']:>9.2f}")
+
+if __name__ == "__main__":
+    main()
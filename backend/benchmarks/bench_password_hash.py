@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification: logins/sec per core and on the hashing pool at each cost
+
+Usage (from backend/):
+    python -m benchmarks.bench_password_hash [--iterations 100000 300000 600000] [--seconds 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from app.core.auth import AuthService, password_hash_executor
+
+PASSWORD = "benchmark-password"
+
+def single_core(service, hashed, seconds):
+    """Verifications per second on one thread"""
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        service.verify_password(PASSWORD, hashed)
+        done += 1
+    return done / (time.perf_counter() - started)
+
+async def pooled(service, hashed, seconds):
+    """Verifications per second with the request path saturating the hashing pool"""
+    done = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            await service.verify_password_async(PASSWORD, hashed)
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(password_hash_executor._max_workers * 2)))
+    return done / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[100000, 300000, 600000])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for iterations in args.iterations:
+        service = AuthService(iterations=iterations)
+        hashed = service.hash_password(PASSWORD)
+        per_core = single_core(service, hashed, args.seconds)
+        results.append({
+            "iterations": iterations,
+            "ms_per_login": round(1000 / per_core, 1),
+            "logins_per_sec_per_core": round(per_core, 1),
+            "pool_workers": password_hash_executor._max_workers,
+            "logins_per_sec_pool": round(asyncio.run(pooled(service, hashed, args.seconds)), 1),
+        })
+
+    if args.json:
+        print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+        return
+    print(f"{'iterations':>10} {'ms/login':>9} {'login/s/core':>13} {'workers':>8} {'login/s pool':>13}")
+    for row in results:
+        print(f"{row['iterations']:>10} {row['ms_per_login']:>9} {row['logins_per_sec_per_core']:>13} "
+              f"{row['pool_workers']:>8} {row['logins_per_sec_pool']:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark list reads: whole ORM entities against column-projected rows per 10k rows
+
+Fills a scratch SQLite database with sweets (with long descriptions) and
+multi-item orders, then times and measures the peak Python memory of reading
+them the old way (Sweet entities / orders with joinedload of items, sweets and
+users, built into response dicts) and the new way (the list endpoints'
+projected queries).
+
+Usage (from backend/):
+    python -m benchmarks.bench_projection [--rows 10000] [--items 3] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.api.v1.endpoints.orders import list_orders, order_row
+from app.db.database import Base
+from app.models import Order, OrderItem, Sweet, User
+from app.models.order import OrderStatus
+from app.services.sweet_service import SweetService
+
+DESCRIPTION = "Slow-cooked in copper pans with cane sugar, butter and a pinch of sea salt. " * 8
+
+def populate(Session, rows, items):
+    started = datetime(2024, 1, 1)
+    users = [{"id": str(uuid.uuid4()), "email": f"user{i}@example.com", "hashed_password": "x" * 60}
+             for i in range(100)]
+    sweets = [
+        {"id": str(uuid.uuid4()), "name": f"Sweet {i}", "category": f"Category {i % 20}",
+         "price": Decimal("1.50"), "quantity": 100, "image_url": f"https://example.com/{i}.png",
+         "description": DESCRIPTION, "rating_sum": i % 50, "review_count": i % 10,
+         "created_at": started + timedelta(seconds=i), "updated_at": started + timedelta(seconds=i)}
+        for i in range(rows)
+    ]
+    orders, order_items = [], []
+    for i in range(rows):
+        order_id = str(uuid.uuid4())
+        created_at = started + timedelta(seconds=i)
+        orders.append({"id": order_id, "user_id": users[i % len(users)]["id"], "status": OrderStatus.CONFIRMED,
+                       "total_amount": Decimal("4.50") * items, "shipping_address": "1 Candy Lane",
+                       "payment_method": "card", "created_at": created_at, "updated_at": created_at})
+        order_items.extend(
+            {"id": str(uuid.uuid4()), "order_id": order_id, "sweet_id": sweets[(i + n) % rows]["id"],
+             "quantity": 3, "unit_price": Decimal("1.50"), "total_price": Decimal("4.50"), "created_at": created_at}
+            for n in range(items)
+        )
+    with Session() as db:
+        for model, values in ((User, users), (Sweet, sweets), (Order, orders), (OrderItem, order_items)):
+            db.execute(insert(model), values)
+        db.commit()
+
+def sweet_entities(db, rows):
+    return db.query(Sweet).order_by(Sweet.created_at.desc(), Sweet.id.desc()).limit(rows).all()
+
+def sweet_rows(db, rows):
+    return SweetService(db).get_sweets_with_ratings(limit=rows)
+
+def order_entities(db, rows):
+    orders = db.query(Order).options(
+        joinedload(Order.order_items).joinedload(OrderItem.sweet),
+        joinedload(Order.user)
+    ).order_by(Order.created_at.desc(), Order.id.desc()).limit(rows).all()
+    return [order_row(order, order.user.email) for order in orders]
+
+def order_rows(db, rows):
+    return list_orders(db, None, rows)[0]
+
+def measure(Session, read, rows, repeat):
+    """Median ms of read() on a fresh session, then its peak traced MiB in a separate run"""
+    timings = []
+    for _ in range(repeat + 1):
+        with Session() as db:
+            started = time.perf_counter()
+            result = read(db, rows)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert len(result) == rows
+            del result
+    with Session() as db:
+        tracemalloc.start()
+        read(db, rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    # The first run warms up the statement cache
+    return statistics.median(timings[1:]), peak / 2 ** 20
+
+def run(rows, items, repeat):
+    path = os.path.join(tempfile.mkdtemp(), "bench_projection.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    populate(Session, rows, items)
+
+    reads = [
+        ("sweets", "entities", sweet_entities),
+        ("sweets", "projected", sweet_rows),
+        ("orders", "entities", order_entities),
+        ("orders", "projected", order_rows),
+    ]
+    results = []
+    for dataset, path_name, read in reads:
+        ms, mib = measure(Session, read, rows, repeat)
+        results.append({"dataset": dataset, "path": path_name, "ms": round(ms, 1), "peak_mib": round(mib, 1)})
+    engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=3, help="line items per order")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.items, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'dataset':<8} {'path':<10} {'ms':>9} {'peak MiB':>9}")
+    for row in results:
+        print(f"{row['dataset']:<8} {row['path']:<10} {row['ms']:>9.1f} {row['peak_mib']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark list serialization: response models against plain dicts per 1k rows
+
+Builds orders (with items and sweets) and reviews in memory and times turning
+them into the response body the old way (pydantic models, re-validated by
+response_model, then JSON) and the new way (dicts written by
+app.core.responses.dumps, with orjson and with the pydantic_core fallback).
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--rows 1000] [--items 3] [--repeat 20]
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.v1.endpoints.orders import format_order_response, order_row
+from app.api.v1.endpoints.reviews import review_row
+from app.core import responses
+from app.models import Order, OrderItem, Review, Sweet
+from app.models.order import OrderStatus
+from app.schemas.order import OrderResponse
+from app.schemas.review import ReviewResponse
+
+def make_orders(count, items):
+    started = datetime(2024, 1, 1, 12, 0, 0)
+    sweets = [
+        Sweet(id=str(uuid.uuid4()), name=f"Sweet {i}", category="Bench", price=Decimal("1.50"),
+              image_url=f"https://example.com/{i}.png")
+        for i in range(items)
+    ]
+    orders = []
+    for i in range(count):
+        created_at = started + timedelta(seconds=i, microseconds=i)
+        order = Order(id=str(uuid.uuid4()), user_id=str(uuid.uuid4()), total_amount=Decimal("4.50") * items,
+                      status=OrderStatus.CONFIRMED, shipping_address="1 Candy Lane", payment_method="card",
+                      created_at=created_at, updated_at=created_at)
+        order.order_items = [
+            OrderItem(id=str(uuid.uuid4()), order_id=order.id, sweet_id=sweet.id, sweet=sweet, quantity=3,
+                      unit_price=Decimal("1.50"), total_price=Decimal("4.50"), created_at=created_at)
+            for sweet in sweets
+        ]
+        orders.append(order)
+    return orders
+
+def make_reviews(count):
+    started = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        Review(id=str(uuid.uuid4()), user_id=str(uuid.uuid4()), sweet_id=str(uuid.uuid4()), rating=i % 5 + 1,
+               comment="Lovely and chewy, would buy again", created_at=started + timedelta(seconds=i),
+               updated_at=started + timedelta(seconds=i))
+        for i in range(count)
+    ]
+
+def model_path(build, adapter):
+    """Handler returns models; FastAPI re-validates them, then encodes the result"""
+    def serialize(rows):
+        models = adapter.validate_python(build(rows), from_attributes=True)
+        return json.dumps(jsonable_encoder(models), separators=(",", ":")).encode()
+    return serialize
+
+def dict_path(build, use_orjson):
+    def serialize(rows):
+        saved = responses.orjson
+        if not use_orjson:
+            responses.orjson = None
+        try:
+            return responses.dumps(build(rows))
+        finally:
+            responses.orjson = saved
+    return serialize
+
+def old_reviews(reviews):
+    response_reviews = []
+    for review in reviews:
+        review_data = ReviewResponse.model_validate(review)
+        review_data.user_email = "user@example.com"
+        response_reviews.append(review_data)
+    return response_reviews
+
+def timed(serialize, rows, repeat):
+    serialize(rows)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serialize(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def run(rows, items, repeat):
+    """Median ms per 1k rows for each dataset and serialization path"""
+    datasets = {
+        "orders": (make_orders(rows, items), {
+            "response_model": model_path(
+                lambda orders: [format_order_response(order, "user@example.com") for order in orders],
+                TypeAdapter(List[OrderResponse])),
+            "dicts+orjson": dict_path(lambda orders: [order_row(order, "user@example.com") for order in orders], True),
+            "dicts+pydantic_core": dict_path(
+                lambda orders: [order_row(order, "user@example.com") for order in orders], False),
+        }),
+        "reviews": (make_reviews(rows), {
+            "response_model": model_path(old_reviews, TypeAdapter(List[ReviewResponse])),
+            "dicts+orjson": dict_path(lambda reviews: [review_row(r, "user@example.com") for r in reviews], True),
+            "dicts+pydantic_core": dict_path(
+                lambda reviews: [review_row(r, "user@example.com") for r in reviews], False),
+        }),
+    }
+    results = []
+    for dataset, (data, paths) in datasets.items():
+        baseline = None
+        for path, serialize in paths.items():
+            if path == "dicts+orjson" and responses.orjson is None:
+                continue
+            per_1k = timed(serialize, data, repeat) * 1000 / rows
+            baseline = baseline or per_1k
+            results.append({
+                "dataset": dataset,
+                "path": path,
+                "ms_per_1k": round(per_1k, 2),
+                "speedup": round(baseline / per_1k, 1),
+                "bytes": len(serialize(data)),
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=3, help="line items per order")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.items, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'dataset':<9} {'path':<20} {'ms/1k':>8} {'speedup':>8} {'bytes':>9}")
+    for row in results:
+        print(f"{row['dataset']:<9} {row['path']:<20} {row['ms_per_1k']:>8.2f} {row['speedup']:>7}x {row['bytes']:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark checkout throughput on one hot SKU from many threads
+
+Starts --threads threads that each try --attempts single-unit checkouts of the
+same sweet, alternating the order and direct purchase paths, against a
+scratch SQLite file, and reports checkouts per second and how many succeeded.
+Successes must equal the initial stock: the guarded decrement never oversells.
+
+Usage (from backend/):
+    python -m benchmarks.bench_stock_contention [--threads 8] [--attempts 15] [--stock 60]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints.orders import create_order
+from app.core.idempotency import IdempotentRequest
+from app.db.database import Base
+from app.models import Sweet, User
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.sweet_service import SweetService
+
+def purchase(Session, sweet_id, user_id):
+    with Session() as db:
+        SweetService(db).purchase_sweet(sweet_id, user_id, quantity=1)
+
+def order(Session, sweet_id, user_id):
+    with Session() as db:
+        user = db.get(User, user_id)
+        order_data = OrderCreate(items=[OrderItemCreate(sweet_id=sweet_id, quantity=1, unit_price=Decimal("5.00"))])
+        create_order(order_data, db=db, current_user=user, idempotency=IdempotentRequest())
+
+def run(threads, attempts, stock):
+    path = os.path.join(tempfile.mkdtemp(), "bench_stock.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with Session() as db:
+        user = User(email="bench@example.com", hashed_password="hash")
+        sweet = Sweet(name="Limited Edition Fudge", category="Bench", price=Decimal("5.00"), quantity=stock)
+        db.add_all([user, sweet])
+        db.commit()
+        sweet_id, user_id = sweet.id, user.id
+
+    successes = []
+    barrier = threading.Barrier(threads)
+
+    def worker(checkout):
+        barrier.wait()
+        for _ in range(attempts):
+            try:
+                checkout(Session, sweet_id, user_id)
+                successes.append(True)
+            except HTTPException:
+                successes.append(False)
+
+    workers = [threading.Thread(target=worker, args=(purchase if i % 2 else order,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with Session() as db:
+        remaining = db.get(Sweet, sweet_id).quantity
+    engine.dispose()
+    total = threads * attempts
+    return {
+        "checkouts": total,
+        "seconds": round(elapsed, 3),
+        "per_second": round(total / elapsed),
+        "succeeded": sum(successes),
+        "remaining": remaining,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=15, help="checkouts per thread")
+    parser.add_argument("--stock", type=int, default=60)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    result = run(args.threads, args.attempts, args.stock)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['checkouts']} checkouts in {result['seconds']:.2f}s ({result['per_second']}/s), "
+          f"{result['succeeded']} succeeded, {result['remaining']} left")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic sweet shop dataset for benchmarks
+
+Rows are written with chunked Core executemany inserts, so the full default
+size (100k sweets, 1M reviews, 500k orders) loads in a few minutes on SQLite.
+Rating aggregates are computed while generating, so the data is consistent
+without a recompute pass.
+
+Usage (from backend/):
+    python -m benchmarks.datagen --database /tmp/bench.db [--scale 0.01] [--seed 1]
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select
+
+from app.core.auth import AuthService
+from app.db.database import Base, create_db_engine
+from app.models import Order, OrderItem, Review, Sweet, User
+from app.models.order import OrderStatus
+
+DEFAULT_SIZES = {"sweets": 100_000, "users": 20_000, "reviews": 1_000_000, "orders": 500_000}
+CATEGORIES = ["Chocolate", "Candy", "Gummies", "Toffee", "Lollipops", "Fudge", "Marshmallow", "Licorice",
+              "Caramel", "Nougat", "Brittle", "Truffles", "Mints", "Jelly Beans", "Pastries", "Cookies"]
+ADJECTIVES = ["Dark", "Milk", "Sour", "Salted", "Spiced", "Honey", "Vanilla", "Minty", "Fruity", "Crunchy",
+              "Chewy", "Smoky", "Zesty", "Creamy", "Roasted", "Golden"]
+FLAVOURS = ["Raspberry", "Hazelnut", "Lemon", "Cherry", "Coconut", "Almond", "Orange", "Mango", "Pistachio",
+            "Cinnamon", "Strawberry", "Peanut", "Lime", "Ginger", "Blueberry", "Maple"]
+BENCH_PASSWORD = "bench123"
+CHUNK = 10_000
+EPOCH = datetime(2024, 1, 1)
+
+def chunked_insert(conn, table, rows):
+    """Insert an iterable of row dicts in executemany batches; return the count"""
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            conn.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+def sizes_for(scale, **overrides):
+    """Row counts for each table at the given scale, with explicit overrides"""
+    sizes = {name: max(1, int(count * scale)) for name, count in DEFAULT_SIZES.items()}
+    sizes.update({name: count for name, count in overrides.items() if count is not None})
+    return sizes
+
+def generate(database_url, sizes, seed=1, log=print):
+    """Create the schema and fill it with deterministic synthetic data"""
+    rng = random.Random(seed)
+    engine = create_db_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+
+    sweet_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(sizes["sweets"])]
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(sizes["users"])]
+    prices = [Decimal(rng.randrange(50, 2500)) / 100 for _ in sweet_ids]
+
+    # Reviews: distinct sweets per user, aggregated before the sweets are written
+    rating_sum = [0] * len(sweet_ids)
+    review_count = [0] * len(sweet_ids)
+    per_user = max(1, min(len(sweet_ids), -(-sizes["reviews"] // len(user_ids))))
+    reviews = []
+    for user_id in user_ids:
+        if len(reviews) >= sizes["reviews"]:
+            break
+        for index in rng.sample(range(len(sweet_ids)), per_user)[:sizes["reviews"] - len(reviews)]:
+            rating = rng.choices((1, 2, 3, 4, 5), weights=(1, 1, 2, 4, 5))[0]
+            rating_sum[index] += rating
+            review_count[index] += 1
+            reviews.append((user_id, index, rating))
+
+    with engine.begin() as conn:
+        hashed_password = AuthService(iterations=1000).hash_password(BENCH_PASSWORD)
+        chunked_insert(conn, User.__table__, (
+            {"id": user_id, "email": f"user{i}@bench.example", "hashed_password": hashed_password,
+             "is_admin": i == 0, "created_at": EPOCH, "updated_at": EPOCH}
+            for i, user_id in enumerate(user_ids)
+        ))
+        log(f"users: {len(user_ids)}")
+
+        def sweet_rows():
+            for i, sweet_id in enumerate(sweet_ids):
+                created_at = EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+                flavour, adjective = rng.choice(FLAVOURS), rng.choice(ADJECTIVES)
+                yield {
+                    "id": sweet_id, "name": f"{adjective} {flavour} {CATEGORIES[i % len(CATEGORIES)]} {i}",
+                    "category": CATEGORIES[i % len(CATEGORIES)], "price": prices[i],
+                    "quantity": rng.randrange(0, 500), "image_url": None,
+                    "description": f"A {adjective.lower()} treat with {flavour.lower()} notes",
+                    "rating_sum": rating_sum[i], "review_count": review_count[i],
+                    "created_at": created_at, "updated_at": created_at,
+                }
+        chunked_insert(conn, Sweet.__table__, sweet_rows())
+        log(f"sweets: {len(sweet_ids)}")
+
+        chunked_insert(conn, Review.__table__, (
+            {"id": str(uuid.UUID(int=rng.getrandbits(128), version=4)), "user_id": user_id,
+             "sweet_id": sweet_ids[index], "rating": rating, "comment": "Synthetic review",
+             "created_at": EPOCH, "updated_at": EPOCH}
+            for user_id, index, rating in reviews
+        ))
+        log(f"reviews: {len(reviews)}")
+
+        statuses = list(OrderStatus)
+        orders = 0
+        while orders < sizes["orders"]:
+            # Orders before their items, one chunk at a time
+            order_batch, item_batch = [], []
+            for _ in range(min(CHUNK, sizes["orders"] - orders)):
+                order_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+                created_at = EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+                total = Decimal(0)
+                for index in rng.sample(range(len(sweet_ids)), min(len(sweet_ids), rng.randint(1, 5))):
+                    quantity = rng.randint(1, 4)
+                    total += prices[index] * quantity
+                    item_batch.append({
+                        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)), "order_id": order_id,
+                        "sweet_id": sweet_ids[index], "quantity": quantity, "unit_price": prices[index],
+                        "total_price": prices[index] * quantity, "created_at": created_at,
+                    })
+                order_batch.append({
+                    "id": order_id, "user_id": rng.choice(user_ids), "total_amount": total,
+                    "status": rng.choice(statuses).name, "shipping_address": "1 Benchmark Lane",
+                    "payment_method": "card", "notes": None, "created_at": created_at, "updated_at": created_at,
+                })
+            orders += chunked_insert(conn, Order.__table__, order_batch)
+            chunked_insert(conn, OrderItem.__table__, item_batch)
+        log(f"orders: {orders}")
+
+    engine.dispose()
+    log(f"generated in {time.perf_counter() - started:.1f}s")
+
+def dataset_summary(database_url):
+    """Row counts of the generated tables"""
+    engine = create_db_engine(database_url)
+    with engine.connect() as conn:
+        summary = {
+            model.__tablename__: conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+            for model in (User, Sweet, Review, Order, OrderItem)
+        }
+    engine.dispose()
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", required=True, help="SQLite file to create, or a database URL")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the default sizes")
+    for name in DEFAULT_SIZES:
+        parser.add_argument(f"--{name}", type=int, help=f"number of {name} (default {DEFAULT_SIZES[name]} x scale)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    database_url = args.database if "://" in args.database else f"sqlite:///{args.database}"
+    sizes = sizes_for(args.scale, **{name: getattr(args, name) for name in DEFAULT_SIZES})
+    generate(database_url, sizes, seed=args.seed)
+    print(json.dumps(dataset_summary(database_url), indent=2))
+
+if __name__ == "__main__":
+    main()
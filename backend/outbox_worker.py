@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Drain the outbox: run post-commit side effects of orders in batches
+
+Usage (from backend/):
+    python outbox_worker.py [--once] [--batch-size 100] [--poll 1.0] [--worker-id NAME]
+"""
+import argparse
+import logging
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services import outbox_handlers  # noqa: F401  registers the handlers
+from app.services.outbox_service import OutboxService
+
+def run_once(session_factory, worker_id: str, batch_size: int) -> int:
+    """Process every due event, batch by batch, then purge old done ones; return how many were claimed"""
+    db = session_factory()
+    try:
+        total = 0
+        while True:
+            claimed = OutboxService(db).run_batch(worker_id, batch_size)
+            total += claimed
+            if claimed < batch_size:
+                break
+        while OutboxService(db).purge(batch_size) == batch_size:
+            pass
+        return total
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="drain due events and exit")
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    parser.add_argument("--poll", type=float, default=settings.OUTBOX_POLL_SECONDS,
+                        help="seconds to sleep when no event is due")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    if args.once:
+        print(f"Processed {run_once(SessionLocal, args.worker_id, args.batch_size)} outbox events")
+        return
+    print(f"Outbox worker {args.worker_id} polling every {args.poll}s")
+    try:
+        while True:
+            if not run_once(SessionLocal, args.worker_id, args.batch_size):
+                time.sleep(args.poll)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
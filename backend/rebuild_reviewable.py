@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Rebuild the reviewable_sweets table from confirmed and delivered orders and
+the reviews already written
+"""
+from app.db.database import SessionLocal
+from app.services.reviewable_service import ReviewableService
+
+def rebuild_reviewable():
+    """Recompute which sweets each user may review"""
+    db = SessionLocal()
+    
+    try:
+        print("Rebuilding reviewable sweets...")
+        rows = ReviewableService(db).rebuild()
+        print(f"Wrote {rows} user/sweet rows")
+    except Exception as e:
+        print(f"Error rebuilding reviewable sweets: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_reviewable()
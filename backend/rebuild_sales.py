@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily sales rollup from the orders and purchases tables, then the
+smoothed demand per sweet from the rollup
+"""
+from app.db.database import SessionLocal
+from app.services.demand_service import DemandService
+from app.services.sales_service import SalesService
+
+def rebuild_sales():
+    """Recompute units and revenue per sweet and day"""
+    db = SessionLocal()
+    
+    try:
+        print("Rebuilding daily sales rollup...")
+        rows = SalesService(db).rebuild()
+        print(f"Wrote {rows} sweet/day rows")
+        print("Rebuilding smoothed demand...")
+        rows = DemandService(db).rebuild()
+        print(f"Wrote {rows} sweet demand rows")
+    except Exception as e:
+        print(f"Error rebuilding sales rollup: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_sales()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Recompute the denormalized rating aggregates on sweets from the reviews table
+"""
+from app.db.database import SessionLocal
+from app.services.sweet_service import SweetService
+
+def recompute_ratings():
+    """Rebuild rating_sum and review_count for every sweet"""
+    db = SessionLocal()
+    
+    try:
+        print("Recomputing sweet rating aggregates...")
+        updated = SweetService(db).recompute_rating_aggregates()
+        print(f"Updated rating aggregates for {updated} sweets")
+    except Exception as e:
+        print(f"Error recomputing ratings: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    recompute_ratings()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Release expired stock reservations back to available stock in batches
+
+Usage (from backend/):
+    python reservation_sweeper.py [--once] [--batch-size 500] [--interval 30]
+"""
+import argparse
+import time
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services.reservation_service import ReservationService
+
+def sweep(session_factory, batch_size: int) -> int:
+    """Release every expired hold, batch by batch; return how many were released"""
+    db = session_factory()
+    try:
+        total = 0
+        while True:
+            released = ReservationService(db).sweep(batch_size)
+            total += released
+            if released < batch_size:
+                return total
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="sweep once and exit")
+    parser.add_argument("--batch-size", type=int, default=settings.RESERVATION_SWEEP_BATCH_SIZE)
+    parser.add_argument("--interval", type=float, default=settings.RESERVATION_SWEEP_SECONDS,
+                        help="seconds between sweeps")
+    args = parser.parse_args()
+
+    while True:
+        released = sweep(SessionLocal, args.batch_size)
+        if args.once:
+            print(f"Released {released} expired reservations")
+            return
+        if released:
+            print(f"Released {released} expired reservations")
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return
+
+if __name__ == "__main__":
+    main()
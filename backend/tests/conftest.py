@@ -0,0 +1,74 @@
+import os
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Keep password hashing cheap for the suite; production defaults live in Settings
+os.environ.setdefault("PASSWORD_HASH_ITERATIONS", "1000")
+
+@pytest.fixture
+def assert_max_queries():
+    """Fail the test when the wrapped block issues more than limit SQL statements.
+
+        with assert_max_queries(3):
+            client.get("/api/v1/sweets/")
+    """
+    @contextmanager
+    def check(limit):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries, expected at most {limit}:\n" + "\n".join(statements)
+        )
+    return check
+
+# EXPLAIN QUERY PLAN steps that read every row of a table, or index it on the fly
+FULL_SCAN = re.compile(r"SCAN (\w+)(?: LEFT-JOIN)?$")
+AUTOMATIC_INDEX = re.compile(r"SEARCH (\w+) USING AUTOMATIC")
+# Subqueries the plan evaluates first; scanning their few result rows is fine
+SUBQUERY = re.compile(r"(?:CO-ROUTINE|MATERIALIZE) (\w+)$")
+
+@pytest.fixture
+def assert_no_full_scans():
+    """Fail the test when a SELECT in the wrapped block reads a whole table.
+
+    Every SELECT sent through a SQLite engine is re-run afterwards under
+    EXPLAIN QUERY PLAN with its original parameters. Scans of subquery
+    results and of the tables in allow (e.g. single-row ones) are accepted.
+
+        with assert_no_full_scans(allow={"catalog_version"}):
+            client.get("/api/v1/sweets/")
+    """
+    @contextmanager
+    def check(allow=()):
+        selects = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            if conn.dialect.driver == "pysqlite" and not executemany and statement.lstrip().startswith("SELECT"):
+                selects.append((conn.engine, statement, parameters))
+
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            yield selects
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+
+        scans = []
+        for engine, statement, parameters in selects:
+            with engine.connect() as conn:
+                plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            accepted = set(allow) | {match.group(1) for match in map(SUBQUERY.match, plan) if match}
+            for step in plan:
+                match = FULL_SCAN.match(step) or AUTOMATIC_INDEX.match(step)
+                if match and match.group(1) not in accepted:
+                    scans.append(f"{step}\n  in: {' '.join(statement.split())}\n  plan: {plan}")
+        assert not scans, "full table scans:\n" + "\n".join(scans)
+    return check
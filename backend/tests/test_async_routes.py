@@ -0,0 +1,134 @@
+import asyncio
+import inspect
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.async_routes import asyncify_router
+from app.api.v1.endpoints import auth, orders, sweets
+from app.core.dependencies import user_cache
+from app.db.database import Base, async_database_url, get_async_db, get_db
+from app.models.user import User
+
+# Test database setup; the same file is reached through both drivers
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_async.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL))
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+async_app = FastAPI()
+async_app.include_router(auth.router, prefix="/api/v1/auth")
+async_app.include_router(asyncify_router(sweets.router), prefix="/api/v1/sweets")
+async_app.include_router(asyncify_router(orders.router), prefix="/api/v1/orders")
+async_app.dependency_overrides[get_db] = override_get_db
+async_app.dependency_overrides[get_async_db] = override_get_async_db
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(bind=engine)
+    with TestClient(async_app) as c:
+        yield c
+    asyncio.run(async_engine.dispose())
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def admin_headers(client):
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+class TestAsyncDatabaseUrl:
+    def test_sync_drivers_mapped_to_async(self):
+        assert async_database_url("sqlite:///./sweetshop.db") == "sqlite+aiosqlite:///./sweetshop.db"
+        assert async_database_url("postgresql://u:p@db:5432/shop") == "postgresql+asyncpg://u:p@db:5432/shop"
+
+    def test_async_url_left_alone(self):
+        assert async_database_url("postgresql+asyncpg://u:p@db/shop") == "postgresql+asyncpg://u:p@db/shop"
+
+class TestAsyncRoutes:
+    def test_session_routes_are_coroutines(self):
+        """Test that handlers using the DB session are served as async def"""
+        router = asyncify_router(sweets.router)
+        endpoints = {route.name: route.endpoint for route in router.routes}
+
+        assert inspect.iscoroutinefunction(endpoints["get_sweets"])
+        assert inspect.iscoroutinefunction(endpoints["create_sweet"])
+        assert [route.path for route in router.routes] == [route.path for route in sweets.router.routes]
+
+    def test_catalog_and_checkout_on_async_session(self, client, admin_headers):
+        """Test create, list, search and order through the async engine"""
+        sweet_data = {"name": "Async Fudge", "category": "Chocolate", "price": 2.00, "quantity": 5,
+                      "description": "Rich and creamy"}
+        created = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers)
+        assert created.status_code == 201
+        sweet_id = created.json()["id"]
+
+        assert [s["id"] for s in client.get("/api/v1/sweets/").json()] == [sweet_id]
+        assert [s["id"] for s in client.get("/api/v1/sweets/search?query=creamy").json()] == [sweet_id]
+
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 3, "unit_price": 2.00}]}
+        order = client.post("/api/v1/orders/", json=order_data, headers=admin_headers)
+        assert order.status_code == 201
+        assert order.json()["order_items"][0]["sweet_name"] == "Async Fudge"
+
+        too_many = client.post("/api/v1/orders/", json=order_data, headers=admin_headers)
+        assert too_many.status_code == 400
+        assert client.get(f"/api/v1/sweets/{sweet_id}").json()["quantity"] == 2
+
+    def test_failed_idempotent_order_releases_key(self, client, admin_headers):
+        """Test that a failed order with an Idempotency-Key rolls back and frees the key for a retry"""
+        sweet_data = {"name": "Async Toffee", "category": "Toffee", "price": 1.50, "quantity": 2}
+        sweet_id = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 3, "unit_price": 1.50}]}
+        headers = {**admin_headers, "Idempotency-Key": "async-order-1"}
+
+        too_many = client.post("/api/v1/orders/", json=order_data, headers=headers)
+        assert too_many.status_code == 400
+
+        client.post(f"/api/v1/sweets/{sweet_id}/restock?quantity=5", headers=admin_headers)
+        retry = client.post("/api/v1/orders/", json=order_data, headers=headers)
+        assert retry.status_code == 201
+        assert "Idempotent-Replayed" not in retry.headers
+        assert client.get(f"/api/v1/sweets/{sweet_id}").json()["quantity"] == 4
+
+    def test_async_routes_open_no_sync_session(self, client, admin_headers, monkeypatch):
+        """Test that auth and Idempotency-Key handling run on the AsyncSession too"""
+        def no_sync_session():
+            raise AssertionError("sync session opened")
+            yield
+
+        sweet_data = {"name": "Async Nougat", "category": "Nougat", "price": 1.00, "quantity": 5}
+        sweet_id = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+        monkeypatch.setitem(async_app.dependency_overrides, get_db, no_sync_session)
+        user_cache.clear()
+
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 1, "unit_price": 1.00}]}
+        headers = {**admin_headers, "Idempotency-Key": "async-order-2"}
+        first = client.post("/api/v1/orders/", json=order_data, headers=headers)
+        assert first.status_code == 201
+        replayed = client.post("/api/v1/orders/", json=order_data, headers=headers)
+        assert replayed.headers["Idempotent-Replayed"] == "true"
+        assert replayed.json()["id"] == first.json()["id"]
+        assert client.put(f"/api/v1/sweets/{sweet_id}", json={"price": 1.25},
+                          headers=admin_headers).status_code == 200
+
@@ -16,7 +16,34 @@ class TestAuthService:
         
         assert hashed != password
         assert len(hashed) > 0
-        assert len(hashed) == 64  # SHA256 hex length
+        assert hashed.startswith(f"$pbkdf2-sha256${self.auth_service.iterations}$")
+
+    def test_hash_password_salted_per_call(self):
+        """Test that the same password hashes differently each time"""
+        password = "testpassword123"
+
+        assert self.auth_service.hash_password(password) != self.auth_service.hash_password(password)
+
+    def test_verify_legacy_sha256_hash(self):
+        """Test that pre-upgrade SHA256 hashes still verify and need rehashing"""
+        import hashlib
+        legacy = hashlib.sha256(("testpassword123" + "sweet_shop_salt").encode()).hexdigest()
+
+        assert self.auth_service.verify_password("testpassword123", legacy) is True
+        assert self.auth_service.verify_password("wrongpassword", legacy) is False
+        assert self.auth_service.needs_rehash(legacy) is True
+
+    def test_needs_rehash_on_cost_change(self):
+        """Test that a hash made at another cost is flagged for upgrade"""
+        hashed = AuthService(iterations=500).hash_password("testpassword123")
+
+        assert self.auth_service.verify_password("testpassword123", hashed) is True
+        assert self.auth_service.needs_rehash(hashed) is True
+        assert AuthService(iterations=500).needs_rehash(hashed) is False
+
+    def test_verify_malformed_hash(self):
+        """Test that an unparseable hash never verifies"""
+        assert self.auth_service.verify_password("testpassword123", "$pbkdf2-sha256$oops") is False
 
     def test_verify_password_correct(self):
         """Test password verification with correct password"""
@@ -95,4 +122,28 @@ class TestAuthService:
         wrong_token = jwt.encode(data, "wrong-secret", algorithm=settings.ALGORITHM)
         
         with pytest.raises(JWTError):
-            self.auth_service.verify_token(wrong_token)
\ No newline at end of file
+            self.auth_service.verify_token(wrong_token)
+
+    def test_async_hashing_runs_on_dedicated_pool(self):
+        """Test that async hash/verify run off the event loop on the hashing pool"""
+        import asyncio
+        import threading
+        from app.core import auth
+
+        threads = []
+        original = auth.AuthService.hash_password
+
+        def recording_hash(service, password):
+            threads.append(threading.current_thread().name)
+            return original(service, password)
+
+        async def hash_and_verify():
+            hashed = await self.auth_service.hash_password_async("testpassword123")
+            return await self.auth_service.verify_password_async("testpassword123", hashed)
+
+        auth.AuthService.hash_password = recording_hash
+        try:
+            assert asyncio.run(hash_and_verify()) is True
+        finally:
+            auth.AuthService.hash_password = original
+        assert threads and threads[0].startswith("password-hash")
\ No newline at end of file
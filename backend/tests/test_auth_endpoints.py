@@ -19,14 +19,15 @@ def override_get_db():
     finally:
         db.close()
 
-app.dependency_overrides[get_db] = override_get_db
-
 @pytest.fixture
 def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
     Base.metadata.create_all(bind=engine)
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
 
 class TestUserRegistration:
     def test_register_user_success(self, client):
@@ -134,6 +135,24 @@ class TestUserLogin:
         assert "user" in data
         assert data["user"]["email"] == "login@example.com"
 
+    def test_login_upgrades_legacy_hash(self, client):
+        """Test that logging in with a legacy SHA256 hash stores a versioned hash"""
+        import hashlib
+        db = TestingSessionLocal()
+        legacy = hashlib.sha256(("password123" + "sweet_shop_salt").encode()).hexdigest()
+        db.add(User(email="legacy@example.com", hashed_password=legacy))
+        db.commit()
+        db.close()
+
+        login_data = {"email": "legacy@example.com", "password": "password123"}
+        assert client.post("/api/v1/auth/login", json=login_data).status_code == 200
+
+        db = TestingSessionLocal()
+        upgraded = db.query(User).filter(User.email == "legacy@example.com").first().hashed_password
+        db.close()
+        assert upgraded.startswith("$pbkdf2-sha256$")
+        assert client.post("/api/v1/auth/login", json=login_data).status_code == 200
+
     def test_login_user_invalid_email(self, client):
         """Test login with non-existent email"""
         login_data = {
@@ -0,0 +1,171 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.core.catalog_cache import catalog_cache, get_catalog_version
+from app.core.config import settings
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_catalog_cache.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    catalog_cache.clear()
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 50}
+    return client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+
+@pytest.fixture
+def statements():
+    """Record SQL statements issued against the test database"""
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield executed
+    event.remove(engine, "before_cursor_execute", listener)
+
+def catalog_version():
+    db = TestingSessionLocal()
+    try:
+        return get_catalog_version(db)
+    finally:
+        db.close()
+
+CATALOG_PATHS = ["/api/v1/sweets/", "/api/v1/sweets/filters/categories", "/api/v1/sweets/filters/price-range"]
+
+class TestCatalogETags:
+    @pytest.mark.parametrize("path", CATALOG_PATHS)
+    def test_if_none_match_returns_304(self, client, sweet_id, path):
+        """Test strong ETags and empty 304s for unchanged catalog reads"""
+        first = client.get(path)
+        etag = first.headers["ETag"]
+        assert first.status_code == 200
+        assert etag.startswith('"')
+
+        cached = client.get(path, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    def test_sweet_by_id_304_and_404(self, client, sweet_id):
+        """Test conditional reads of one sweet; unknown ids still 404"""
+        etag = client.get(f"/api/v1/sweets/{sweet_id}").headers["ETag"]
+
+        assert client.get(f"/api/v1/sweets/{sweet_id}", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/api/v1/sweets/missing").status_code == 404
+
+    def test_cached_read_only_checks_version(self, client, sweet_id, statements):
+        """Test that a repeat read skips the catalog queries and serialization"""
+        client.get("/api/v1/sweets/")
+        statements.clear()
+
+        response = client.get("/api/v1/sweets/")
+
+        assert response.json()[0]["id"] == sweet_id
+        assert len(statements) == 1
+        assert "catalog_version" in statements[0]
+
+    def test_query_params_cached_separately(self, client, admin_headers, sweet_id):
+        """Test that cache keys include the query string and cursor header"""
+        client.post("/api/v1/sweets/", json={"name": "Toffee", "category": "Hard", "price": 1.00, "quantity": 5},
+                    headers=admin_headers)
+
+        page = client.get("/api/v1/sweets/?limit=1")
+        again = client.get("/api/v1/sweets/?limit=1")
+
+        assert len(page.json()) == 1
+        assert len(client.get("/api/v1/sweets/").json()) == 2
+        assert again.headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+
+class TestCatalogVersionBumps:
+    def test_admin_writes_change_etag(self, client, admin_headers, sweet_id):
+        """Test that create, update, restock and delete invalidate catalog reads"""
+        etag = client.get("/api/v1/sweets/").headers["ETag"]
+
+        writes = [
+            lambda: client.put(f"/api/v1/sweets/{sweet_id}", json={"price": 4.00}, headers=admin_headers),
+            lambda: client.post(f"/api/v1/sweets/{sweet_id}/restock?quantity=5", headers=admin_headers),
+            lambda: client.delete(f"/api/v1/sweets/{sweet_id}", headers=admin_headers),
+        ]
+        for write in writes:
+            version = catalog_version()
+            assert write().status_code == 200
+            assert catalog_version() != version
+            response = client.get("/api/v1/sweets/", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            etag = response.headers["ETag"]
+
+        assert response.json() == []
+
+    def test_stock_changes_keep_version(self, client, admin_headers, sweet_id):
+        """Test that purchases, orders and reservations do not touch the shared version row"""
+        version = catalog_version()
+
+        client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 2}, headers=admin_headers)
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 3, "unit_price": 3.00}]}
+        assert client.post("/api/v1/orders/", json=order_data, headers=admin_headers).status_code == 201
+        reservation = client.post("/api/v1/reservations/", json={"items": [{"sweet_id": sweet_id, "quantity": 1}]},
+                                  headers=admin_headers)
+        assert reservation.status_code == 201
+
+        assert catalog_version() == version
+
+    def test_stock_levels_expire_after_stock_ttl(self, client, admin_headers, sweet_id, monkeypatch):
+        """Test that cached stock levels are refreshed once CATALOG_STOCK_TTL_SECONDS passes"""
+        now = [1000.0]
+        monkeypatch.setattr(catalog_cache, "timer", lambda: now[0])
+        client.get(f"/api/v1/sweets/{sweet_id}")
+        client.get("/api/v1/sweets/filters/categories")
+
+        client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 2}, headers=admin_headers)
+        assert client.get(f"/api/v1/sweets/{sweet_id}").json()["quantity"] == 50
+
+        now[0] += settings.CATALOG_STOCK_TTL_SECONDS
+        assert client.get(f"/api/v1/sweets/{sweet_id}").json()["quantity"] == 48
+        # Reads without stock levels keep the full lifetime
+        hits = catalog_cache.hits
+        client.get("/api/v1/sweets/filters/categories")
+        assert catalog_cache.hits == hits + 1
+
+    def test_failed_checkout_keeps_version(self, client, admin_headers, sweet_id):
+        """Test that a rejected purchase leaves the version alone"""
+        version = catalog_version()
+
+        response = client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 500},
+                               headers=admin_headers)
+
+        assert response.status_code == 400
+        assert catalog_version() == version
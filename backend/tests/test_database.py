@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.database import create_db_engine, engine_options
+
+@pytest.fixture
+def file_engine():
+    """Engine built by the application factory on a throwaway SQLite file"""
+    directory = tempfile.mkdtemp()
+    db_engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'pragmas.db')}")
+    yield db_engine
+    db_engine.dispose()
+
+class TestEngineFactory:
+    def test_pool_settings_applied(self, file_engine):
+        """Test that pool size and overflow come from settings"""
+        assert isinstance(file_engine.pool, QueuePool)
+        assert file_engine.pool.size() == settings.DB_POOL_SIZE
+        assert file_engine.pool._max_overflow == settings.DB_MAX_OVERFLOW
+
+    def test_memory_database_skips_queue_pool_options(self):
+        """Test that in-memory SQLite only gets pre-ping"""
+        assert engine_options("sqlite://") == {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+        assert "pool_size" in engine_options("postgresql://u:p@db/shop")
+
+    def test_sqlite_pragmas_applied_on_connect(self, file_engine):
+        """Test WAL, synchronous, busy_timeout, mmap and cache size on each connection"""
+        with file_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+            assert conn.execute(text("PRAGMA mmap_size")).scalar() == settings.SQLITE_MMAP_SIZE
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == settings.SQLITE_CACHE_SIZE
+
+    def test_open_read_does_not_block_writer(self, file_engine):
+        """Test that a writer commits while another connection is mid-read"""
+        with file_engine.begin() as conn:
+            conn.execute(text("CREATE TABLE stock (id INTEGER PRIMARY KEY, quantity INTEGER)"))
+            conn.execute(text("INSERT INTO stock (quantity) VALUES (10), (20)"))
+
+        with file_engine.connect() as reader:
+            rows = reader.execute(text("SELECT quantity FROM stock ORDER BY id"))
+            assert rows.fetchone()[0] == 10  # statement still open, snapshot held
+
+            with file_engine.begin() as writer:
+                writer.execute(text("UPDATE stock SET quantity = quantity - 1"))
+
+            assert rows.fetchone()[0] == 20  # reader keeps its snapshot
+            rows.close()
+
+        with file_engine.connect() as reader:
+            assert reader.execute(text("SELECT SUM(quantity) FROM stock")).scalar() == 28
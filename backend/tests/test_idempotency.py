@@ -0,0 +1,192 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.config import settings
+from app.core.idempotency import REPLAYED_HEADER, IdempotentRequest, claim
+from app.db.database import Base, get_db
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import Order
+from app.models.purchase import Purchase
+from app.models.sweet import Sweet
+from app.models.user import User
+from app.schemas.purchase import PurchaseCreate
+from app.services.outbox_service import utcnow
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_idempotency.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def user_headers(client):
+    """Create regular user and return auth headers"""
+    user_data = {"email": "user@example.com", "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 10}
+    return client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+
+@pytest.fixture
+def user_id(user_headers):
+    db = TestingSessionLocal()
+    try:
+        return db.query(User.id).filter(User.email == "user@example.com").scalar()
+    finally:
+        db.close()
+
+def order_data(sweet_id, quantity=2):
+    return {"items": [{"sweet_id": sweet_id, "quantity": quantity, "unit_price": 3.00}]}
+
+def counts(sweet_id):
+    db = TestingSessionLocal()
+    try:
+        return db.query(Order).count(), db.query(Purchase).count(), db.get(Sweet, sweet_id).quantity
+    finally:
+        db.close()
+
+class TestIdempotentEndpoints:
+    def test_order_retry_replays_response(self, client, user_headers, sweet_id):
+        """Test that a retried order returns the first response without a second order or decrement"""
+        headers = {**user_headers, "Idempotency-Key": "order-1"}
+        first = client.post("/api/v1/orders/", json=order_data(sweet_id), headers=headers)
+        retry = client.post("/api/v1/orders/", json=order_data(sweet_id), headers=headers)
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers[REPLAYED_HEADER] == "true"
+        assert REPLAYED_HEADER not in first.headers
+        assert counts(sweet_id) == (1, 0, 8)
+
+    def test_purchase_retry_replays_response(self, client, user_headers, sweet_id):
+        headers = {**user_headers, "Idempotency-Key": "purchase-1"}
+        body = {"sweet_id": sweet_id, "quantity": 3}
+        first = client.post(f"/api/v1/sweets/{sweet_id}/purchase", json=body, headers=headers)
+        retry = client.post(f"/api/v1/sweets/{sweet_id}/purchase", json=body, headers=headers)
+
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+        assert counts(sweet_id) == (0, 1, 7)
+
+    def test_without_key_every_request_runs(self, client, user_headers, sweet_id):
+        client.post("/api/v1/orders/", json=order_data(sweet_id), headers=user_headers)
+        client.post("/api/v1/orders/", json=order_data(sweet_id), headers=user_headers)
+        assert counts(sweet_id) == (2, 0, 6)
+
+    def test_key_reused_for_other_request(self, client, user_headers, sweet_id):
+        """Test that a key cannot be replayed against a different body"""
+        headers = {**user_headers, "Idempotency-Key": "order-1"}
+        client.post("/api/v1/orders/", json=order_data(sweet_id), headers=headers)
+        response = client.post("/api/v1/orders/", json=order_data(sweet_id, 3), headers=headers)
+
+        assert response.status_code == 422
+        assert counts(sweet_id) == (1, 0, 8)
+
+    def test_keys_are_per_user(self, client, admin_headers, user_headers, sweet_id):
+        client.post("/api/v1/orders/", json=order_data(sweet_id), headers={**user_headers, "Idempotency-Key": "k"})
+        client.post("/api/v1/orders/", json=order_data(sweet_id), headers={**admin_headers, "Idempotency-Key": "k"})
+        assert counts(sweet_id) == (2, 0, 6)
+
+    def test_failed_request_can_be_retried(self, client, admin_headers, user_headers, sweet_id):
+        """Test that an error releases the key instead of storing the failure"""
+        headers = {**user_headers, "Idempotency-Key": "order-1"}
+        assert client.post("/api/v1/orders/", json=order_data(sweet_id, 20), headers=headers).status_code == 400
+        client.post(f"/api/v1/sweets/{sweet_id}/restock?quantity=10", headers=admin_headers)
+
+        assert client.post("/api/v1/orders/", json=order_data(sweet_id, 20), headers=headers).status_code == 201
+        assert counts(sweet_id) == (1, 0, 0)
+
+    def test_expired_key_runs_again(self, client, user_headers, sweet_id):
+        headers = {**user_headers, "Idempotency-Key": "order-1"}
+        client.post("/api/v1/orders/", json=order_data(sweet_id), headers=headers)
+        db = TestingSessionLocal()
+        db.query(IdempotencyKey).update({IdempotencyKey.expires_at: utcnow() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+        response = client.post("/api/v1/orders/", json=order_data(sweet_id), headers=headers)
+        assert REPLAYED_HEADER not in response.headers
+        assert counts(sweet_id) == (2, 0, 6)
+
+class TestCoalescing:
+    def test_duplicate_waits_for_first_response(self, client, user_id):
+        """Test that a concurrent duplicate blocks until the first request commits, then replays it"""
+        assert claim(engine, user_id, "k", "hash") is None
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(claim(engine, user_id, "k", "hash")))
+        waiter.start()
+
+        db = TestingSessionLocal()
+        IdempotentRequest(user_id, "k").complete(db, 201, PurchaseCreate(sweet_id="s", quantity=1))
+        db.commit()
+        db.close()
+        waiter.join(timeout=5)
+
+        [replay] = results
+        assert replay.status_code == 201
+        assert replay.body == b'{"sweet_id":"s","quantity":1}'
+
+    def test_gives_up_while_first_is_running(self, client, user_id, monkeypatch):
+        monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+        claim(engine, user_id, "k", "hash")
+
+        with pytest.raises(HTTPException) as error:
+            claim(engine, user_id, "k", "hash")
+        assert error.value.status_code == 409
+
+    def test_takes_over_lapsed_lock(self, client, user_id):
+        """Test that a key whose holder died without finishing is run again"""
+        claim(engine, user_id, "k", "hash")
+        db = TestingSessionLocal()
+        db.query(IdempotencyKey).update({IdempotencyKey.locked_until: utcnow() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+        assert claim(engine, user_id, "k", "hash") is None
+
+    def test_expired_keys_are_purged(self, client, user_id, monkeypatch):
+        monkeypatch.setattr(settings, "IDEMPOTENCY_TTL_SECONDS", -1)
+        for key in ("a", "b", "c"):
+            claim(engine, user_id, key, "hash")
+
+        db = TestingSessionLocal()
+        assert [row.key for row in db.query(IdempotencyKey)] == ["c"]
+        db.close()
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, create_db_engine, get_db
+from app.core import metrics
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_metrics.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 2}
+    return client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+
+def sample(body, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in body.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+class TestRegistry:
+    def test_per_thread_counters_sum_on_scrape(self):
+        """Test that increments from many threads are all counted"""
+        counter = metrics.Counter("test_events_total", "Test events", ("kind",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(kind="a")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.value(kind="a") == 8000
+        assert 'test_events_total{kind="a"} 8000' in counter.render()
+
+    def test_exited_threads_are_folded_into_retired_totals(self):
+        """Test that cells of finished threads are dropped without losing their counts"""
+        counter = metrics.Counter("test_churn_total", "Test churn")
+        histogram = metrics.Histogram("test_churn_seconds", "Test churn latency", buckets=(1.0,))
+
+        def work():
+            counter.inc()
+            histogram.observe(0.5)
+
+        for _ in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+
+        assert counter.value() == 50
+        assert histogram.count() == 50
+        assert counter._values._cells == []
+        assert histogram._values._cells == []
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test bucket placement, cumulative counts, sum and count"""
+        histogram = metrics.Histogram("test_seconds", "Test latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        body = histogram.render()
+        assert 'test_seconds_bucket{le="0.1"} 2' in body
+        assert 'test_seconds_bucket{le="1"} 3' in body
+        assert 'test_seconds_bucket{le="+Inf"} 4' in body
+        assert "test_seconds_sum 3.65" in body
+        assert "test_seconds_count 4" in body
+
+    def test_gauge_goes_down(self):
+        """Test gauge increments and decrements"""
+        gauge = metrics.Gauge("test_in_flight", "Test gauge")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        assert "test_in_flight 1" in gauge.render()
+
+class TestMetricsEndpoint:
+    def test_route_latency_recorded_by_template(self, client, sweet_id):
+        """Test that latency is labelled with the route template, not the raw path"""
+        client.get(f"/api/v1/sweets/{sweet_id}")
+        body = client.get("/metrics").text
+
+        assert sample(body, 'http_request_duration_seconds_count{method="GET",route="/api/v1/sweets/{sweet_id}",'
+                            'status="200"}') >= 1
+        assert sample(body, "http_requests_in_flight ") == 1  # the scrape itself
+
+    def test_checkout_counters(self, client, admin_headers, sweet_id):
+        """Test purchase, order and stock-out counters"""
+        before = client.get("/metrics").text
+
+        client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 1},
+                    headers=admin_headers)
+        client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 5},
+                    headers=admin_headers)
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 1, "unit_price": 3.00}]}
+        client.post("/api/v1/orders/", json=order_data, headers=admin_headers)
+        client.post("/api/v1/orders/", json=order_data, headers=admin_headers)
+        after = client.get("/metrics").text
+
+        delta = lambda prefix: (sample(after, prefix) or 0) - (sample(before, prefix) or 0)
+        assert delta("sweet_purchases_total ") == 1
+        assert delta("orders_created_total ") == 1
+        assert delta('stock_out_rejections_total{path="purchase"}') == 1
+        assert delta('stock_out_rejections_total{path="order"}') == 1
+
+    def test_cache_stats_exposed(self, client, sweet_id):
+        """Test cache hit ratios for the catalog and user caches"""
+        client.get("/api/v1/sweets/")
+        client.get("/api/v1/sweets/")
+        body = client.get("/metrics").text
+
+        assert 0 < sample(body, 'cache_hit_ratio{cache="catalog"}') <= 1
+        assert sample(body, 'cache_hit_ratio{cache="user"}') is not None
+
+class TestPoolMetrics:
+    def test_checkout_wait_recorded(self):
+        """Test that checkouts from the application pool class are timed"""
+        db_engine = create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pool.db')}")
+        metrics.register_pool("test", db_engine.pool)
+        before = metrics.db_pool_checkout_wait.count(pool="sync")
+
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            body = metrics.registry.render()
+
+        assert metrics.db_pool_checkout_wait.count(pool="sync") == before + 1
+        assert 'db_pool_connections{pool="test",state="checked_out"} 1' in body
+        db_engine.dispose()
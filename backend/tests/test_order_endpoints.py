@@ -0,0 +1,298 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.models.order import Order
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_orders.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(
+        email="admin@example.com",
+        hashed_password=auth_service.hash_password("admin123"),
+        is_admin=True
+    ))
+    db.commit()
+    db.close()
+
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def user_headers(client):
+    """Create regular user and return auth headers"""
+    user_data = {"email": "user@example.com", "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 100}
+    response = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers)
+    return response.json()["id"]
+
+def place_order(client, headers, sweet_id, quantity=1):
+    order_data = {"items": [{"sweet_id": sweet_id, "quantity": quantity, "unit_price": 3.00}]}
+    return client.post("/api/v1/orders/", json=order_data, headers=headers)
+
+class TestOrderPagination:
+    def test_my_orders_cursor_walk(self, client, user_headers, sweet_id):
+        """Test that following cursors returns each order once, newest first"""
+        created = [place_order(client, user_headers, sweet_id).json()["id"] for _ in range(5)]
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/v1/orders/my-orders", params=params, headers=user_headers)
+            assert response.status_code == 200
+            seen.extend(order["id"] for order in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert sorted(seen) == sorted(created)
+        assert len(seen) == len(set(seen))
+
+    def test_admin_orders_are_limited(self, client, admin_headers, user_headers, sweet_id):
+        """Test that the admin listing returns a bounded page with a cursor"""
+        for _ in range(3):
+            place_order(client, user_headers, sweet_id)
+
+        response = client.get("/api/v1/orders/?limit=2", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert "X-Next-Cursor" in response.headers
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_listing_matches_order_response(self, client, user_headers, sweet_id, monkeypatch, use_orjson):
+        """Test that rows serialized without the response model match what the model returns"""
+        from app.core import responses
+        if not use_orjson:
+            monkeypatch.setattr(responses, "orjson", None)
+        order_id = place_order(client, user_headers, sweet_id, quantity=2).json()["id"]
+
+        listed = client.get("/api/v1/orders/my-orders", headers=user_headers)
+        single = client.get(f"/api/v1/orders/{order_id}", headers=user_headers)
+
+        assert listed.headers["content-type"] == "application/json"
+        assert listed.json() == [single.json()]
+        assert listed.json()[0]["total_amount"] == "6.00"
+
+    def test_admin_listing_is_a_single_order_query(self, client, admin_headers, user_headers, sweet_id,
+                                                   assert_max_queries):
+        """Test that a page of multi-item orders is read with one projected query"""
+        other = client.post(
+            "/api/v1/sweets/",
+            json={"name": "Toffee", "category": "Caramel", "price": 1.25, "quantity": 10},
+            headers=admin_headers
+        ).json()["id"]
+        order_data = {"items": [
+            {"sweet_id": sweet_id, "quantity": 2, "unit_price": 3.00},
+            {"sweet_id": other, "quantity": 1, "unit_price": 1.25},
+        ]}
+        ids = [client.post("/api/v1/orders/", json=order_data, headers=user_headers).json()["id"] for _ in range(3)]
+
+        with assert_max_queries(2) as statements:
+            response = client.get("/api/v1/orders/?limit=2", headers=admin_headers)
+
+        assert sum("FROM orders" in statement for statement in statements) == 1
+        orders = response.json()
+        assert len(orders) == 2 and {order["id"] for order in orders} <= set(ids)
+        for order in orders:
+            single = client.get(f"/api/v1/orders/{order['id']}", headers=admin_headers).json()
+            assert sorted(order.pop("order_items"), key=lambda item: item["id"]) == \
+                sorted(single.pop("order_items"), key=lambda item: item["id"])
+            assert order == single
+
+class TestCreateOrder:
+    def test_multi_item_order_response(self, client, admin_headers, user_headers, sweet_id):
+        """Test that a multi-line order is priced, stocked and returned in full"""
+        other = client.post(
+            "/api/v1/sweets/",
+            json={"name": "Toffee", "category": "Caramel", "price": 1.25, "quantity": 10},
+            headers=admin_headers
+        ).json()
+        order_data = {"items": [
+            {"sweet_id": sweet_id, "quantity": 2, "unit_price": 3.00},
+            {"sweet_id": other["id"], "quantity": 4, "unit_price": 1.25},
+        ]}
+
+        response = client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert float(data["total_amount"]) == 11.00
+        assert data["user_email"] == "user@example.com"
+        assert data["created_at"] is not None
+        assert {item["sweet_name"] for item in data["order_items"]} == {"Fudge", "Toffee"}
+        assert all(item["created_at"] is not None for item in data["order_items"])
+        assert client.get(f"/api/v1/sweets/{other['id']}").json()["quantity"] == 6
+
+    def test_unknown_sweet_not_found(self, client, user_headers, sweet_id):
+        """Test that an order naming a missing sweet is rejected"""
+        order_data = {"items": [
+            {"sweet_id": sweet_id, "quantity": 1, "unit_price": 3.00},
+            {"sweet_id": "missing", "quantity": 1, "unit_price": 3.00},
+        ]}
+
+        response = client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+
+        assert response.status_code == 404
+        assert client.get(f"/api/v1/sweets/{sweet_id}").json()["quantity"] == 100
+
+def set_created_at(order_id, created_at):
+    db = TestingSessionLocal()
+    db.query(Order).filter(Order.id == order_id).update({Order.created_at: created_at})
+    db.commit()
+    db.close()
+
+class TestOrderExport:
+    def test_ndjson_has_one_line_per_order(self, client, admin_headers, user_headers, sweet_id):
+        """Test that NDJSON lines are whole orders with their items, oldest first"""
+        first = place_order(client, user_headers, sweet_id, quantity=2).json()["id"]
+        second = place_order(client, user_headers, sweet_id).json()["id"]
+        set_created_at(first, datetime(2024, 1, 1))
+        set_created_at(second, datetime(2024, 2, 1))
+
+        response = client.get("/api/v1/orders/export", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        orders = [json.loads(line) for line in response.text.splitlines()]
+        assert [order["order_id"] for order in orders] == [first, second]
+        assert orders[0]["status"] == "pending"
+        assert orders[0]["user_email"] == "user@example.com"
+        assert orders[0]["items"] == [{
+            "item_id": orders[0]["items"][0]["item_id"], "sweet_id": sweet_id, "sweet_name": "Fudge",
+            "quantity": 2, "unit_price": "3.00", "total_price": "6.00",
+        }]
+
+    def test_csv_has_one_row_per_item(self, client, admin_headers, user_headers, sweet_id):
+        """Test that CSV rows repeat the order columns for each item"""
+        other = client.post(
+            "/api/v1/sweets/",
+            json={"name": "Toffee", "category": "Caramel", "price": 1.25, "quantity": 10},
+            headers=admin_headers
+        ).json()["id"]
+        order_data = {"items": [
+            {"sweet_id": sweet_id, "quantity": 1, "unit_price": 3.00},
+            {"sweet_id": other, "quantity": 2, "unit_price": 1.25},
+        ]}
+        order_id = client.post("/api/v1/orders/", json=order_data, headers=user_headers).json()["id"]
+
+        response = client.get("/api/v1/orders/export?format=csv", headers=admin_headers)
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert {row["order_id"] for row in rows} == {order_id}
+        assert sorted(row["sweet_name"] for row in rows) == ["Fudge", "Toffee"]
+        assert {row["total_amount"] for row in rows} == {"5.50"}
+
+    def test_date_and_status_filters(self, client, admin_headers, user_headers, sweet_id):
+        """Test that start is inclusive, end exclusive and status exact"""
+        ids = [place_order(client, user_headers, sweet_id).json()["id"] for _ in range(3)]
+        for month, order_id in enumerate(ids, start=1):
+            set_created_at(order_id, datetime(2024, month, 1))
+        client.put(f"/api/v1/orders/{ids[1]}", json={"status": "shipped"}, headers=admin_headers)
+
+        exported = lambda query: [
+            json.loads(line)["order_id"]
+            for line in client.get(f"/api/v1/orders/export?{query}", headers=admin_headers).text.splitlines()
+        ]
+        assert exported("start=2024-02-01T00:00:00") == ids[1:]
+        assert exported("end=2024-02-01T00:00:00") == ids[:1]
+        assert exported("status=shipped") == [ids[1]]
+        assert exported("status=pending&start=2024-02-01T00:00:00") == [ids[2]]
+
+    def test_time_bounds_match_stored_timestamps(self, client, admin_headers, user_headers, sweet_id):
+        """Test that a server-default timestamp equal to start is kept and offsets are converted to UTC"""
+        order_id = place_order(client, user_headers, sweet_id).json()["id"]
+        db = TestingSessionLocal()
+        # Same text form as a CURRENT_TIMESTAMP default: no microseconds
+        db.execute(text("UPDATE orders SET created_at = '2024-02-01 00:00:00' WHERE id = :id"), {"id": order_id})
+        db.commit()
+        db.close()
+
+        exported = lambda **params: [
+            json.loads(line)["order_id"]
+            for line in client.get("/api/v1/orders/export", params=params, headers=admin_headers).text.splitlines()
+        ]
+        assert exported(start="2024-02-01T00:00:00") == [order_id]
+        assert exported(start="2024-02-01T00:00:00.000000") == [order_id]
+        assert exported(end="2024-02-01T00:00:00") == []
+        assert exported(start="2024-02-01T05:30:00+05:30") == [order_id]
+        assert exported(start="2024-02-01T05:30:01+05:30") == []
+        assert exported(end="2024-02-01T05:30:01+05:30") == [order_id]
+
+    def test_time_bounds_keep_fractional_seconds(self, client, admin_headers, user_headers, sweet_id):
+        """Test that bounds inside a second are not truncated, against both stored timestamp forms"""
+        whole_second = place_order(client, user_headers, sweet_id).json()["id"]
+        fractional = place_order(client, user_headers, sweet_id).json()["id"]
+        db = TestingSessionLocal()
+        db.execute(text("UPDATE orders SET created_at = '2024-02-01 00:00:00' WHERE id = :id"), {"id": whole_second})
+        # Same text form as a datetime written from Python
+        db.execute(text("UPDATE orders SET created_at = '2024-02-01 00:00:00.500000' WHERE id = :id"),
+                   {"id": fractional})
+        db.commit()
+        db.close()
+
+        exported = lambda **params: [
+            json.loads(line)["order_id"]
+            for line in client.get("/api/v1/orders/export", params=params, headers=admin_headers).text.splitlines()
+        ]
+        assert exported(start="2024-02-01T00:00:00.250") == [fractional]
+        assert exported(start="2024-02-01T00:00:00.500") == [fractional]
+        assert exported(start="2024-02-01T00:00:00.900") == []
+        assert exported(end="2024-02-01T00:00:00.500") == [whole_second]
+        assert exported(end="2024-02-01T00:00:00.900") == [whole_second, fractional]
+        assert exported(start="2024-02-01T00:00:00", end="2024-02-01T00:00:01") == [whole_second, fractional]
+
+    def test_export_is_a_single_query(self, client, admin_headers, user_headers, sweet_id, assert_max_queries):
+        """Test that items, sweets and users are joined rather than loaded per order"""
+        for _ in range(10):
+            place_order(client, user_headers, sweet_id)
+
+        with assert_max_queries(3) as statements:
+            response = client.get("/api/v1/orders/export", headers=admin_headers)
+
+        assert len(response.text.splitlines()) == 10
+        assert sum("FROM orders" in statement for statement in statements) == 1
+
+    def test_export_requires_admin(self, client, user_headers):
+        response = client.get("/api/v1/orders/export", headers=user_headers)
+        assert response.status_code == 403
@@ -0,0 +1,281 @@
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.config import settings
+from app.db.database import Base, get_db
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.models.user import User
+from app.services import outbox_handlers  # noqa: F401
+from app.services.outbox_service import OUTBOX_HANDLERS, OutboxService, retry_delay, utcnow
+from outbox_worker import run_once
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_outbox.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def db(client):
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def user_headers(client):
+    """Create regular user and return auth headers"""
+    user_data = {"email": "user@example.com", "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 5}
+    return client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record the payloads a 'test.event' handler receives"""
+    received = []
+    monkeypatch.setitem(OUTBOX_HANDLERS, "test.event", lambda db, payload, event: received.append(payload))
+    return received
+
+def enqueue(db, count, event_type="test.event"):
+    for n in range(count):
+        OutboxService(db).enqueue(event_type, {"n": n}, aggregate_id=str(n))
+    db.commit()
+
+def events(db, **filters):
+    db.expire_all()
+    return db.query(OutboxEvent).filter_by(**filters).all()
+
+class TestOrderEvents:
+    def test_order_enqueues_event_in_same_transaction(self, client, db, user_headers, sweet_id):
+        """Test that a new order leaves exactly one order.created event"""
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 2, "unit_price": 3.00}]}
+        order = client.post("/api/v1/orders/", json=order_data, headers=user_headers).json()
+
+        [event] = events(db)
+        assert event.event_type == "order.created"
+        assert event.aggregate_id == order["id"]
+        assert event.idempotency_key == f"order.created:{order['id']}"
+        assert event.status == OutboxStatus.PENDING
+        payload = json.loads(event.payload)
+        assert payload["order_id"] == order["id"]
+        assert payload["items"] == [{"sweet_id": sweet_id, "quantity": 2, "unit_price": "3.00"}]
+
+    def test_rejected_order_enqueues_nothing(self, client, db, user_headers, sweet_id):
+        """Test that a checkout rolled back for stock leaves no event behind"""
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 50, "unit_price": 3.00}]}
+        response = client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+
+        assert response.status_code == 400
+        assert events(db) == []
+
+    def test_worker_sends_confirmation(self, client, db, user_headers, sweet_id, caplog):
+        """Test that the worker runs order.created and marks it done"""
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 1, "unit_price": 3.00}]}
+        client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+
+        with caplog.at_level("INFO"):
+            assert run_once(TestingSessionLocal, "worker-1", 10) == 1
+        assert "Order confirmation for user@example.com" in caplog.text
+        [event] = events(db)
+        assert event.status == OutboxStatus.DONE
+        assert event.processed_at is not None
+        assert event.locked_by is None
+
+class TestOutboxWorker:
+    def test_drains_in_batches(self, db, calls):
+        """Test that run_once keeps claiming batches until nothing is due"""
+        enqueue(db, 5)
+
+        assert run_once(TestingSessionLocal, "worker-1", 2) == 5
+        assert sorted(payload["n"] for payload in calls) == [0, 1, 2, 3, 4]
+        assert len(events(db, status=OutboxStatus.DONE)) == 5
+        assert run_once(TestingSessionLocal, "worker-1", 2) == 0
+
+    def test_duplicate_idempotency_key_is_rejected(self, db):
+        """Test that enqueuing the same event twice fails"""
+        OutboxService(db).enqueue("test.event", {}, aggregate_id="1")
+        OutboxService(db).enqueue("test.event", {}, aggregate_id="1")
+        with pytest.raises(IntegrityError):
+            db.commit()
+
+    def test_leased_events_are_not_claimed_twice(self, db, calls):
+        """Test that a second worker skips events leased to the first until the lease expires"""
+        enqueue(db, 3)
+        assert len(OutboxService(db).claim("worker-1", 10)) == 3
+        assert OutboxService(db).claim("worker-2", 10) == []
+
+        for event in events(db):
+            event.locked_until = utcnow() - timedelta(seconds=1)
+        db.commit()
+        assert len(OutboxService(db).claim("worker-2", 10)) == 3
+
+    def test_lost_lease_does_not_record_outcome(self, db, monkeypatch):
+        """Test that a worker whose lease was taken over cannot mark the event done or failed"""
+        def slow(db, payload, event):
+            # The lease lapses and another worker re-claims the event while this handler runs
+            with TestingSessionLocal() as other:
+                other.execute(update(OutboxEvent).where(OutboxEvent.id == event.id)
+                              .values(locked_until=utcnow() - timedelta(seconds=1)))
+                other.commit()
+                assert len(OutboxService(other).claim("worker-2", 10)) == 1
+            db.add(User(email=f"side-effect{payload['n']}@example.com", hashed_password="x"))
+            db.flush()
+            if payload["n"]:
+                raise RuntimeError("smtp down")
+
+        monkeypatch.setitem(OUTBOX_HANDLERS, "test.event", slow)
+        enqueue(db, 2)
+        claimed = OutboxService(db).claim("worker-1", 10)
+
+        assert [OutboxService(db).process(event) for event in claimed] == [False, False]
+        for event in events(db):
+            assert (event.status, event.locked_by, event.attempts, event.last_error) == \
+                (OutboxStatus.PENDING, "worker-2", 0, None)
+        assert db.query(User).count() == 0
+
+    def test_purges_old_done_events(self, db, calls, monkeypatch):
+        """Test that the worker deletes done events past retention and keeps failed ones"""
+        monkeypatch.setattr(settings, "OUTBOX_RETENTION_SECONDS", 60)
+        enqueue(db, 3)
+        enqueue(db, 1, event_type="unknown.event")
+        monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 1)
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 4
+        assert len(events(db, status=OutboxStatus.DONE)) == 3
+
+        db.execute(update(OutboxEvent).values(processed_at=utcnow() - timedelta(seconds=61)))
+        db.commit()
+        assert OutboxService(db).purge(2) == 2
+        run_once(TestingSessionLocal, "worker-1", 10)
+        assert [event.status for event in events(db)] == [OutboxStatus.FAILED]
+
+    def test_failure_is_retried_with_backoff(self, db, monkeypatch):
+        """Test that a failing handler is rolled back and rescheduled"""
+        attempts = []
+
+        def flaky(db, payload, event):
+            attempts.append(event.attempts)
+            db.add(User(email="side-effect@example.com", hashed_password="x"))
+            db.flush()
+            if len(attempts) == 1:
+                raise RuntimeError("smtp down")
+
+        monkeypatch.setitem(OUTBOX_HANDLERS, "test.event", flaky)
+        enqueue(db, 1)
+        before = utcnow()
+
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 1
+        [event] = events(db)
+        assert event.status == OutboxStatus.PENDING
+        assert event.attempts == 1
+        assert event.last_error == "RuntimeError: smtp down"
+        assert event.available_at >= before + retry_delay(1)
+        assert db.query(User).count() == 0
+        # Not due yet
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 0
+
+        event.available_at = utcnow()
+        db.commit()
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 1
+        assert events(db)[0].status == OutboxStatus.DONE
+        assert db.query(User).count() == 1
+
+    def test_gives_up_after_max_attempts(self, db, monkeypatch):
+        """Test that an event stops being retried once it has failed OUTBOX_MAX_ATTEMPTS times"""
+        monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+        monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 0)
+        enqueue(db, 1, event_type="unknown.event")
+
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 1
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 1
+        [event] = events(db)
+        assert event.status == OutboxStatus.FAILED
+        assert event.attempts == 2
+        assert "No outbox handler" in event.last_error
+        assert run_once(TestingSessionLocal, "worker-1", 10) == 0
+
+    def test_backoff_is_capped(self, monkeypatch):
+        """Test that the retry delay doubles per attempt up to OUTBOX_RETRY_MAX_SECONDS"""
+        monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 2)
+        monkeypatch.setattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 60)
+        assert [retry_delay(n).total_seconds() for n in (1, 2, 3, 10)] == [2, 4, 8, 60]
+
+class TestLowStockEvents:
+    @pytest.fixture
+    def sweet_id(self, client, admin_headers):
+        sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 10, "reorder_threshold": 5}
+        return client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+
+    def low_stock(self, db):
+        return [json.loads(event.payload) for event in events(db, event_type="stock.low")]
+
+    def test_crossing_threshold_enqueues_once(self, client, db, user_headers, sweet_id):
+        """Test that only the sale taking stock to the threshold raises an event"""
+        order_data = {"items": [{"sweet_id": sweet_id, "quantity": 4, "unit_price": 3.00}]}
+        client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+        assert self.low_stock(db) == []
+
+        client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+        client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 1},
+                    headers=user_headers)
+        assert self.low_stock(db) == [{"sweet_id": sweet_id, "quantity": 2, "reorder_threshold": 5}]
+
+    def test_purchase_after_restock_alerts_again(self, client, db, admin_headers, user_headers, sweet_id, caplog):
+        """Test the single-sweet purchase path and that a restock re-arms the alert"""
+        purchase = lambda quantity: client.post(f"/api/v1/sweets/{sweet_id}/purchase",
+                                                json={"sweet_id": sweet_id, "quantity": quantity},
+                                                headers=user_headers)
+        purchase(6)
+        client.post(f"/api/v1/sweets/{sweet_id}/restock?quantity=10", headers=admin_headers)
+        purchase(10)
+
+        assert [payload["quantity"] for payload in self.low_stock(db)] == [4, 4]
+        with caplog.at_level("WARNING"):
+            run_once(TestingSessionLocal, "worker-1", 10)
+        assert "Low stock: Fudge" in caplog.text
+
+    def test_no_threshold_no_event(self, client, db, admin_headers, user_headers):
+        sweet_data = {"name": "Toffee", "category": "Caramel", "price": 1.00, "quantity": 3}
+        toffee = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+        order_data = {"items": [{"sweet_id": toffee, "quantity": 3, "unit_price": 1.00}]}
+        client.post("/api/v1/orders/", json=order_data, headers=user_headers)
+
+        assert self.low_stock(db) == []
@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.core.catalog_cache import catalog_cache
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_query_plans.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+# The single-row catalog version, and the schema lookup made before a full-text search
+ALLOWED_SCANS = {"catalog_version", "sqlite_master"}
+
+@pytest.fixture(scope="module")
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture(scope="module")
+def shop(client):
+    """An admin, a buyer with delivered orders and a review, sweets and contact forms"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    login = lambda data: {
+        "Authorization": "Bearer " + client.post("/api/v1/auth/login", json=data).json()["access_token"]
+    }
+    admin = login({"email": "admin@example.com", "password": "admin123"})
+    user_data = {"email": "user@example.com", "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    user = login(user_data)
+
+    sweet_ids = [
+        client.post("/api/v1/sweets/", json={"name": f"Fudge {i}", "category": "Chocolate", "price": 1 + i,
+                                              "quantity": 100, "description": "Rich and creamy"},
+                    headers=admin).json()["id"]
+        for i in range(3)
+    ]
+    for sweet_id in sweet_ids[:2]:
+        order = client.post("/api/v1/orders/", json={"items": [{"sweet_id": sweet_id, "quantity": 1, "unit_price": 1}]},
+                            headers=user).json()
+        client.put(f"/api/v1/orders/{order['id']}", json={"status": "delivered"}, headers=admin)
+    client.post("/api/v1/reviews/", json={"sweet_id": sweet_ids[0], "rating": 5}, headers=user)
+    client.post("/api/v1/contact/", json={"name": "Ann", "email": "ann@example.com", "message": "Bulk order?"})
+    return {"admin": admin, "user": user, "sweet_id": sweet_ids[0], "unreviewed_id": sweet_ids[2]}
+
+# (name, method, path, role) of the hot read paths
+HOT_QUERIES = [
+    ("catalog_list", "GET", "/api/v1/sweets/?limit=20", None),
+    ("catalog_detail", "GET", "/api/v1/sweets/{sweet_id}", None),
+    ("categories", "GET", "/api/v1/sweets/filters/categories", None),
+    ("price_range", "GET", "/api/v1/sweets/filters/price-range", None),
+    ("search_text", "GET", "/api/v1/sweets/search?query=creamy", None),
+    ("search_category_price", "GET", "/api/v1/sweets/search?category=Chocolate&min_price=1&sort_by=price", None),
+    ("search_newest", "GET", "/api/v1/sweets/search?sort_by=created_at&sort_order=desc", None),
+    ("search_in_stock", "GET", "/api/v1/sweets/search?sort_by=quantity", None),
+    ("search_top_rated", "GET", "/api/v1/sweets/search?min_rating=4&sort_by=rating&sort_order=desc", None),
+    ("faceted_search", "GET", "/api/v1/sweets/search/faceted?category=Chocolate&limit=20", None),
+    ("reviews_for_sweet", "GET", "/api/v1/reviews/sweet/{sweet_id}", None),
+    ("my_reviews", "GET", "/api/v1/reviews/user/me", "user"),
+    ("purchasable_items", "GET", "/api/v1/reviews/purchasable-items", "user"),
+    ("my_orders", "GET", "/api/v1/orders/my-orders", "user"),
+    ("admin_orders", "GET", "/api/v1/orders/", "admin"),
+    ("unprocessed_contacts", "GET", "/api/v1/contact/unprocessed", "admin"),
+    ("top_sellers", "GET", "/api/v1/analytics/top-sellers", "admin"),
+    ("sales_series", "GET", "/api/v1/analytics/sales", "admin"),
+]
+
+@pytest.mark.parametrize("name,method,path,role", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_indexes(client, shop, assert_no_full_scans, name, method, path, role):
+    """Test that no hot read path falls back to a full table scan"""
+    catalog_cache.clear()
+    with assert_no_full_scans(allow=ALLOWED_SCANS) as selects:
+        response = client.request(method, path.format(**shop), headers=shop[role] if role else None)
+
+    assert response.status_code == 200
+    assert selects
+
+def test_checkout_and_review_flow_uses_indexes(client, shop, assert_no_full_scans):
+    """Test the write paths that look up orders, items and reviews: checkout, status changes, reviews"""
+    sweet_id, admin, user = shop["unreviewed_id"], shop["admin"], shop["user"]
+    with assert_no_full_scans(allow=ALLOWED_SCANS):
+        order = client.post("/api/v1/orders/", json={"items": [{"sweet_id": sweet_id, "quantity": 1, "unit_price": 1}]},
+                            headers=user).json()
+        client.put(f"/api/v1/orders/{order['id']}", json={"status": "delivered"}, headers=admin)
+        review = client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 4}, headers=user)
+        client.delete(f"/api/v1/reviews/{review.json()['id']}", headers=user)
+        client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 1}, headers=user)
+        client.put(f"/api/v1/orders/{order['id']}", json={"status": "cancelled"}, headers=admin)
+
+    assert review.status_code == 201
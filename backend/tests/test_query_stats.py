@@ -0,0 +1,112 @@
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.core.query_stats import QueryStats, parse_server_timing, query_count
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_query_stats.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_ids(client, admin_headers):
+    return [
+        client.post("/api/v1/sweets/", json={"name": f"Sweet {i}", "category": "Candy", "price": 1.00, "quantity": 100},
+                    headers=admin_headers).json()["id"]
+        for i in range(10)
+    ]
+
+def order_data(sweet_ids):
+    return {"items": [{"sweet_id": sweet_id, "quantity": 1, "unit_price": 1.00} for sweet_id in sweet_ids]}
+
+class TestQueryStats:
+    def test_slowest_statement_tracked(self):
+        """Test count, total and slowest statement bookkeeping"""
+        stats = QueryStats()
+        stats.record("SELECT 1", 2.0)
+        stats.record("SELECT 2", 5.0)
+        stats.record("SELECT 3", 1.0)
+
+        assert stats.count == 3
+        assert stats.total_ms == 8.0
+        assert stats.slowest_statement == "SELECT 2"
+        assert parse_server_timing(stats.server_timing(10.0))["db-slowest"]["dur"] == 5.0
+
+class TestServerTimingHeader:
+    def test_header_reports_request_queries(self, client, sweet_ids, assert_max_queries):
+        """Test that the header counts exactly the statements the request issued"""
+        with assert_max_queries(100) as statements:
+            response = client.get("/api/v1/sweets/search?category=Candy")
+
+        metrics = parse_server_timing(response.headers["Server-Timing"])
+        assert query_count(response.headers["Server-Timing"]) == len(statements)
+        assert metrics["db"]["dur"] >= 0
+        assert metrics["app"]["dur"] >= metrics["db"]["dur"]
+
+    def test_requests_without_queries(self, client):
+        """Test that routes not touching the database report zero queries"""
+        assert query_count(client.get("/").headers["Server-Timing"]) == 0
+
+    def test_request_logged_as_json(self, client, sweet_ids, caplog):
+        """Test the structured request log line"""
+        with caplog.at_level(logging.INFO, logger="app.core.query_stats"):
+            client.get(f"/api/v1/sweets/{sweet_ids[0]}?fresh=1")
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["path"] == f"/api/v1/sweets/{sweet_ids[0]}"
+        assert record["status"] == 200
+        assert record["queries"] >= 1
+
+class TestQueryBudgets:
+    def test_create_order_queries_independent_of_items(self, client, admin_headers, sweet_ids):
+        """Test that order creation issues the same statements for 1 or 10 items"""
+        one = client.post("/api/v1/orders/", json=order_data(sweet_ids[:1]), headers=admin_headers)
+        ten = client.post("/api/v1/orders/", json=order_data(sweet_ids), headers=admin_headers)
+
+        assert one.status_code == ten.status_code == 201
+        assert query_count(ten.headers["Server-Timing"]) == query_count(one.headers["Server-Timing"])
+
+    def test_catalog_endpoint_budgets(self, client, admin_headers, sweet_ids, assert_max_queries):
+        """Cap the statements issued by the catalog and review read paths"""
+        with assert_max_queries(2):
+            client.get("/api/v1/sweets/?limit=5")
+        with assert_max_queries(2):
+            client.get("/api/v1/sweets/search?query=sweet")
+        with assert_max_queries(1):
+            client.get(f"/api/v1/reviews/sweet/{sweet_ids[0]}")
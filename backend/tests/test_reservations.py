@@ -0,0 +1,234 @@
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.config import settings
+from app.db.database import Base, get_db
+from app.models.reservation import StockReservation
+from app.models.sweet import Sweet
+from app.models.user import User
+from app.services.outbox_service import utcnow
+from reservation_sweeper import sweep
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_reservations.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def login(client, email):
+    user_data = {"email": email, "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def alice(client):
+    return login(client, "alice@example.com")
+
+@pytest.fixture
+def bob(client):
+    return login(client, "bob@example.com")
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 5}
+    return client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+
+def reserve(client, headers, sweet_id, quantity):
+    return client.post("/api/v1/reservations/", json={"items": [{"sweet_id": sweet_id, "quantity": quantity}]},
+                       headers=headers)
+
+def order(client, headers, sweet_id, quantity):
+    order_data = {"items": [{"sweet_id": sweet_id, "quantity": quantity, "unit_price": 3.00}]}
+    return client.post("/api/v1/orders/", json=order_data, headers=headers)
+
+def stock(sweet_id):
+    db = TestingSessionLocal()
+    try:
+        sweet = db.get(Sweet, sweet_id)
+        return sweet.quantity, sweet.reserved_quantity
+    finally:
+        db.close()
+
+def expire_holds(**filters):
+    db = TestingSessionLocal()
+    db.query(StockReservation).filter_by(**filters).update(
+        {StockReservation.expires_at: utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+    db.close()
+
+class TestReservations:
+    def test_reservation_holds_stock(self, client, alice, bob, sweet_id):
+        """Test that held units are unavailable to other shoppers"""
+        response = reserve(client, alice, sweet_id, 3)
+
+        assert response.status_code == 201
+        assert response.json()[0]["quantity"] == 3
+        assert client.get(f"/api/v1/sweets/{sweet_id}?fresh=1").json()["available_quantity"] == 2
+        assert stock(sweet_id) == (5, 3)
+
+        assert reserve(client, bob, sweet_id, 3).status_code == 400
+        rejected = order(client, bob, sweet_id, 3)
+        assert rejected.status_code == 400
+        assert "Available: 2" in rejected.json()["detail"]
+        rejected = client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 3},
+                               headers=bob)
+        assert rejected.status_code == 400
+        assert order(client, bob, sweet_id, 2).status_code == 201
+        assert stock(sweet_id) == (3, 3)
+
+    def test_checkout_consumes_own_holds(self, client, alice, sweet_id):
+        """Test that the holder can buy what they hold and the hold is used up"""
+        reserve(client, alice, sweet_id, 4)
+        reserve(client, alice, sweet_id, 1)
+
+        assert order(client, alice, sweet_id, 5).status_code == 201
+        assert stock(sweet_id) == (0, 0)
+        assert client.get("/api/v1/reservations/", headers=alice).json() == []
+
+    def test_purchase_consumes_own_holds(self, client, alice, sweet_id):
+        reserve(client, alice, sweet_id, 5)
+        response = client.post(f"/api/v1/sweets/{sweet_id}/purchase", json={"sweet_id": sweet_id, "quantity": 2},
+                               headers=alice)
+
+        assert response.status_code == 200
+        # The rest of the hold goes back on the shelf
+        assert stock(sweet_id) == (3, 0)
+
+    def test_release(self, client, alice, bob, sweet_id):
+        """Test that only the holder can release a reservation"""
+        reservation_id = reserve(client, alice, sweet_id, 2).json()[0]["id"]
+
+        assert client.delete(f"/api/v1/reservations/{reservation_id}", headers=bob).status_code == 404
+        assert client.delete(f"/api/v1/reservations/{reservation_id}", headers=alice).status_code == 200
+        assert stock(sweet_id) == (5, 0)
+        assert client.delete(f"/api/v1/reservations/{reservation_id}", headers=alice).status_code == 404
+
+    def test_unknown_sweet(self, client, alice):
+        assert reserve(client, alice, "missing", 1).status_code == 404
+
+    def test_per_user_cap(self, client, alice, bob, sweet_id, monkeypatch):
+        """Test that one shopper cannot hold more than the cap of a sweet, across requests"""
+        monkeypatch.setattr(settings, "RESERVATION_MAX_PER_SWEET", 3)
+
+        assert reserve(client, alice, sweet_id, 2).status_code == 201
+        rejected = reserve(client, alice, sweet_id, 2)
+        assert rejected.status_code == 400
+        assert rejected.json()["detail"] == "Reservation limit of 3 per sweet reached for Fudge"
+        assert stock(sweet_id) == (5, 2)
+
+        assert reserve(client, alice, sweet_id, 1).status_code == 201
+        assert reserve(client, bob, sweet_id, 2).status_code == 201
+        assert stock(sweet_id) == (5, 5)
+
+    def test_own_expired_holds_released_on_reserve(self, client, alice, bob, sweet_id, monkeypatch):
+        """Test that a shopper's expired holds stop counting when they reserve again, before any sweep"""
+        monkeypatch.setattr(settings, "RESERVATION_MAX_PER_SWEET", 3)
+        reserve(client, alice, sweet_id, 3)
+        reserve(client, bob, sweet_id, 2)
+        expire_holds()
+
+        assert reserve(client, alice, sweet_id, 3).status_code == 201
+        # Bob's expired hold still blocks stock until it is swept
+        assert stock(sweet_id) == (5, 5)
+        assert sweep(TestingSessionLocal, 10) == 1
+        assert stock(sweet_id) == (5, 3)
+
+    def test_delete_sweet_drops_its_holds(self, client, admin_headers, alice, sweet_id):
+        reserve(client, alice, sweet_id, 2)
+
+        assert client.delete(f"/api/v1/sweets/{sweet_id}", headers=admin_headers).status_code == 200
+        assert client.get("/api/v1/reservations/", headers=alice).json() == []
+        db = TestingSessionLocal()
+        assert db.query(StockReservation).count() == 0
+        db.close()
+
+    def test_quantity_cannot_drop_below_reserved(self, client, admin_headers, alice, sweet_id):
+        """Test that admin edits keep on-hand stock at or above the reserved units"""
+        reserve(client, alice, sweet_id, 3)
+
+        response = client.put(f"/api/v1/sweets/{sweet_id}", json={"quantity": 2, "price": 9.00}, headers=admin_headers)
+        assert response.status_code == 400
+        assert "3 units held by reservations" in response.json()["detail"]
+        assert client.get(f"/api/v1/sweets/{sweet_id}?fresh=1").json()["price"] == "3.00"
+
+        response = client.put(f"/api/v1/sweets/{sweet_id}", json={"quantity": 3}, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["available_quantity"] == 0
+        restocked = client.post(f"/api/v1/sweets/{sweet_id}/restock?quantity=2", headers=admin_headers)
+        assert restocked.json()["quantity"] == 5
+        assert stock(sweet_id) == (5, 3)
+
+class TestSweeper:
+    def test_sweeps_expired_holds_in_batches(self, client, alice, bob, sweet_id):
+        """Test that expired holds are released in bulk and stop being listed"""
+        for _ in range(3):
+            reserve(client, alice, sweet_id, 1)
+        kept = reserve(client, bob, sweet_id, 2).json()[0]["id"]
+        expire_holds(quantity=1)
+
+        assert client.get("/api/v1/reservations/", headers=alice).json() == []
+        assert sweep(TestingSessionLocal, 2) == 3
+        assert stock(sweet_id) == (5, 2)
+        assert [row["id"] for row in client.get("/api/v1/reservations/", headers=bob).json()] == [kept]
+        assert sweep(TestingSessionLocal, 2) == 0
+
+class TestCancellationRestock:
+    def test_cancel_returns_stock(self, client, admin_headers, alice, sweet_id):
+        """Test that cancelling restocks and undoing the cancellation takes the stock again"""
+        order_id = order(client, alice, sweet_id, 4).json()["id"]
+        assert stock(sweet_id) == (1, 0)
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+        assert stock(sweet_id) == (5, 0)
+        # Repeating the same status changes nothing
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+        assert stock(sweet_id) == (5, 0)
+
+        assert client.put(f"/api/v1/orders/{order_id}", json={"status": "confirmed"},
+                          headers=admin_headers).status_code == 200
+        assert stock(sweet_id) == (1, 0)
+
+    def test_uncancel_needs_stock(self, client, admin_headers, alice, bob, sweet_id):
+        """Test that a cancellation cannot be undone once the stock was sold again"""
+        order_id = order(client, alice, sweet_id, 4).json()["id"]
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+        order(client, bob, sweet_id, 3)
+
+        response = client.put(f"/api/v1/orders/{order_id}", json={"status": "confirmed"}, headers=admin_headers)
+        assert response.status_code == 400
+        assert stock(sweet_id) == (2, 0)
+        assert client.get(f"/api/v1/orders/{order_id}", headers=admin_headers).json()["status"] == "cancelled"
@@ -0,0 +1,202 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.models.user import User
+from app.models.sweet import Sweet
+from app.models.review import Review
+from app.models.reviewable_sweet import ReviewableSweet
+from app.services.reviewable_service import ReviewableService
+from app.services.sweet_service import SweetService
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_reviews.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(
+        email="admin@example.com",
+        hashed_password=auth_service.hash_password("admin123"),
+        is_admin=True
+    ))
+    db.commit()
+    db.close()
+
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def register_and_login(client, email):
+    """Register a regular user and return auth headers"""
+    user_data = {"email": email, "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweet_id(client, admin_headers):
+    sweet_data = {"name": "Fudge", "category": "Chocolate", "price": 3.00, "quantity": 50}
+    response = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers)
+    return response.json()["id"]
+
+def buy_and_deliver(client, admin_headers, user_headers, sweet_id, quantity=1, status="delivered"):
+    """Place an order for the sweet and move it to the given status"""
+    order_data = {"items": [{"sweet_id": sweet_id, "quantity": quantity, "unit_price": 3.00}]}
+    order = client.post("/api/v1/orders/", json=order_data, headers=user_headers).json()
+    client.put(f"/api/v1/orders/{order['id']}", json={"status": status}, headers=admin_headers)
+    return order["id"]
+
+class TestReviewRatingAggregates:
+    def test_create_review_updates_sweet_rating(self, client, admin_headers, sweet_id):
+        """Test that creating reviews maintains the sweet's rating aggregates"""
+        for email, rating in [("a@example.com", 5), ("b@example.com", 2)]:
+            headers = register_and_login(client, email)
+            buy_and_deliver(client, admin_headers, headers, sweet_id)
+            response = client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": rating}, headers=headers)
+            assert response.status_code == 201
+
+        data = client.get(f"/api/v1/sweets/{sweet_id}").json()
+        assert data["review_count"] == 2
+        assert data["avg_rating"] == 3.5
+
+    def test_update_and_delete_review_adjust_rating(self, client, admin_headers, sweet_id):
+        """Test that updating and deleting a review keeps aggregates in sync"""
+        headers = register_and_login(client, "c@example.com")
+        buy_and_deliver(client, admin_headers, headers, sweet_id)
+        review = client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 2}, headers=headers).json()
+
+        client.put(f"/api/v1/reviews/{review['id']}", json={"rating": 4}, headers=headers)
+        data = client.get(f"/api/v1/sweets/{sweet_id}").json()
+        assert data["review_count"] == 1
+        assert data["avg_rating"] == 4.0
+
+        client.delete(f"/api/v1/reviews/{review['id']}", headers=headers)
+        data = client.get(f"/api/v1/sweets/{sweet_id}").json()
+        assert data["review_count"] == 0
+        assert data["avg_rating"] == 0.0
+
+    def test_search_min_rating_uses_aggregates(self, client, admin_headers, sweet_id):
+        """Test that min_rating filters on the persisted average"""
+        headers = register_and_login(client, "d@example.com")
+        buy_and_deliver(client, admin_headers, headers, sweet_id)
+        client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 4}, headers=headers)
+        client.post("/api/v1/sweets/", json={"name": "Toffee", "category": "Caramel", "price": 1.00, "quantity": 5}, headers=admin_headers)
+
+        response = client.get("/api/v1/sweets/search?min_rating=3")
+
+        assert response.status_code == 200
+        assert [sweet["id"] for sweet in response.json()] == [sweet_id]
+
+    def test_recompute_rating_aggregates(self, client, sweet_id):
+        """Test that the repair path rebuilds aggregates from the reviews table"""
+        db = TestingSessionLocal()
+        user = User(email="e@example.com", hashed_password="hash")
+        db.add(user)
+        db.commit()
+        db.add(Review(user_id=user.id, sweet_id=sweet_id, rating=3))
+        db.query(Sweet).filter(Sweet.id == sweet_id).update({Sweet.rating_sum: 99, Sweet.review_count: 7})
+        db.commit()
+
+        SweetService(db).recompute_rating_aggregates()
+
+        sweet = db.query(Sweet).filter(Sweet.id == sweet_id).first()
+        assert sweet.rating_sum == 3
+        assert sweet.review_count == 1
+        assert sweet.avg_rating == 3.0
+        db.close()
+
+def purchasable(client, headers):
+    return [item["sweet_id"] for item in client.get("/api/v1/reviews/purchasable-items", headers=headers).json()]
+
+class TestReviewableSweets:
+    def test_order_status_controls_eligibility(self, client, admin_headers, sweet_id):
+        """Test that only confirmed or delivered orders make their sweets reviewable"""
+        headers = register_and_login(client, "f@example.com")
+        order_id = buy_and_deliver(client, admin_headers, headers, sweet_id, status="shipped")
+        assert purchasable(client, headers) == []
+        rejected = client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 5}, headers=headers)
+        assert rejected.status_code == 400
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "delivered"}, headers=admin_headers)
+        assert purchasable(client, headers) == [sweet_id]
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+        assert purchasable(client, headers) == []
+
+    def test_quantities_merge_across_orders(self, client, admin_headers, sweet_id):
+        """Test that repeat purchases give one entry and cancelling one order keeps the other"""
+        headers = register_and_login(client, "g@example.com")
+        first = buy_and_deliver(client, admin_headers, headers, sweet_id, quantity=2)
+        buy_and_deliver(client, admin_headers, headers, sweet_id, quantity=3, status="confirmed")
+
+        items = client.get("/api/v1/reviews/purchasable-items", headers=headers).json()
+        assert [(item["sweet_name"], item["purchased_quantity"]) for item in items] == [("Fudge", 5)]
+
+        client.put(f"/api/v1/orders/{first}", json={"status": "cancelled"}, headers=admin_headers)
+        items = client.get("/api/v1/reviews/purchasable-items", headers=headers).json()
+        assert [item["purchased_quantity"] for item in items] == [3]
+
+    def test_review_consumes_and_delete_restores(self, client, admin_headers, sweet_id):
+        """Test that reviewing hides the sweet, blocks a second review, and deleting restores it"""
+        headers = register_and_login(client, "h@example.com")
+        buy_and_deliver(client, admin_headers, headers, sweet_id)
+        review = client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 4}, headers=headers).json()
+        assert purchasable(client, headers) == []
+
+        duplicate = client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 1}, headers=headers)
+        assert duplicate.status_code == 400
+        assert duplicate.json()["detail"] == "You have already reviewed this sweet"
+        assert client.get(f"/api/v1/sweets/{sweet_id}").json()["review_count"] == 1
+
+        client.delete(f"/api/v1/reviews/{review['id']}", headers=headers)
+        assert purchasable(client, headers) == [sweet_id]
+
+    def test_listing_is_one_lookup(self, client, admin_headers, sweet_id, assert_max_queries):
+        """Test that the listing does not scan the buyer's order history"""
+        headers = register_and_login(client, "i@example.com")
+        for _ in range(5):
+            buy_and_deliver(client, admin_headers, headers, sweet_id)
+
+        with assert_max_queries(3) as statements:
+            assert purchasable(client, headers) == [sweet_id]
+
+        assert not any("order_items" in statement for statement in statements)
+
+    def test_rebuild_matches_maintained_rows(self, client, admin_headers, sweet_id):
+        """Test that the repair path reproduces the incrementally maintained index"""
+        headers = register_and_login(client, "j@example.com")
+        buy_and_deliver(client, admin_headers, headers, sweet_id, quantity=2)
+        client.post("/api/v1/reviews/", json={"sweet_id": sweet_id, "rating": 4}, headers=headers)
+
+        db = TestingSessionLocal()
+        snapshot = lambda: {(row.user_id, row.sweet_id, row.purchased_quantity, row.reviewed)
+                            for row in db.query(ReviewableSweet)}
+        maintained = snapshot()
+        assert ReviewableService(db).rebuild() == 1
+        db.expire_all()
+        assert snapshot() == maintained
+        db.close()
@@ -0,0 +1,255 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.models.order import Order
+from app.models.sales_daily import SalesDaily
+from app.models.sweet_demand import SweetDemand
+from app.models.user import User
+from app.services.demand_service import DemandService, smoothed, utc_today
+from app.services.sales_service import SalesService
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_sales.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def user_headers(client):
+    """Create regular user and return auth headers"""
+    user_data = {"email": "user@example.com", "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def sweets(client, admin_headers):
+    """Fudge (3.00, Chocolate) and Toffee (1.25, Caramel)"""
+    created = {}
+    for name, category, price in [("Fudge", "Chocolate", 3.00), ("Toffee", "Caramel", 1.25)]:
+        sweet_data = {"name": name, "category": category, "price": price, "quantity": 100}
+        created[name] = client.post("/api/v1/sweets/", json=sweet_data, headers=admin_headers).json()["id"]
+    return created
+
+def place_order(client, headers, lines):
+    order_data = {"items": [{"sweet_id": sweet_id, "quantity": quantity, "unit_price": 1.00}
+                            for sweet_id, quantity in lines]}
+    return client.post("/api/v1/orders/", json=order_data, headers=headers).json()["id"]
+
+def rollup():
+    db = TestingSessionLocal()
+    try:
+        return {(row.sweet_id, row.units, float(row.revenue)) for row in db.query(SalesDaily)}
+    finally:
+        db.close()
+
+class TestSalesRollup:
+    def test_orders_and_purchases_update_rollup(self, client, user_headers, sweets):
+        """Test that checkouts add units and revenue to today's row for each sweet"""
+        place_order(client, user_headers, [(sweets["Fudge"], 2), (sweets["Toffee"], 4)])
+        place_order(client, user_headers, [(sweets["Fudge"], 1)])
+        client.post(f"/api/v1/sweets/{sweets['Toffee']}/purchase",
+                    json={"sweet_id": sweets["Toffee"], "quantity": 2}, headers=user_headers)
+
+        assert rollup() == {(sweets["Fudge"], 3, 9.00), (sweets["Toffee"], 6, 7.50)}
+
+    def test_cancellation_is_taken_back(self, client, admin_headers, user_headers, sweets):
+        """Test that cancelling removes an order and un-cancelling restores it"""
+        order_id = place_order(client, user_headers, [(sweets["Fudge"], 2)])
+        place_order(client, user_headers, [(sweets["Fudge"], 1)])
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+        assert rollup() == {(sweets["Fudge"], 1, 3.00)}
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+        assert rollup() == {(sweets["Fudge"], 1, 3.00)}
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "confirmed"}, headers=admin_headers)
+        assert rollup() == {(sweets["Fudge"], 3, 9.00)}
+
+    def test_rebuild_matches_incremental_rollup(self, client, admin_headers, user_headers, sweets):
+        """Test that a backfill produces the same rows as the live updates"""
+        place_order(client, user_headers, [(sweets["Fudge"], 2), (sweets["Toffee"], 1)])
+        cancelled = place_order(client, user_headers, [(sweets["Toffee"], 5)])
+        client.put(f"/api/v1/orders/{cancelled}", json={"status": "cancelled"}, headers=admin_headers)
+        client.post(f"/api/v1/sweets/{sweets['Fudge']}/purchase",
+                    json={"sweet_id": sweets["Fudge"], "quantity": 1}, headers=user_headers)
+        incremental = rollup()
+
+        db = TestingSessionLocal()
+        assert SalesService(db).rebuild() == 2
+        db.close()
+
+        assert rollup() == incremental
+
+class TestSalesEndpoints:
+    @pytest.fixture
+    def history(self, client, user_headers, sweets):
+        """Orders spread over three days in January"""
+        lines = {1: [(sweets["Fudge"], 1)], 2: [(sweets["Toffee"], 10)], 3: [(sweets["Fudge"], 2)]}
+        order_days = {place_order(client, user_headers, order_lines): day for day, order_lines in lines.items()}
+        db = TestingSessionLocal()
+        for order_id, day in order_days.items():
+            db.query(Order).filter(Order.id == order_id).update({Order.created_at: datetime(2024, 1, day)})
+        db.commit()
+        SalesService(db).rebuild()
+        db.close()
+
+    def test_top_sellers_by_metric(self, client, admin_headers, sweets, history):
+        """Test ranking by revenue and by units over a day range"""
+        params = "start=2024-01-01&end=2024-01-31"
+        by_revenue = client.get(f"/api/v1/analytics/top-sellers?{params}", headers=admin_headers).json()
+        by_units = client.get(f"/api/v1/analytics/top-sellers?{params}&metric=units", headers=admin_headers).json()
+
+        assert [row["sweet_name"] for row in by_revenue] == ["Toffee", "Fudge"]
+        assert by_revenue[1] == {"sweet_id": sweets["Fudge"], "sweet_name": "Fudge", "category": "Chocolate",
+                                 "units": 3, "revenue": "9.00"}
+        assert [row["units"] for row in by_units] == [10, 3]
+
+        chocolate = client.get(f"/api/v1/analytics/top-sellers?{params}&category=Chocolate", headers=admin_headers)
+        assert [row["sweet_name"] for row in chocolate.json()] == ["Fudge"]
+
+    def test_time_series(self, client, admin_headers, sweets, history):
+        """Test per-day totals, inclusive bounds and the per-sweet filter"""
+        series = client.get("/api/v1/analytics/sales?start=2024-01-02&end=2024-01-03", headers=admin_headers)
+        assert series.json() == [
+            {"day": "2024-01-02", "units": 10, "revenue": "12.50"},
+            {"day": "2024-01-03", "units": 2, "revenue": "6.00"},
+        ]
+
+        fudge = client.get(f"/api/v1/analytics/sales?start=2024-01-01&end=2024-01-31&sweet_id={sweets['Fudge']}",
+                           headers=admin_headers)
+        assert [point["day"] for point in fudge.json()] == ["2024-01-01", "2024-01-03"]
+
+    def test_reads_only_the_rollup(self, client, admin_headers, history, assert_max_queries):
+        """Test that reports never scan order or purchase history"""
+        with assert_max_queries(4) as statements:
+            client.get("/api/v1/analytics/top-sellers?start=2024-01-01&end=2024-01-31", headers=admin_headers)
+            client.get("/api/v1/analytics/sales?start=2024-01-01&end=2024-01-31", headers=admin_headers)
+
+        assert not any("order_items" in statement or "purchases" in statement for statement in statements)
+
+    def test_invalid_range_rejected(self, client, admin_headers):
+        response = client.get("/api/v1/analytics/sales?start=2024-02-01&end=2024-01-01", headers=admin_headers)
+        assert response.status_code == 400
+
+    def test_requires_admin(self, client, user_headers):
+        assert client.get("/api/v1/analytics/top-sellers", headers=user_headers).status_code == 403
+
+class TestDemand:
+    def test_incremental_matches_daily_ewma(self, client, sweets):
+        """Test that out-of-order and same-day updates equal the EWMA over the full daily series"""
+        alpha = 0.5
+        daily = {date(2024, 1, 1): 4, date(2024, 1, 2): 0, date(2024, 1, 3): 2, date(2024, 1, 4): 6}
+        db = TestingSessionLocal()
+        service = DemandService(db, alpha=alpha)
+        service.record({(date(2024, 1, 1), sweets["Fudge"]): 3})
+        service.record({(date(2024, 1, 3), sweets["Fudge"]): 2})
+        # A late sale on a closed day, a second sale on the first day and a sale taken back
+        service.record({(date(2024, 1, 1), sweets["Fudge"]): 1})
+        service.record({(date(2024, 1, 4), sweets["Fudge"]): 7})
+        service.record({(date(2024, 1, 4), sweets["Fudge"]): -1})
+        row = db.get(SweetDemand, sweets["Fudge"])
+
+        expected = 0.0
+        for day in sorted(daily):
+            expected = alpha * daily[day] + (1 - alpha) * expected
+        today = date(2024, 1, 5)
+        assert smoothed(row.ewma_units, row.day, row.day_units, today, alpha) == pytest.approx(expected)
+        # Idle days decay the average
+        assert smoothed(row.ewma_units, row.day, row.day_units, today + timedelta(days=2), alpha) == \
+            pytest.approx(expected * 0.25)
+        db.close()
+
+    def test_sales_update_demand(self, client, admin_headers, user_headers, sweets):
+        """Test that orders, purchases and cancellations feed today's demand"""
+        place_order(client, user_headers, [(sweets["Fudge"], 2), (sweets["Toffee"], 4)])
+        cancelled = place_order(client, user_headers, [(sweets["Fudge"], 5)])
+        client.post(f"/api/v1/sweets/{sweets['Fudge']}/purchase",
+                    json={"sweet_id": sweets["Fudge"], "quantity": 1}, headers=user_headers)
+        client.put(f"/api/v1/orders/{cancelled}", json={"status": "cancelled"}, headers=admin_headers)
+
+        db = TestingSessionLocal()
+        demand = {row.sweet_id: (row.day, row.day_units, row.ewma_units) for row in db.query(SweetDemand)}
+        db.close()
+        assert demand == {sweets["Fudge"]: (utc_today(), 3, 0.0), sweets["Toffee"]: (utc_today(), 4, 0.0)}
+
+    def test_rebuild_replays_rollup(self, client, user_headers, sweets):
+        """Test that a backfill from sales_daily gives the same rows as live updates"""
+        place_order(client, user_headers, [(sweets["Fudge"], 2), (sweets["Toffee"], 1)])
+        db = TestingSessionLocal()
+        live = {row.sweet_id: (row.day, row.day_units, row.ewma_units) for row in db.query(SweetDemand)}
+
+        assert DemandService(db).rebuild() == 2
+        assert {row.sweet_id: (row.day, row.day_units, row.ewma_units) for row in db.query(SweetDemand)} == live
+        db.close()
+
+class TestRestockRecommendations:
+    def test_recommends_cover_plus_threshold(self, client, admin_headers, user_headers, sweets):
+        """Test that the shortfall is days of smoothed demand plus the threshold, less stock"""
+        place_order(client, user_headers, [(sweets["Fudge"], 10)])
+        client.put(f"/api/v1/sweets/{sweets['Toffee']}", json={"reorder_threshold": 120}, headers=admin_headers)
+        db = TestingSessionLocal()
+        # Close today's sales as yesterday's
+        db.query(SweetDemand).update({SweetDemand.day: utc_today() - timedelta(days=1)})
+        db.commit()
+        db.close()
+
+        response = client.get("/api/v1/analytics/restock-recommendations?days=40", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.json() == [
+            # 0.3 * 10 units a day for 40 days, 90 left
+            {"sweet_id": sweets["Fudge"], "sweet_name": "Fudge", "category": "Chocolate", "quantity": 90,
+             "reorder_threshold": None, "daily_demand": 3.0, "recommended_quantity": 30},
+            # No sales, but 20 below its threshold
+            {"sweet_id": sweets["Toffee"], "sweet_name": "Toffee", "category": "Caramel", "quantity": 100,
+             "reorder_threshold": 120, "daily_demand": 0.0, "recommended_quantity": 20},
+        ]
+
+    def test_reads_no_order_history(self, client, admin_headers, user_headers, sweets, assert_max_queries):
+        """Test that recommendations come from the demand table alone"""
+        place_order(client, user_headers, [(sweets["Fudge"], 10)])
+
+        with assert_max_queries(2) as statements:
+            response = client.get("/api/v1/analytics/restock-recommendations", headers=admin_headers)
+
+        assert response.json() == []
+        assert not any("order_items" in statement or "sales_daily" in statement for statement in statements)
+
+    def test_requires_admin(self, client, user_headers):
+        response = client.get("/api/v1/analytics/restock-recommendations", headers=user_headers)
+        assert response.status_code == 403
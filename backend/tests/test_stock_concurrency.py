@@ -0,0 +1,114 @@
+import threading
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints.orders import create_order
+from app.core.idempotency import IdempotentRequest
+from app.db.database import Base
+from app.models.order import OrderItem
+from app.models.purchase import Purchase
+from app.models.sweet import Sweet
+from app.models.user import User
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.sweet_service import SweetService
+
+# Test database setup; a file database so every thread gets its own connection
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_stock.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False, "timeout": 30})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+INITIAL_STOCK = 60
+THREADS = 8
+ATTEMPTS_PER_THREAD = 15
+
+@pytest.fixture
+def hot_sweet():
+    """A single popular SKU and a buyer"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = User(email="buyer@example.com", hashed_password="hash")
+    sweet = Sweet(name="Limited Edition Fudge", category="Chocolate", price=Decimal("5.00"), quantity=INITIAL_STOCK)
+    db.add_all([user, sweet])
+    db.commit()
+    ids = (sweet.id, user.id)
+    db.close()
+    yield ids
+    Base.metadata.drop_all(bind=engine)
+
+def purchase(sweet_id, user_id):
+    db = TestingSessionLocal()
+    try:
+        SweetService(db).purchase_sweet(sweet_id, user_id, quantity=1)
+        return True
+    except HTTPException as e:
+        assert e.status_code == 400
+        return False
+    finally:
+        db.close()
+
+def order(sweet_id, user_id):
+    db = TestingSessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        order_data = OrderCreate(items=[OrderItemCreate(sweet_id=sweet_id, quantity=1, unit_price=Decimal("5.00"))])
+        create_order(order_data, db=db, current_user=user, idempotency=IdempotentRequest())
+        return True
+    except HTTPException as e:
+        assert e.status_code == 400
+        return False
+    finally:
+        db.close()
+
+class TestConcurrentStockDecrement:
+    def test_no_oversell_under_contention(self, hot_sweet):
+        """Hammer one SKU from many threads through both checkout paths"""
+        sweet_id, user_id = hot_sweet
+        successes = []
+        barrier = threading.Barrier(THREADS)
+
+        def worker(checkout):
+            barrier.wait()
+            for _ in range(ATTEMPTS_PER_THREAD):
+                successes.append(checkout(sweet_id, user_id))
+
+        threads = [
+            threading.Thread(target=worker, args=(purchase if i % 2 else order,))
+            for i in range(THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        attempts = THREADS * ATTEMPTS_PER_THREAD
+
+        db = TestingSessionLocal()
+        sold = sum(p.quantity for p in db.query(Purchase).all()) + sum(i.quantity for i in db.query(OrderItem).all())
+        remaining = db.query(Sweet).filter(Sweet.id == sweet_id).first().quantity
+        db.close()
+
+        assert len(successes) == attempts
+        assert sum(successes) == INITIAL_STOCK
+        assert sold == INITIAL_STOCK
+        assert remaining == 0
+
+    def test_order_rejects_lines_exceeding_stock_together(self, hot_sweet):
+        """Two lines for the same sweet cannot jointly exceed stock"""
+        sweet_id, user_id = hot_sweet
+        db = TestingSessionLocal()
+        user = db.query(User).filter(User.id == user_id).first()
+        line = OrderItemCreate(sweet_id=sweet_id, quantity=INITIAL_STOCK // 2 + 1, unit_price=Decimal("5.00"))
+
+        with pytest.raises(HTTPException) as exc_info:
+            create_order(OrderCreate(items=[line, line]), db=db, current_user=user, idempotency=IdempotentRequest())
+
+        assert exc_info.value.status_code == 400
+        db.close()
+        db = TestingSessionLocal()
+        assert db.query(Sweet).filter(Sweet.id == sweet_id).first().quantity == INITIAL_STOCK
+        assert db.query(OrderItem).count() == 0
+        db.close()
@@ -1,7 +1,8 @@
 import pytest
+from datetime import datetime
 from decimal import Decimal
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
@@ -246,4 +247,202 @@ class TestSweetSearch:
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 1
-        assert data[0]["name"] == "Medium Candy"
\ No newline at end of file
+        assert data[0]["name"] == "Medium Candy"
+
+class TestSweetCursorPagination:
+    def create_sweets(self, client, admin_token, count):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        for i in range(count):
+            sweet_data = {"name": f"Sweet {i}", "category": "Test", "price": 1.00 + i % 3, "quantity": 10}
+            client.post("/api/v1/sweets/", json=sweet_data, headers=headers)
+
+    def walk(self, client, url, params):
+        """Follow X-Next-Cursor headers and collect every page"""
+        pages = []
+        cursor = None
+        while True:
+            page_params = {**params, "cursor": cursor} if cursor else params
+            response = client.get(url, params=page_params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return pages
+
+    def test_catalog_cursor_walk(self, client, admin_token):
+        """Test that following cursors visits every sweet exactly once"""
+        self.create_sweets(client, admin_token, 5)
+
+        pages = self.walk(client, "/api/v1/sweets/", {"limit": 2})
+
+        ids = [sweet["id"] for page in pages for sweet in page]
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert len(set(ids)) == 5
+
+    def test_search_cursor_walk_sorted_by_price(self, client, admin_token):
+        """Test cursor pagination keyed on the active sort column"""
+        self.create_sweets(client, admin_token, 7)
+
+        pages = self.walk(client, "/api/v1/sweets/search", {"sort_by": "price", "sort_order": "desc", "limit": 3})
+
+        sweets = [sweet for page in pages for sweet in page]
+        prices = [float(sweet["price"]) for sweet in sweets]
+        assert len({sweet["id"] for sweet in sweets}) == 7
+        assert prices == sorted(prices, reverse=True)
+
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_cursor_walk_over_equal_created_at(self, client, sort_order):
+        """Test paging through sweets sharing a whole-second created_at, written from Python and by default"""
+        db = TestingSessionLocal()
+        same_second = datetime(2024, 1, 1, 12, 0, 0)
+        db.add_all(Sweet(name=f"Sweet {i}", category="Test", price=Decimal("1.00"), quantity=10,
+                         created_at=same_second) for i in range(5))
+        db.commit()
+        db.execute(text("INSERT INTO sweets (id, name, category, price, quantity, rating_sum, review_count, "
+                        "reserved_quantity, created_at) VALUES ('default-row', 'Sweet 5', 'Test', 1.00, 10, 0, 0, 0, "
+                        "'2024-01-01 12:00:00')"))
+        db.commit()
+        db.close()
+
+        pages = self.walk(client, "/api/v1/sweets/search",
+                          {"sort_by": "created_at", "sort_order": sort_order, "limit": 2})
+
+        ids = [sweet["id"] for page in pages for sweet in page]
+        unpaged = client.get("/api/v1/sweets/search",
+                             params={"sort_by": "created_at", "sort_order": sort_order, "limit": 10}).json()
+        assert len(set(ids)) == 6
+        assert ids == [sweet["id"] for sweet in unpaged]
+
+    def test_cursor_from_other_sort_rejected(self, client, admin_token):
+        """Test that a cursor cannot be reused with a different sort order"""
+        self.create_sweets(client, admin_token, 3)
+        response = client.get("/api/v1/sweets/?limit=1")
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = client.get("/api/v1/sweets/search", params={"sort_by": "price", "cursor": cursor})
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+
+class TestSweetFullTextSearch:
+    def create_catalog(self, client, admin_token):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        sweets = [
+            {"name": "Chocolate Bar", "category": "Chocolate", "price": 2.50, "quantity": 10,
+             "description": "Milk chocolate bar"},
+            {"name": "Truffle", "category": "Chocolate", "price": 4.99, "quantity": 5,
+             "description": "Ganache centre dusted with cocoa"},
+            {"name": "Vanilla Wafer", "category": "Cookie", "price": 1.00, "quantity": 15,
+             "description": "Crisp wafer with vanilla cream"},
+        ]
+        return [client.post("/api/v1/sweets/", json=sweet, headers=headers).json() for sweet in sweets]
+
+    def test_prefix_match(self, client, admin_token):
+        """Test that partial words match by prefix"""
+        self.create_catalog(client, admin_token)
+
+        response = client.get("/api/v1/sweets/search?query=choc")
+
+        assert response.status_code == 200
+        assert {sweet["name"] for sweet in response.json()} == {"Chocolate Bar", "Truffle"}
+
+    def test_description_is_searchable(self, client, admin_token):
+        """Test that the description column is indexed"""
+        self.create_catalog(client, admin_token)
+
+        response = client.get("/api/v1/sweets/search?query=ganache")
+
+        assert [sweet["name"] for sweet in response.json()] == ["Truffle"]
+
+    def test_best_match_first(self, client, admin_token):
+        """Test that results are ranked by BM25 when no sort is requested"""
+        self.create_catalog(client, admin_token)
+
+        response = client.get("/api/v1/sweets/search?query=chocolate")
+
+        assert response.json()[0]["name"] == "Chocolate Bar"
+
+    def test_index_follows_updates_and_deletes(self, client, admin_token):
+        """Test that triggers keep the index in sync with the sweets table"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        bar, truffle, _ = self.create_catalog(client, admin_token)
+        client.put(f"/api/v1/sweets/{truffle['id']}", json={"name": "Praline", "description": "Hazelnut"}, headers=headers)
+        client.delete(f"/api/v1/sweets/{bar['id']}", headers=headers)
+
+        assert client.get("/api/v1/sweets/search?query=ganache").json() == []
+        assert [sweet["name"] for sweet in client.get("/api/v1/sweets/search?query=hazel").json()] == ["Praline"]
+        assert [sweet["name"] for sweet in client.get("/api/v1/sweets/search?query=milk").json()] == []
+
+    def test_falls_back_to_like_without_index(self, client, admin_token):
+        """Test that search still works by name when the FTS index is missing"""
+        from app.db.fts import drop_sweet_fts
+        self.create_catalog(client, admin_token)
+        with engine.begin() as connection:
+            drop_sweet_fts(connection)
+
+        response = client.get("/api/v1/sweets/search?query=wafer")
+
+        assert [sweet["name"] for sweet in response.json()] == ["Vanilla Wafer"]
+
+class TestFacetedSearch:
+    def create_catalog(self, client, admin_token):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        for name, category, price, quantity in [
+            ("Milk Bar", "Chocolate", 0.80, 10),
+            ("Dark Bar", "Chocolate", 3.50, 0),
+            ("Ganache Truffle", "Chocolate", 12.00, 4),
+            ("Sour Worm", "Gummies", 1.50, 40),
+        ]:
+            client.post("/api/v1/sweets/", json={"name": name, "category": category, "price": price,
+                                                 "quantity": quantity}, headers=headers)
+
+    def test_facets_count_the_catalog(self, client, admin_token):
+        """Test category, price, rating and stock counts with no filters"""
+        self.create_catalog(client, admin_token)
+
+        response = client.get("/api/v1/sweets/search/faceted?limit=2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == 2
+        assert response.headers["X-Next-Cursor"]
+        facets = data["facets"]
+        assert facets["total"] == 4
+        assert facets["in_stock"] == 3
+        assert facets["categories"] == [{"value": "Chocolate", "count": 3}, {"value": "Gummies", "count": 1}]
+        assert [(bucket["min"], bucket["max"], bucket["count"]) for bucket in facets["price"]] == [
+            (0, 1, 1), (1, 2, 1), (2, 5, 1), (5, 10, 0), (10, 20, 1), (20, None, 0)
+        ]
+        assert [bucket["count"] for bucket in facets["rating"]] == [4, 0, 0, 0, 0]
+
+    def test_facets_follow_filters(self, client, admin_token):
+        """Test that facets describe only the filtered matches"""
+        self.create_catalog(client, admin_token)
+
+        data = client.get("/api/v1/sweets/search/faceted?query=bar&in_stock_only=true").json()
+
+        assert [sweet["name"] for sweet in data["items"]] == ["Milk Bar"]
+        assert data["facets"]["total"] == 1
+        assert data["facets"]["categories"] == [{"value": "Chocolate", "count": 1}]
+
+    def test_unfiltered_facets_cached_until_catalog_changes(self, client, admin_token, monkeypatch):
+        """Test that paging without filters reuses the facets, and writes refresh them"""
+        from app.services.sweet_service import SweetService
+        self.create_catalog(client, admin_token)
+        first = client.get("/api/v1/sweets/search/faceted?limit=1")
+
+        computed = []
+        original = SweetService._compute_facets
+        monkeypatch.setattr(SweetService, "_compute_facets",
+                            lambda service, filters: computed.append(filters) or original(service, filters))
+        second = client.get(f"/api/v1/sweets/search/faceted?limit=1&cursor={first.headers['X-Next-Cursor']}")
+        assert computed == []
+        assert second.json()["facets"] == first.json()["facets"]
+
+        client.post("/api/v1/sweets/", json={"name": "Fizz", "category": "Gummies", "price": 0.5, "quantity": 1},
+                    headers={"Authorization": f"Bearer {admin_token}"})
+        third = client.get("/api/v1/sweets/search/faceted?limit=1")
+
+        assert len(computed) == 1
+        assert third.json()["facets"]["total"] == 5
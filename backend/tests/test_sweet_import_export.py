@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.api.v1.endpoints import sweets
+from app.api.v1.async_routes import asyncify_router
+from app.db.database import Base, get_db
+from app.core.catalog_cache import catalog_cache
+from app.models.sweet import Sweet
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_sweet_import_export.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    catalog_cache.clear()
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def admin_headers(client):
+    """Create admin user and return auth headers"""
+    db = TestingSessionLocal()
+    from app.core.auth import auth_service
+    db.add(User(email="admin@example.com", hashed_password=auth_service.hash_password("admin123"), is_admin=True))
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def sweet_count():
+    db = TestingSessionLocal()
+    try:
+        return db.query(Sweet).count()
+    finally:
+        db.close()
+
+def csv_body(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["name", "category", "price", "quantity", "description"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+GOOD_ROWS = [
+    {"name": f"Toffee {i}", "category": "Toffee", "price": "1.50", "quantity": str(i), "description": ""}
+    for i in range(5)
+]
+
+class TestSweetImport:
+    def test_csv_import_reports_bad_rows(self, client, admin_headers):
+        """Test that valid rows are inserted and invalid ones reported by row number"""
+        broken = {"name": "Broken", "category": "Toffee", "price": "-1", "quantity": "1"}
+        rows = GOOD_ROWS[:2] + [broken] + GOOD_ROWS[2:]
+        response = client.post("/api/v1/sweets/import?format=csv", content=csv_body(rows), headers=admin_headers)
+
+        assert response.status_code == 200
+        report = response.json()
+        assert report["imported"] == 5
+        assert report["failed"] == 1
+        assert report["errors"][0]["row"] == 3
+        assert "price" in report["errors"][0]["error"]
+        assert sweet_count() == 5
+
+    def test_ndjson_import_reports_unreadable_lines(self, client, admin_headers):
+        """Test NDJSON import with a malformed line and a non-object line"""
+        lines = [json.dumps({"name": "Gummy Bear", "category": "Gummies", "price": 0.5, "quantity": 100}),
+                 "{not json", "", "[1, 2]",
+                 json.dumps({"name": "Gummy Worm", "category": "Gummies", "price": 0.6, "quantity": 80})]
+        response = client.post("/api/v1/sweets/import?format=ndjson", content="\n".join(lines).encode(),
+                               headers=admin_headers)
+
+        report = response.json()
+        assert report["imported"] == 2
+        assert [error["row"] for error in report["errors"]] == [2, 3]
+        assert sweet_count() == 2
+
+    def test_atomic_import_rolls_back_on_any_error(self, client, admin_headers):
+        """Test that transaction=all commits nothing when a row fails"""
+        rows = GOOD_ROWS + [{"name": "", "category": "Toffee", "price": "1.00", "quantity": "1"}]
+        response = client.post("/api/v1/sweets/import?transaction=all&batch_size=2", content=csv_body(rows),
+                               headers=admin_headers)
+
+        assert response.json()["imported"] == 0
+        assert response.json()["failed"] == 1
+        assert sweet_count() == 0
+
+    def test_rows_inserted_in_batches(self, client, admin_headers, assert_max_queries):
+        """Test that each batch is one executemany rather than one insert per row"""
+        rows = [dict(GOOD_ROWS[0], name=f"Fudge {i}") for i in range(50)]
+        with assert_max_queries(40) as statements:
+            response = client.post("/api/v1/sweets/import?batch_size=25", content=csv_body(rows),
+                                   headers=admin_headers)
+
+        assert response.json()["imported"] == 50
+        assert sum(statement.startswith("INSERT INTO sweets") for statement in statements) == 2
+
+    def test_import_bumps_catalog(self, client, admin_headers):
+        """Test that imported sweets are visible to cached catalog reads"""
+        assert client.get("/api/v1/sweets/").json() == []
+        client.post("/api/v1/sweets/import", content=csv_body(GOOD_ROWS), headers=admin_headers)
+        assert len(client.get("/api/v1/sweets/").json()) == 5
+
+    def test_import_requires_admin(self, client):
+        response = client.post("/api/v1/sweets/import", content=csv_body(GOOD_ROWS))
+        assert response.status_code in (401, 403)
+
+class TestSweetExport:
+    @pytest.mark.parametrize("format", ["csv", "ndjson"])
+    def test_export_round_trips(self, client, admin_headers, format):
+        """Test that an export can be imported back unchanged"""
+        client.post("/api/v1/sweets/import", content=csv_body(GOOD_ROWS), headers=admin_headers)
+        exported = client.get(f"/api/v1/sweets/export?format={format}", headers=admin_headers)
+
+        assert exported.status_code == 200
+        assert exported.headers["content-type"].startswith("text/csv" if format == "csv" else "application/x-ndjson")
+        assert f'filename="sweets.{format}"' in exported.headers["content-disposition"]
+
+        db = TestingSessionLocal()
+        db.query(Sweet).delete()
+        db.commit()
+        db.close()
+        report = client.post(f"/api/v1/sweets/import?format={format}", content=exported.content,
+                             headers=admin_headers).json()
+        assert report == {"imported": 5, "failed": 0, "errors": []}
+        names = sorted(sweet["name"] for sweet in client.get("/api/v1/sweets/").json())
+        assert names == sorted(row["name"] for row in GOOD_ROWS)
+
+    def test_streaming_routes_not_moved_to_async_session(self):
+        """Test that import and export keep their own session handling"""
+        router = asyncify_router(sweets.router)
+        endpoints_by_name = {route.name: route.endpoint for route in router.routes}
+        assert endpoints_by_name["export_sweets"] is sweets.export_sweets
+        assert endpoints_by_name["import_sweets"] is sweets.import_sweets
@@ -0,0 +1,143 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.core.cache import TTLCache
+from app.core.dependencies import user_cache
+from app.models.user import User
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_user_cache.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides[get_db] = previous_override
+
+@pytest.fixture
+def user_headers(client):
+    user_data = {"email": "cached@example.com", "password": "user123"}
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json=user_data)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def statements():
+    """Record SQL statements issued against the test database"""
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield executed
+    event.remove(engine, "before_cursor_execute", listener)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        """Test that entries are dropped once their TTL passes"""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, timer=clock)
+        cache.set("a", 1)
+
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+
+    def test_least_recently_used_evicted(self):
+        """Test that the cache stays within maxsize, evicting LRU entries"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_zero_ttl_disables_cache(self):
+        """Test that a TTL of 0 never stores anything"""
+        cache = TTLCache(maxsize=10, ttl=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+    def test_hit_miss_counters(self):
+        """Test hit and miss instrumentation"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.get("a")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == pytest.approx(2 / 3)
+
+class TestCurrentUserCache:
+    def test_repeat_requests_skip_user_query(self, client, user_headers, statements):
+        """Test that only the first authenticated request loads the user"""
+        for _ in range(3):
+            response = client.get("/api/v1/users/me", headers=user_headers)
+            assert response.status_code == 200
+            assert response.json()["email"] == "cached@example.com"
+
+        user_queries = [s for s in statements if "FROM users" in s]
+        assert len(user_queries) == 1
+        assert user_cache.stats()["hits"] == 2
+
+    def test_user_change_invalidates_entry(self, client, user_headers):
+        """Test that updating the user row evicts the cached identity"""
+        client.get("/api/v1/users/me", headers=user_headers)
+
+        db = TestingSessionLocal()
+        user = db.query(User).filter(User.email == "cached@example.com").first()
+        user.is_admin = True
+        db.commit()
+        db.close()
+
+        response = client.get("/api/v1/users/me", headers=user_headers)
+        assert response.json()["is_admin"] is True
+
+    def test_token_for_other_account_not_served_from_cache(self, client, user_headers):
+        """Test that a cached identity is ignored for a token with a different user id"""
+        client.get("/api/v1/users/me", headers=user_headers)
+        db = TestingSessionLocal()
+        db.query(User).delete()
+        db.commit()
+        db.close()
+
+        user_data = {"email": "cached@example.com", "password": "other123"}
+        client.post("/api/v1/auth/register", json=user_data)
+        token = client.post("/api/v1/auth/login", json=user_data).json()["access_token"]
+        response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+
+        db = TestingSessionLocal()
+        new_id = db.query(User).filter(User.email == "cached@example.com").first().id
+        db.close()
+        assert response.json()["id"] == new_id